@@ -0,0 +1,212 @@
+"""
+Betting / account api benchmark, runs each flumine call
+path (bflw request building, http and response parsing
+into resources) against a local MockBettingServer and
+reports requests/sec and latency percentiles, use
+--latency / --error-rate to simulate exchange latency
+and failures (errors are handled as the workers would).
+The server runs in process so absolute numbers include
+its own overhead, compare runs rather than paths.
+
+    python -m benchmarks.betting [--duration 5] [--threads 1 4]
+        [--latency 0.0] [--error-rate 0.0] [--paths placeOrders keepAlive]
+"""
+
+import time
+import queue
+import logging
+import argparse
+import threading
+from types import SimpleNamespace
+
+import betfairlightweight
+from betfairlightweight import BetfairError, filters
+
+from flumine import worker
+from flumine.clients.betfairclient import BetfairClient
+from flumine.testing.bettingserver import MockBettingServer
+
+MARKET_ID = "1.123"
+CLEARED_ORDER = {
+    "eventTypeId": "7",
+    "eventId": "1",
+    "marketId": MARKET_ID,
+    "selectionId": 1,
+    "handicap": 0.0,
+    "betId": "1",
+    "placedDate": "2030-01-01T12:00:00.000Z",
+    "persistenceType": "LAPSE",
+    "orderType": "LIMIT",
+    "side": "BACK",
+    "itemDescription": {},
+    "betOutcome": "WON",
+    "priceRequested": 2.0,
+    "settledDate": "2030-01-01T12:05:00.000Z",
+    "lastMatchedDate": "2030-01-01T12:00:00.000Z",
+    "betCount": 1,
+    "commission": 0.0,
+    "priceMatched": 2.0,
+    "priceReduced": False,
+    "sizeSettled": 2.0,
+    "profit": 2.0,
+    "sizeCancelled": 0.0,
+    "customerStrategyRef": "mock",
+}
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def create_paths(client: BetfairClient) -> dict:
+    """{api method: callable} for each flumine call path"""
+    betting = client.betting_client.betting
+    instruction = filters.place_instruction(
+        order_type="LIMIT",
+        selection_id=1,
+        side="BACK",
+        limit_order=filters.limit_order(size=2.0, price=3.0, persistence_type="LAPSE"),
+        customer_order_ref="mock-1",
+    )
+    market_ids = ["1.%s" % i for i in range(25)]
+    flumine = SimpleNamespace(
+        clients=SimpleNamespace(get_betfair_default=lambda: client),
+        handler_queue=queue.Queue(),
+        markets=SimpleNamespace(
+            markets={
+                market_id: SimpleNamespace(
+                    market_id=market_id, update_market_catalogue=True, closed=False
+                )
+                for market_id in market_ids
+            }
+        ),
+    )
+
+    def poll_account_balance():
+        worker.poll_account_balance({}, SimpleNamespace(clients=[client]))
+
+    def poll_market_catalogue():
+        worker.poll_market_catalogue({}, flumine)
+        _drain(flumine.handler_queue)
+
+    def get_cleared_orders():
+        worker._get_cleared_orders(flumine, client.betting_client, MARKET_ID)
+        _drain(flumine.handler_queue)
+
+    def get_cleared_market():
+        worker._get_cleared_market(flumine, client.betting_client, MARKET_ID)
+        _drain(flumine.handler_queue)
+
+    return {
+        "placeOrders": lambda: betting.place_orders(
+            MARKET_ID, [instruction], customer_ref="mock"
+        ),
+        "cancelOrders": lambda: betting.cancel_orders(
+            MARKET_ID, [filters.cancel_instruction("1")]
+        ),
+        "replaceOrders": lambda: betting.replace_orders(
+            MARKET_ID, [filters.replace_instruction("1", 3.5)]
+        ),
+        "updateOrders": lambda: betting.update_orders(
+            MARKET_ID, [filters.update_instruction("1", "PERSIST")]
+        ),
+        "keepAlive": client.betting_client.keep_alive,
+        "accountBalance": poll_account_balance,
+        "listMarketCatalogue": poll_market_catalogue,
+        "clearedOrders": get_cleared_orders,
+        "clearedMarket": get_cleared_market,
+    }
+
+
+def run(function, duration: float, threads: int = 1) -> dict:
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    end = time.perf_counter() + duration
+
+    def _run():
+        nonlocal errors
+        _latencies, _errors = [], 0
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            try:
+                function()
+            except BetfairError:
+                _errors += 1
+            _latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(_latencies)
+            errors += _errors
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=_run) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_sec": len(latencies) / elapsed,
+        "calls": len(latencies),
+        "errors": errors,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else float("nan"),
+    }
+
+
+def _drain(q: queue.Queue) -> None:
+    while not q.empty():
+        q.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--paths", nargs="*")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    server = MockBettingServer(
+        latency=args.latency,
+        cleared_orders=[CLEARED_ORDER],
+        seed=1,
+    )
+    server.start()
+    betting_client = betfairlightweight.APIClient("mock", "mock", app_key="mock")
+    server.configure(betting_client)
+    client = BetfairClient(betting_client, interactive_login=True)
+    client.login()
+    server.error_rate = args.error_rate
+    paths = create_paths(client)
+
+    print(
+        "%20s %7s %10s %8s %9s %9s %9s"
+        % ("path", "threads", "req/s", "errors", "p50 ms", "p99 ms", "max ms")
+    )
+    for name in args.paths or paths:
+        for threads in args.threads:
+            server.errors.clear()
+            result = run(paths[name], args.duration, threads)
+            print(
+                "%20s %7s %10.0f %8s %9.2f %9.2f %9.2f"
+                % (
+                    name,
+                    threads,
+                    result["requests_per_sec"],
+                    sum(server.errors.values()),
+                    result["p50"] * 1e3,
+                    result["p99"] * 1e3,
+                    result["max"] * 1e3,
+                )
+            )
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Stream decoder benchmark, decodes the recorded stream
+files in tests/resources with each available decoder
+and reports messages/sec for decode only and for the
+full listener path (decode + cache update).
+
+    python -m benchmarks.decoders [--repeat 5] [files..]
+"""
+
+import os
+import gzip
+import time
+import logging
+import argparse
+
+from flumine.streams.decoder import get_decoder, available_decoders
+from flumine.streams.listener import FlumineStreamListener
+
+RESOURCES = os.path.join(os.path.dirname(__file__), "..", "tests", "resources")
+DEFAULT_FILES = ["BASIC-1.132153978", "1.200806927"]
+
+
+def load(path: str) -> list:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        return [line for line in f if line.strip()]
+
+
+def bench_decode(decoder_name: str, lines: list, repeat: int) -> float:
+    decoder = get_decoder(decoder_name)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            decoder(line)
+    return len(lines) * repeat / (time.perf_counter() - start)
+
+
+def bench_listener(decoder_name: str, lines: list, repeat: int) -> float:
+    elapsed = 0
+    for _ in range(repeat):
+        listener = FlumineStreamListener(max_latency=None, decoder=decoder_name)
+        listener.register_stream(0, "marketSubscription")
+        start = time.perf_counter()
+        for line in lines:
+            listener.on_data(line)
+        elapsed += time.perf_counter() - start
+    return len(lines) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    for file_name in args.files:
+        path = (
+            file_name
+            if os.path.exists(file_name)
+            else os.path.join(RESOURCES, file_name)
+        )
+        lines = load(path)
+        print("%s (%s messages)" % (file_name, len(lines)))
+        print("  %-10s %15s %15s" % ("decoder", "decode msg/s", "listener msg/s"))
+        for decoder_name in available_decoders():
+            print(
+                "  %-10s %15.0f %15.0f"
+                % (
+                    decoder_name,
+                    bench_decode(decoder_name, lines, args.repeat),
+                    bench_listener(decoder_name, lines, args.repeat),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Off process parsing benchmark, replays the recorded
+stream files in tests/resources through a listener with
+inline decoding and with a ParserPool of n processes and
+reports messages/sec plus the main process CPU time per
+message (the CPU contending with the handler thread).
+
+    python -m benchmarks.parsing [--repeat 20] [--processes 1 2] [files..]
+"""
+
+import os
+import time
+import queue
+import logging
+import argparse
+
+from flumine.streams.listener import FlumineStreamListener
+from .decoders import RESOURCES, DEFAULT_FILES, load
+
+
+def bench(lines: list, processes: int, repeat: int) -> tuple:
+    output_queue = queue.Queue()
+    listener = FlumineStreamListener(
+        output_queue=output_queue, max_latency=None, parse_processes=processes
+    )
+    listener.register_stream(0, "marketSubscription")
+    if processes:
+        listener.on_data(lines[0])  # start the pool outside the timings
+        output_queue.get(timeout=60)
+    messages = len(lines) * repeat
+    start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(repeat):
+        for line in lines:
+            listener.on_data(line)
+    for _ in range(messages):
+        output_queue.get(timeout=60)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    listener.close()
+    return messages / elapsed, cpu / messages * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2])
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    for file_name in args.files:
+        path = (
+            file_name
+            if os.path.exists(file_name)
+            else os.path.join(RESOURCES, file_name)
+        )
+        lines = load(path)
+        print("%s (%s messages)" % (file_name, len(lines)))
+        print("  %-10s %15s %20s" % ("processes", "msg/s", "main cpu us/msg"))
+        for processes in [0] + args.processes:
+            rate, cpu = bench(lines, processes, args.repeat)
+            print("  %-10s %15.0f %20.1f" % (processes or "inline", rate, cpu))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+MarketBook resource benchmark, replays the recorded
+stream files in tests/resources through a listener with
+the bflw streaming resources and with the lazy slotted
+resources from flumine.patching and reports updates/sec
+plus the memory allocated (retained) and peak per book
+when the output books are kept.
+
+    python -m benchmarks.patching [--repeat 5] [files..]
+"""
+
+import os
+import time
+import queue
+import logging
+import argparse
+import tracemalloc
+
+from betfairlightweight.resources import bettingresources, streamingresources
+from betfairlightweight.streaming import cache
+
+from flumine import patching
+from flumine.streams.listener import FlumineStreamListener
+from .decoders import RESOURCES, DEFAULT_FILES, load
+
+RESOURCES_CLASSES = {
+    "bflw": (
+        bettingresources.MarketBook,
+        bettingresources.RunnerBook,
+        streamingresources.MarketDefinition,
+        patching._process_market_definition,
+    ),
+    "patched": (
+        patching.MarketBook,
+        patching.RunnerBook,
+        patching.MarketDefinition,
+        patching.process_market_definition,
+    ),
+}
+
+
+def use(name: str) -> None:
+    (
+        cache.MarketBook,
+        cache.RunnerBook,
+        cache.MarketDefinition,
+        cache.MarketBookCache._process_market_definition,
+    ) = RESOURCES_CLASSES[name]
+
+
+def replay(lines: list) -> list:
+    output_queue = queue.Queue()
+    listener = FlumineStreamListener(output_queue=output_queue, max_latency=None)
+    listener.register_stream(0, "marketSubscription")
+    market_books = []
+    for line in lines:
+        listener.on_data(line)
+        while not output_queue.empty():
+            market_books += output_queue.get()
+    return market_books
+
+
+def bench_rate(lines: list, repeat: int) -> float:
+    updates, elapsed = 0, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        updates += len(replay(lines))
+        elapsed += time.perf_counter() - start
+    return updates / elapsed
+
+
+def bench_memory(lines: list) -> tuple:
+    tracemalloc.start()
+    market_books = replay(lines)
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(market_books), allocated / len(market_books), peak / len(market_books)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    try:
+        for file_name in args.files:
+            path = (
+                file_name
+                if os.path.exists(file_name)
+                else os.path.join(RESOURCES, file_name)
+            )
+            lines = load(path)
+            print("%s (%s messages)" % (file_name, len(lines)))
+            print(
+                "  %-10s %10s %15s %15s %15s"
+                % ("resources", "books", "updates/s", "KB/book", "peak KB/book")
+            )
+            for name in RESOURCES_CLASSES:
+                use(name)
+                rate = bench_rate(lines, args.repeat)
+                books, allocated, peak = bench_memory(lines)
+                print(
+                    "  %-10s %10s %15.0f %15.2f %15.2f"
+                    % (name, books, rate, allocated / 1024, peak / 1024)
+                )
+    finally:
+        use("patched")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+End to end streaming load test, runs a MarketStream
+against a local MockStreamServer and measures the
+latency between publish time and the MarketBook being
+taken off the handler_queue (as Flumine.run would).
+Each rate is run in turn and the highest rate that is
+kept up with (within 5% and p99 under --max-p99) is
+reported as the sustainable messages/sec.
+
+    python -m benchmarks.streaming [--rates 1000 5000 0] [--duration 5]
+        [--markets 100] [--file tests/resources/BASIC-1.132153978]
+        [--disconnect-after 10000]
+
+A rate of 0 is unthrottled.
+"""
+
+import time
+import queue
+import logging
+import argparse
+from types import SimpleNamespace
+
+from flumine.loadshedding import LoadShedder
+from flumine.streams.marketstream import MarketStream
+from flumine.testing.streamserver import (
+    MockStreamServer,
+    LocalStreaming,
+    file_source,
+    synthetic_source,
+)
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def run(source, rate: float, duration: float, disconnect_after: int = None) -> dict:
+    server = MockStreamServer(
+        source, rate=rate or None, disconnect_after=disconnect_after
+    )
+    server.start()
+    flumine = SimpleNamespace(
+        handler_queue=queue.Queue(),
+        markets=SimpleNamespace(open_market_ids=[], markets={}),
+    )
+    flumine.load_shedder = LoadShedder(flumine)
+    client = SimpleNamespace(
+        betting_client=SimpleNamespace(streaming=LocalStreaming(server.address))
+    )
+    stream = MarketStream(
+        flumine,
+        stream_id=1000,
+        market_filter={},
+        market_data_filter={},
+        client=client,
+    )
+    stream.start()
+    latencies, market_books = [], 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        try:
+            event = flumine.handler_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        now = time.time()
+        for market_book in event.event:
+            market_books += 1
+            latencies.append(now - market_book.publish_time_epoch / 1e3)
+    elapsed = time.perf_counter() - start
+    stream.stop()
+    server.stop()
+    return {
+        "rate": rate,
+        "messages_per_sec": server.messages_sent / elapsed,
+        "market_books_per_sec": market_books / elapsed,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else float("nan"),
+        "reconnects": stream.metrics.reconnects,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rates", type=float, nargs="+", default=[1000, 5000, 0])
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--markets", type=int, default=100)
+    parser.add_argument("--runners", type=int, default=10)
+    parser.add_argument("--file", nargs="*")
+    parser.add_argument("--disconnect-after", type=int)
+    parser.add_argument("--max-p99", type=float, default=0.1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.file:
+        source = file_source(*args.file)
+    else:
+        source = synthetic_source(markets=args.markets, runners=args.runners)
+
+    print(
+        "%10s %12s %12s %9s %9s %9s %9s %5s"
+        % ("rate", "msg/s", "books/s", "p50 ms", "p90 ms", "p99 ms", "max ms", "recon")
+    )
+    sustainable = 0
+    for rate in args.rates:
+        result = run(source, rate, args.duration, args.disconnect_after)
+        print(
+            "%10s %12.0f %12.0f %9.2f %9.2f %9.2f %9.2f %5s"
+            % (
+                int(rate) or "max",
+                result["messages_per_sec"],
+                result["market_books_per_sec"],
+                result["p50"] * 1e3,
+                result["p90"] * 1e3,
+                result["p99"] * 1e3,
+                result["max"] * 1e3,
+                result["reconnects"],
+            )
+        )
+        kept_up = not rate or result["messages_per_sec"] >= rate * 0.95
+        if kept_up and result["p99"] <= args.max_p99:
+            sustainable = max(sustainable, result["messages_per_sec"])
+    print("sustainable messages/sec: %.0f" % sustainable)
+
+
+if __name__ == "__main__":
+    main()
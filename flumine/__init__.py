@@ -1,16 +1,29 @@
 import logging
 
 from .flumine import Flumine
+from .asyncflumine import AsyncFlumine
 from .strategy.strategy import BaseStrategy
 from .exceptions import FlumineException
 from .__version__ import __title__, __version__, __author__
 
 from betfairlightweight.resources import bettingresources
-from .patching import EX, SP
+from betfairlightweight.streaming import cache
+from .patching import (
+    EX,
+    SP,
+    MarketBook,
+    RunnerBook,
+    MarketDefinition,
+    process_market_definition,
+)
 
 # patch bflw with faster classes
 bettingresources.RunnerBookEX = EX
 bettingresources.RunnerBookSP = SP
+cache.MarketBook = MarketBook
+cache.RunnerBook = RunnerBook
+cache.MarketDefinition = MarketDefinition
+cache.MarketBookCache._process_market_definition = process_market_definition
 
 # Set default logging handler to avoid "No handler found" warnings.
 logging.getLogger(__name__).addHandler(logging.NullHandler())
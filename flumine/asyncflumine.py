@@ -0,0 +1,200 @@
+import queue
+import asyncio
+from time import perf_counter_ns
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .flumine import Flumine
+from .clients.baseclient import BaseClient
+from .strategy.strategy import BaseStrategy
+from . import config, worker
+
+logger = logging.getLogger(__name__)
+
+"""
+asyncio variant of Flumine, the handler loop, workers
+and strategy hooks run on a single event loop:
+
+    framework = AsyncFlumine(client)
+    framework.add_strategy(strategy)
+    framework.run()  # or await framework.run_async()
+
+Streams remain threads (bflw streaming is blocking),
+their output is bridged onto the loop by the handler
+queue. Strategy hooks can be coroutines (`async def
+process_market_book`) and are run as tasks so many can
+be in flight at once, blocking bflw calls should be made
+with `await flumine.run_in_executor(..)`.
+
+Order execution is not integrated with the loop, place /
+cancel / update / replace go through the market
+Transaction exactly as they do in Flumine (called from
+the hook, any betting API requests stay thread pooled
+off the loop), the executor is only used for calls
+made with run_in_executor.
+"""
+
+ASYNC_HOOKS = (
+    "process_new_market",
+    "process_market_book",
+    "process_closed_market",
+    "process_raw_data",
+    "process_orders",
+)
+
+
+class AsyncHandlerQueue:
+    """Wraps the configured handler_queue (FIFO or
+    priority) for the event loop, `put` is thread safe
+    and wakes the loop, `get` is awaited by the handler
+    loop. Events put before the loop is attached are
+    held in the queue, other attributes (depths,
+    metrics_snapshot) are those of the wrapped queue.
+    """
+
+    def __init__(self, handler_queue):
+        self._handler_queue = handler_queue
+        self._loop = None
+        self._loop_thread_id = None
+        self._not_empty = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._not_empty = asyncio.Event()
+        self._not_empty.set()
+
+    def put(self, item, block: bool = True, timeout: float = None) -> None:
+        self._handler_queue.put(item)
+        if self._loop is None:
+            return
+        elif threading.get_ident() == self._loop_thread_id:
+            self._not_empty.set()
+        else:
+            self._loop.call_soon_threadsafe(self._not_empty.set)
+
+    def put_nowait(self, item) -> None:
+        self.put(item, block=False)
+
+    async def get(self):
+        handler_queue, not_empty = self._handler_queue, self._not_empty
+        while True:
+            try:
+                return handler_queue.get_nowait()
+            except queue.Empty:
+                not_empty.clear()
+            # put may have happened before the clear
+            try:
+                return handler_queue.get_nowait()
+            except queue.Empty:
+                await not_empty.wait()
+
+    def get_nowait(self):
+        return self._handler_queue.get_nowait()
+
+    def qsize(self) -> int:
+        return self._handler_queue.qsize()
+
+    def empty(self) -> bool:
+        return self._handler_queue.empty()
+
+    def __getattr__(self, name: str):
+        return getattr(self._handler_queue, name)
+
+
+class AsyncFlumine(Flumine):
+    WORKER = worker.AsyncWorker
+
+    def __init__(self, client: BaseClient = None, max_workers: int = None):
+        """
+        :param client: flumine client instance
+        :param max_workers: Executor threads for blocking calls
+        """
+        super(AsyncFlumine, self).__init__(client)
+        self.handler_queue = AsyncHandlerQueue(self.handler_queue)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.max_execution_workers,
+            thread_name_prefix="AsyncFlumine",
+        )
+        self.loop = None
+        self._tasks = set()
+
+    def run(self) -> None:
+        asyncio.run(self.run_async())
+
+    async def run_async(self) -> None:
+        """
+        Main run coroutine
+        """
+        self.loop = asyncio.get_running_loop()
+        self.handler_queue.attach(self.loop)
+        event_handlers = self._event_handlers()
+        handler_metrics = self.handler_metrics
+
+        with self:
+            while True:
+                event = await self.handler_queue.get()
+                start = perf_counter_ns()
+                handler = event_handlers.get(event.EVENT_TYPE)
+
+                if handler == "break":
+                    break
+                elif handler:
+                    handler(event)
+                    handler_metrics.record(event, start)
+                else:
+                    logger.error("Unknown item in handler_queue: %s" % str(event))
+                del event
+            # allow in flight strategy tasks to complete
+            if self._tasks:
+                await asyncio.wait(list(self._tasks), timeout=10)
+        self.executor.shutdown(wait=False)
+
+    def add_strategy(self, strategy: BaseStrategy) -> None:
+        super(AsyncFlumine, self).add_strategy(strategy)
+        for name in ASYNC_HOOKS:
+            hook = getattr(strategy, name)
+            if asyncio.iscoroutinefunction(hook):
+                setattr(strategy, name, self._wrap_hook(hook))
+
+    def run_in_executor(self, function, *args, **kwargs) -> asyncio.Future:
+        """Run a blocking function (e.g. a bflw request)
+        in the executor, returns an awaitable.
+        """
+        return self.loop.run_in_executor(
+            self.executor, functools.partial(function, *args, **kwargs)
+        )
+
+    def create_task(self, coro) -> asyncio.Task:
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _wrap_hook(self, hook):
+        @functools.wraps(hook)
+        def wrapper(*args, **kwargs):
+            return self.create_task(hook(*args, **kwargs))
+
+        return wrapper
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(
+                "Error in AsyncFlumine task: %s",
+                task.exception(),
+                exc_info=task.exception(),
+            )
+
+    @property
+    def tasks_in_flight(self) -> int:
+        return len(self._tasks)
+
+    def __repr__(self) -> str:
+        return "<AsyncFlumine>"
+
+    def __str__(self) -> str:
+        return "<AsyncFlumine>"
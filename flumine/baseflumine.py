@@ -1,9 +1,11 @@
 import time
+from time import perf_counter_ns
 import queue
 import logging
 import threading
 from typing import Type
 from betfairlightweight import resources
+from betfairlightweight.streaming.cache import MarketBookCache
 
 from .clients.baseclient import BaseClient
 from .clients.clients import Clients
@@ -11,6 +13,7 @@ from .controls.basecontrol import BaseControl
 from .strategy.strategy import Strategies, BaseStrategy
 from .streams.streams import Streams
 from .events import events
+from .events.handlerqueue import PriorityHandlerQueue
 from .worker import BackgroundWorker
 
 from .markets.markets import Markets
@@ -19,6 +22,8 @@ from .order.process import process_current_orders
 from .controls.tradingcontrols import (
     StrategyExposure,
 )
+from .loadshedding import LoadShedder
+from .metrics import HandlerMetrics
 from .exceptions import ClientError
 from . import config, utils
 
@@ -39,9 +44,14 @@ class BaseFlumine:
         self.streams = Streams(self)
 
         self.clients = Clients()
-        self.handler_queue = queue.Queue()
+        if config.priority_handler_queue:
+            self.handler_queue = PriorityHandlerQueue()
+        else:
+            self.handler_queue = queue.Queue()
         self.markets = Markets()
         self.strategies = Strategies()
+        self.load_shedder = LoadShedder(self)
+        self.handler_metrics = HandlerMetrics()
 
         if client:
             self.add_client(client)
@@ -78,8 +88,12 @@ class BaseFlumine:
         return
 
     def _process_market_books(self, event: events.MarketBookEvent) -> None:
+        load_shedder = self.load_shedder
+        degraded = load_shedder.degraded
+        publish_time = None
         for market_book in event.event:
             market_id = market_book.market_id
+            publish_time = market_book.publish_time_epoch
 
             # check latency (only if marketBook is from a stream update)
             if market_book.streaming_snap is False:
@@ -93,6 +107,8 @@ class BaseFlumine:
                             "pt": market_book.publish_time,
                         },
                     )
+                if config.latency_budget or degraded:
+                    degraded = load_shedder.update(latency)
 
             market = self.markets.markets.get(market_id)
             market_is_new = market is None
@@ -105,16 +121,98 @@ class BaseFlumine:
                 self.handler_queue.put(events.CloseMarketEvent(market_book))
                 continue
 
+            # drop if a newer MarketBook has already been received
+            if degraded and not market_is_new and load_shedder.superseded(market_book):
+                continue
+
             # process market
             market(market_book)
 
             for strategy in self.strategies:
-                if market_book.streaming_unique_id in strategy.stream_ids:
+                if (
+                    market_book.streaming_unique_id in strategy.stream_ids
+                    and strategy.market_filter_match(market_book)
+                ):
                     if market_is_new:
                         strategy.process_new_market(market, market_book)
 
-                    if strategy.check_market_book(market, market_book):
-                        strategy.process_market_book(market, market_book)
+                    if (
+                        strategy.min_update_interval
+                        and not strategy.conflate_market_book(market_book)
+                    ):
+                        continue
+
+                    if degraded and not strategy.critical:
+                        load_shedder.skipped_strategy_checks += 1
+                        continue
+
+                    self._process_strategy_market_book(strategy, market, market_book)
+
+        # process conflated MarketBooks now due
+        if publish_time:
+            for strategy in self.strategies:
+                if strategy.min_update_interval:
+                    for market_book in strategy.conflated_market_books(publish_time):
+                        market = self.markets.markets.get(market_book.market_id)
+                        if market is None or market.closed:
+                            continue
+                        if degraded and not strategy.critical:
+                            load_shedder.skipped_strategy_checks += 1
+                            continue
+                        self._process_strategy_market_book(
+                            strategy, market, market_book
+                        )
+
+    @staticmethod
+    def _process_strategy_market_book(
+        strategy: BaseStrategy, market: Market, market_book: resources.MarketBook
+    ) -> None:
+        metrics = strategy.metrics
+        start = perf_counter_ns()
+        if strategy.check_market_book(market, market_book):
+            checked = perf_counter_ns()
+            metrics.check_market_book.record(checked - start)
+            strategy.process_market_book(market, market_book)
+            metrics.process_market_book.record(perf_counter_ns() - checked)
+        else:
+            metrics.check_market_book.record(perf_counter_ns() - start)
+
+    def _process_raw_data(self, event: events.RawDataEvent) -> None:
+        stream_id, clk, publish_time, data = event.event
+        strategies = [s for s in self.strategies if stream_id in s.stream_ids]
+        if not strategies:
+            # not a strategy market data stream (e.g. OrderDataStream)
+            return
+        for datum in data:
+            market_id = datum["id"]
+            market = self.markets.markets.get(market_id)
+            if market is None:
+                market = self._add_market(market_id, None)
+            elif market.closed:
+                self.markets.add_market(market_id, market)
+
+            for strategy in strategies:
+                strategy.process_raw_data(clk, publish_time, datum)
+
+            if (
+                "marketDefinition" in datum
+                and datum["marketDefinition"].get("status") == "CLOSED"
+            ):
+                market_book = self._create_raw_market_book(
+                    stream_id, publish_time, datum
+                )
+                self.handler_queue.put(events.CloseMarketEvent(market_book))
+
+    @staticmethod
+    def _create_raw_market_book(
+        stream_id: int, publish_time: int, datum: dict
+    ) -> resources.MarketBook:
+        # MarketBook (runner status / results) for the close market path
+        market_book_cache = MarketBookCache(
+            datum["id"], publish_time, False, False, False
+        )
+        market_book_cache.update_cache(datum, publish_time, active=True)
+        return market_book_cache.create_resource(stream_id, snap=True)
 
     def _add_market(self, market_id: str, market_book: resources.MarketBook) -> Market:
         logger.debug("Adding: %s to markets", market_id)
@@ -126,6 +224,7 @@ class BaseFlumine:
         logger.debug("Removing market %s", market.market_id, extra=self.info)
         for strategy in self.strategies:
             strategy.remove_market(market.market_id)
+        self.load_shedder.remove_market(market.market_id)
         if clear:
             self.markets.remove_market(market.market_id)
 
@@ -163,7 +262,11 @@ class BaseFlumine:
                 for strategy in self.strategies:
                     strategy_orders = market.blotter.strategy_orders(strategy)
                     if strategy_orders:
+                        start = perf_counter_ns()
                         strategy.process_orders(market, strategy_orders)
+                        strategy.metrics.process_orders.record(
+                            perf_counter_ns() - start
+                        )
 
     def _process_close_market(self, event: events.CloseMarketEvent) -> None:
         logger.info("close market event actually called")
@@ -179,7 +282,9 @@ class BaseFlumine:
         market.blotter.process_closed_market(market, event.event)
 
         for strategy in self.strategies:
-            if stream_id in strategy.stream_ids:
+            if stream_id in strategy.stream_ids and strategy.market_filter_match(
+                market_book
+            ):
                 strategy.process_closed_market(market, event.event)
 
         if self.clients.simulated:
@@ -241,9 +346,27 @@ class BaseFlumine:
                 },
             )
 
+    def _process_load_shedding(self, event: events.LoadSheddingEvent) -> None:
+        for strategy in self.strategies:
+            strategy.process_load_shedding(event.event)
+
     def _process_end_flumine(self) -> None:
         self.strategies.finish(self)
 
+    def metrics(self) -> dict:
+        """Handler loop instrumentation snapshot, per event
+        type queue wait / handler time and per strategy hook
+        time (histograms are cumulative).
+        """
+        snapshot = {
+            "events": self.handler_metrics.snapshot(),
+            "strategies": {s.name: s.metrics.snapshot() for s in self.strategies},
+            "load_shedding": self.load_shedder.info,
+        }
+        if hasattr(self.handler_queue, "depths"):  # PriorityHandlerQueue
+            snapshot["handler_queue"] = self.handler_queue.depths()
+        return snapshot
+
     @property
     def info(self) -> dict:
         return {
@@ -253,6 +376,7 @@ class BaseFlumine:
                 "open_market_count": len(self.markets.open_market_ids),
             },
             "streams": [s for s in self.streams],
+            "load_shedding": self.load_shedder.info,
             "threads": threading.enumerate(),
             "threads_len": len(threading.enumerate()),
         }
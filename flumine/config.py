@@ -23,6 +23,18 @@ max_execution_workers = 32  # max number of workers in execution thread pool
 
 async_place_orders = False  # async place orders
 
+stream_decoder = None  # json decoder used by listeners (json/orjson/simdjson)
+
+stream_parse_processes = 0  # parse mcm messages in n processes per stream (0 disables)
+
+merge_market_filters = False  # share superset market streams between strategies
+
+priority_handler_queue = False  # process order / close events ahead of market books
+
+latency_budget = (
+    None  # seconds of MarketBook latency before shedding load (None disables)
+)
+
 # latencies used for simulation
 place_latency = 0.120
 cancel_latency = 0.170
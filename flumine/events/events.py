@@ -1,4 +1,5 @@
 import datetime
+from time import perf_counter_ns
 from enum import Enum
 
 
@@ -19,6 +20,7 @@ class EventType(Enum):
     ORDER = "Order"
     ORDER_PACKAGE = "Order package"
     CLOSE_MARKET = "Closed market"
+    LOAD_SHEDDING = "Load shedding"
 
 
 class QueueType(Enum):
@@ -30,10 +32,11 @@ class BaseEvent:
     EVENT_TYPE = None
     QUEUE_TYPE = None
 
-    __slots__ = ["_time_created", "event", "callback"]
+    __slots__ = ["_time_created", "_time_created_ns", "event", "callback"]
 
     def __init__(self, event):
         self._time_created = datetime.datetime.now(datetime.UTC)
+        self._time_created_ns = perf_counter_ns()  # queue wait instrumentation
         self.event = event
 
     @property
@@ -49,6 +52,11 @@ class BaseEvent:
 # HANDLER
 
 
+class TerminatorEvent(BaseEvent):
+    EVENT_TYPE = EventType.TERMINATOR
+    QUEUE_TYPE = QueueType.HANDLER
+
+
 class MarketCatalogueEvent(BaseEvent):
     EVENT_TYPE = EventType.MARKET_CATALOGUE
     QUEUE_TYPE = QueueType.HANDLER
@@ -59,7 +67,6 @@ class MarketBookEvent(BaseEvent):
     QUEUE_TYPE = QueueType.HANDLER
 
 
-# can probably delete
 class RawDataEvent(BaseEvent):
     EVENT_TYPE = EventType.RAW_DATA
     QUEUE_TYPE = QueueType.HANDLER
@@ -85,6 +92,11 @@ class CloseMarketEvent(BaseEvent):
     QUEUE_TYPE = QueueType.HANDLER
 
 
+class LoadSheddingEvent(BaseEvent):
+    EVENT_TYPE = EventType.LOAD_SHEDDING
+    QUEUE_TYPE = QueueType.HANDLER
+
+
 class MarketEvent(BaseEvent):
     EVENT_TYPE = EventType.MARKET
     QUEUE_TYPE = QueueType.LOGGING
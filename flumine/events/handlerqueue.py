@@ -0,0 +1,137 @@
+import queue
+import threading
+import collections
+from enum import IntEnum
+from time import monotonic
+
+from .events import EventType
+
+"""
+Priority handler queue, a drop in replacement for the
+FIFO handler_queue.Queue so that order updates are not
+stuck behind a backlog of MarketBooks:
+
+    HIGH    CurrentOrders, CloseMarket, LoadShedding
+    NORMAL  MarketBook, RawData (and anything unknown)
+    LOW     MarketCatalogue, ClearedOrders, ClearedMarkets, Terminator
+
+Events are FIFO within a priority. To prevent a busy
+higher priority starving the lower ones, a non empty
+priority that has been passed over `starvation_limit`
+times in a row is served next.
+"""
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+EVENT_PRIORITY = {
+    EventType.CURRENT_ORDERS: Priority.HIGH,
+    EventType.CLOSE_MARKET: Priority.HIGH,
+    EventType.LOAD_SHEDDING: Priority.HIGH,
+    EventType.MARKET_BOOK: Priority.NORMAL,
+    EventType.RAW_DATA: Priority.NORMAL,
+    EventType.MARKET_CATALOGUE: Priority.LOW,
+    EventType.CLEARED_ORDERS: Priority.LOW,
+    EventType.CLEARED_MARKETS: Priority.LOW,
+    EventType.TERMINATOR: Priority.LOW,  # queued events are processed first
+}
+
+
+class PriorityHandlerQueue:
+    def __init__(self, starvation_limit: int = 100):
+        """
+        :param starvation_limit: Max consecutive times a waiting priority is skipped
+        """
+        self.starvation_limit = starvation_limit
+        self._queues = tuple(collections.deque() for _ in Priority)
+        self._skipped = [0] * len(Priority)
+        self._not_empty = threading.Condition(threading.Lock())
+        # metrics
+        self._puts = [0] * len(Priority)
+        self._max_depths = [0] * len(Priority)
+        self._promotions = [0] * len(Priority)
+
+    def put(self, item, block: bool = True, timeout: float = None) -> None:
+        priority = EVENT_PRIORITY.get(
+            getattr(item, "EVENT_TYPE", None), Priority.NORMAL
+        )
+        with self._not_empty:
+            q = self._queues[priority]
+            q.append(item)
+            self._puts[priority] += 1
+            if len(q) > self._max_depths[priority]:
+                self._max_depths[priority] = len(q)
+            self._not_empty.notify()
+
+    def put_nowait(self, item) -> None:
+        self.put(item, block=False)
+
+    def get(self, block: bool = True, timeout: float = None):
+        with self._not_empty:
+            if not block:
+                if not self._qsize():
+                    raise queue.Empty
+            elif timeout is None:
+                while not self._qsize():
+                    self._not_empty.wait()
+            else:
+                end = monotonic() + timeout
+                while not self._qsize():
+                    remaining = end - monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+            return self._get()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        with self._not_empty:
+            return self._qsize()
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def depths(self) -> dict:
+        with self._not_empty:
+            return {p.name.lower(): len(self._queues[p]) for p in Priority}
+
+    def metrics_snapshot(self) -> dict:
+        """Per priority depth, max depth (since last
+        snapshot), puts and starvation promotions.
+        """
+        with self._not_empty:
+            snapshot = {
+                p.name.lower(): {
+                    "depth": len(self._queues[p]),
+                    "max_depth": self._max_depths[p],
+                    "puts": self._puts[p],
+                    "promotions": self._promotions[p],
+                }
+                for p in Priority
+            }
+            self._max_depths = [len(q) for q in self._queues]
+        return snapshot
+
+    def _qsize(self) -> int:
+        return sum(len(q) for q in self._queues)
+
+    def _get(self):
+        # lock must be held and queue not empty
+        queues, skipped = self._queues, self._skipped
+        priority = next(p for p, q in enumerate(queues) if q)
+        for lower in range(len(queues) - 1, priority, -1):
+            if queues[lower] and skipped[lower] >= self.starvation_limit:
+                self._promotions[lower] += 1
+                priority = lower
+                break
+        for p in range(priority + 1, len(queues)):
+            if queues[p]:
+                skipped[p] += 1
+        skipped[priority] = 0
+        return queues[priority].popleft()
@@ -1,4 +1,5 @@
 import logging
+from time import perf_counter_ns
 
 from .baseflumine import BaseFlumine
 from .events.events import EventType
@@ -7,54 +8,64 @@ from . import worker
 logger = logging.getLogger(__name__)
 
 MARKET_BOOK_EVENT = EventType.MARKET_BOOK
+RAW_DATA_EVENT = EventType.RAW_DATA
 CURRENT_ORDERS_EVENT = EventType.CURRENT_ORDERS
 MARKET_CATALOGUE_EVENT = EventType.MARKET_CATALOGUE
 CLEARED_MARKETS_EVENT = EventType.CLEARED_MARKETS
 CLEARED_ORDERS_EVENT = EventType.CLEARED_ORDERS
 CLOSE_MARKET_EVENT = EventType.CLOSE_MARKET
+LOAD_SHEDDING_EVENT = EventType.LOAD_SHEDDING
 TERMINATOR_EVENT = EventType.TERMINATOR
 
 
 class Flumine(BaseFlumine):
+    WORKER = worker.BackgroundWorker
+
     def run(self) -> None:
         """
         Main run thread
         """
-        event_handlers = {
-            MARKET_BOOK_EVENT: self._process_market_books,
-            CURRENT_ORDERS_EVENT: self._process_current_orders,
-            MARKET_CATALOGUE_EVENT: self._process_market_catalogues,
-            CLEARED_MARKETS_EVENT: self._process_cleared_markets,
-            CLEARED_ORDERS_EVENT: self._process_cleared_orders,
-            CLOSE_MARKET_EVENT: self._process_close_market,
-            TERMINATOR_EVENT: "break",
-        }
+        event_handlers = self._event_handlers()
+        handler_metrics = self.handler_metrics
 
         with self:
             while True:
                 event = self.handler_queue.get()
+                start = perf_counter_ns()
                 handler = event_handlers.get(event.EVENT_TYPE)
 
                 if handler == "break":
                     break
                 elif handler:
                     handler(event)
+                    handler_metrics.record(event, start)
                 else:
                     logger.error("Unknown item in handler_queue: %s" % str(event))
                 del event
 
+    def _event_handlers(self) -> dict:
+        return {
+            MARKET_BOOK_EVENT: self._process_market_books,
+            RAW_DATA_EVENT: self._process_raw_data,
+            CURRENT_ORDERS_EVENT: self._process_current_orders,
+            MARKET_CATALOGUE_EVENT: self._process_market_catalogues,
+            CLEARED_MARKETS_EVENT: self._process_cleared_markets,
+            CLEARED_ORDERS_EVENT: self._process_cleared_orders,
+            CLOSE_MARKET_EVENT: self._process_close_market,
+            LOAD_SHEDDING_EVENT: self._process_load_shedding,
+            TERMINATOR_EVENT: "break",
+        }
+
     def _add_default_workers(self):
         client_timeouts = [
             client.betting_client.session_timeout for client in self.clients
         ]
         ka_interval = min((min(client_timeouts) / 2), 1200)
         self.add_worker(
-            worker.BackgroundWorker(
-                self, function=worker.keep_alive, interval=ka_interval
-            )
+            self.WORKER(self, function=worker.keep_alive, interval=ka_interval)
         )
         self.add_worker(
-            worker.BackgroundWorker(
+            self.WORKER(
                 self,
                 function=worker.poll_market_catalogue,
                 interval=120,
@@ -62,7 +73,7 @@ class Flumine(BaseFlumine):
             )
         )
         self.add_worker(
-            worker.BackgroundWorker(
+            self.WORKER(
                 self,
                 function=worker.poll_account_balance,
                 interval=120,
@@ -70,7 +81,7 @@ class Flumine(BaseFlumine):
             )
         )
         self.add_worker(
-            worker.BackgroundWorker(
+            self.WORKER(
                 self,
                 function=worker.poll_market_closure,
                 interval=60,
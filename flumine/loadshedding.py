@@ -0,0 +1,87 @@
+import logging
+
+from . import config
+from .events import events
+
+logger = logging.getLogger(__name__)
+
+"""
+Load shedding, when MarketBook latency (current time
+minus publish time) exceeds config.latency_budget the
+framework is put into degraded mode until latency falls
+back below latency_budget * RECOVERY_RATIO:
+
+    - MarketBooks superseded by a newer book already
+    received by the stream are dropped
+    - check_market_book / process_market_book are
+    skipped for strategies with critical=False
+
+A LoadSheddingEvent is put on the handler_queue on
+each transition.
+"""
+
+RECOVERY_RATIO = 0.5
+
+
+class LoadShedder:
+    def __init__(self, flumine):
+        self.flumine = flumine
+        self.degraded = False
+        self.publish_times = {}  # {marketId: latest publish_time_epoch received}
+        # metrics
+        self.degraded_count = 0
+        self.shed_market_books = 0
+        self.skipped_strategy_checks = 0
+
+    def record(self, market_books: list) -> None:
+        # called by the stream output threads
+        publish_times = self.publish_times
+        for market_book in market_books:
+            publish_times[market_book.market_id] = market_book.publish_time_epoch
+
+    def update(self, latency: float) -> bool:
+        latency_budget = config.latency_budget
+        if not latency_budget:
+            if self.degraded:
+                self._set_degraded(False, latency)
+        elif self.degraded:
+            if latency < latency_budget * RECOVERY_RATIO:
+                self._set_degraded(False, latency)
+        elif latency > latency_budget:
+            self._set_degraded(True, latency)
+        return self.degraded
+
+    def superseded(self, market_book) -> bool:
+        """True if a newer MarketBook has been received"""
+        latest = self.publish_times.get(market_book.market_id)
+        if latest and market_book.publish_time_epoch < latest:
+            self.shed_market_books += 1
+            return True
+        return False
+
+    def remove_market(self, market_id: str) -> None:
+        self.publish_times.pop(market_id, None)
+
+    def _set_degraded(self, degraded: bool, latency: float) -> None:
+        self.degraded = degraded
+        if degraded:
+            self.degraded_count += 1
+            logger.warning(
+                "Latency budget exceeded, shedding load",
+                extra={"latency": latency, "latency_budget": config.latency_budget},
+            )
+        else:
+            logger.info(
+                "Latency recovered, load shedding stopped",
+                extra={"latency": latency, **self.info},
+            )
+        self.flumine.handler_queue.put(events.LoadSheddingEvent(degraded))
+
+    @property
+    def info(self) -> dict:
+        return {
+            "degraded": self.degraded,
+            "degraded_count": self.degraded_count,
+            "shed_market_books": self.shed_market_books,
+            "skipped_strategy_checks": self.skipped_strategy_checks,
+        }
@@ -0,0 +1,103 @@
+from typing import Optional, Tuple
+
+from ..utils import get_price, get_size, price_tick_difference
+
+WOM_LEVELS = 3  # ladder levels used in weight of money
+
+
+class MarketAnalytics:
+    """
+    Derived values from a single MarketBook, calculated
+    lazily in one pass over the runners and shared by
+    all strategies processing the same update.
+
+        analytics = market.analytics
+        analytics.back_overround
+        analytics.best_back(selection_id)  # (price, size)
+        analytics.spread(selection_id)  # ticks
+    """
+
+    __slots__ = [
+        "market_book",
+        "publish_time",
+        "_runners",
+        "_back_overround",
+        "_lay_overround",
+    ]
+
+    def __init__(self, market_book):
+        self.market_book = market_book
+        self.publish_time = market_book.publish_time_epoch
+        self._runners = None  # {(selectionId, handicap): (bp, bs, lp, ls, wom)}
+        self._back_overround = None
+        self._lay_overround = None
+
+    def _calculate(self) -> None:
+        runners = {}
+        back_overround, lay_overround = 0.0, 0.0
+        for runner in self.market_book.runners:
+            if runner.status != "ACTIVE":
+                continue
+            available_to_back = runner.ex.available_to_back
+            available_to_lay = runner.ex.available_to_lay
+            back_price = get_price(available_to_back, 0)
+            lay_price = get_price(available_to_lay, 0)
+            if back_price:
+                back_overround += 1 / back_price
+            if lay_price:
+                lay_overround += 1 / lay_price
+            back_wom = sum(p["size"] for p in available_to_back[:WOM_LEVELS])
+            lay_wom = sum(p["size"] for p in available_to_lay[:WOM_LEVELS])
+            runners[(runner.selection_id, runner.handicap)] = (
+                back_price,
+                get_size(available_to_back, 0),
+                lay_price,
+                get_size(available_to_lay, 0),
+                (back_wom / (back_wom + lay_wom) if back_wom or lay_wom else None),
+            )
+        self._runners = runners
+        self._back_overround = round(back_overround, 4)
+        self._lay_overround = round(lay_overround, 4)
+
+    def _runner(self, selection_id: int, handicap: float) -> Optional[tuple]:
+        if self._runners is None:
+            self._calculate()
+        return self._runners.get((selection_id, handicap))
+
+    def best_back(
+        self, selection_id: int, handicap: float = 0
+    ) -> Tuple[Optional[float], Optional[float]]:
+        runner = self._runner(selection_id, handicap)
+        return (runner[0], runner[1]) if runner else (None, None)
+
+    def best_lay(
+        self, selection_id: int, handicap: float = 0
+    ) -> Tuple[Optional[float], Optional[float]]:
+        runner = self._runner(selection_id, handicap)
+        return (runner[2], runner[3]) if runner else (None, None)
+
+    def spread(self, selection_id: int, handicap: float = 0) -> Optional[int]:
+        """Ticks between best back and best lay"""
+        runner = self._runner(selection_id, handicap)
+        if runner and runner[0] and runner[2]:
+            return price_tick_difference(runner[0], runner[2])
+
+    def weight_of_money(
+        self, selection_id: int, handicap: float = 0
+    ) -> Optional[float]:
+        """Back size / total size over the top WOM_LEVELS"""
+        runner = self._runner(selection_id, handicap)
+        if runner:
+            return runner[4]
+
+    @property
+    def back_overround(self) -> float:
+        if self._runners is None:
+            self._calculate()
+        return self._back_overround
+
+    @property
+    def lay_overround(self) -> float:
+        if self._runners is None:
+            self._calculate()
+        return self._lay_overround
@@ -1,5 +1,5 @@
 import logging
-from typing import Iterable, Optional, List
+from typing import Iterable, Optional, List, Callable
 from collections import defaultdict
 
 from ..order.ordertype import OrderTypes
@@ -35,9 +35,11 @@ class Blotter:
         order = blotter["abc"]  # get
     """
 
-    def __init__(self, market_id: str):
+    def __init__(self, market_id: str, live_orders_callback: Callable = None):
         self.market_id = market_id
         self.active = False
+        # called with (market_id, has_live_orders) on change
+        self._live_orders_callback = live_orders_callback
         self._orders = {}  # {Order.id: Order}
         # cached lists/dicts for faster lookup
         self._trades = defaultdict(list)  # {Trade.id: [Order,]}
@@ -204,6 +206,8 @@ class Blotter:
 
     def complete_order(self, order) -> None:
         self._live_orders.remove(order)
+        if not self._live_orders and self._live_orders_callback:
+            self._live_orders_callback(self.market_id, False)
 
     def has_order(self, customer_order_ref: str) -> bool:
         return customer_order_ref in self._orders
@@ -215,6 +219,8 @@ class Blotter:
         self._orders[customer_order_ref] = order
         self._bet_id_lookup[order.bet_id] = order
         self._live_orders.append(order)
+        if len(self._live_orders) == 1 and self._live_orders_callback:
+            self._live_orders_callback(self.market_id, True)
         strategy = order.trade.strategy
         self._trades[order.trade.id].append(order)
         self._strategy_orders[strategy].append(order)
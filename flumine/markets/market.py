@@ -1,16 +1,74 @@
 import datetime
 import logging
 from typing import Optional
-from collections import defaultdict
 from betfairlightweight.resources.bettingresources import MarketBook, MarketCatalogue
 
 from .. import config
 from .blotter import Blotter
+from .pricehistory import PriceHistory
+from .analytics import MarketAnalytics
+from .runnerchanges import get_runner_changes
 from ..execution.transaction import Transaction
 from ..order.order import BetfairOrder
 
 logger = logging.getLogger(__name__)
 
+EPOCH = datetime.datetime.fromtimestamp(0, datetime.UTC)
+
+
+class MarketMetadata:
+    """
+    Market metadata resolved from the marketCatalogue
+    with a fallback to the marketDefinition, only
+    refreshed when either changes.
+    """
+
+    __slots__ = [
+        "event_type_id",
+        "event_id",
+        "event_name",
+        "market_type",
+        "market_start_datetime",
+        "country_code",
+        "venue",
+        "race_type",
+    ]
+
+    def __init__(self, market_catalogue=None, market_book=None):
+        market_definition = market_book.market_definition if market_book else None
+        if market_catalogue:
+            event = market_catalogue.event
+            description = market_catalogue.description
+            self.event_type_id = market_catalogue.event_type.id
+            self.event_id = event.id
+            self.event_name = event.name
+            self.market_type = description.market_type
+            self.country_code = event.country_code
+            self.venue = event.venue
+            self.race_type = description.race_type
+        elif market_definition:
+            self.event_type_id = market_definition.event_type_id
+            self.event_id = market_definition.event_id
+            self.event_name = market_definition.event_name
+            self.market_type = market_definition.market_type
+            self.country_code = market_definition.country_code
+            self.venue = market_definition.venue
+            self.race_type = market_definition.race_type
+        else:
+            self.event_type_id = None
+            self.event_id = None
+            self.event_name = None
+            self.market_type = None
+            self.country_code = None
+            self.venue = None
+            self.race_type = None
+        if market_definition:
+            self.market_start_datetime = market_definition.market_time
+        elif market_catalogue:
+            self.market_start_datetime = market_catalogue.market_start_time
+        else:
+            self.market_start_datetime = EPOCH
+
 
 class Market:
     """
@@ -32,19 +90,94 @@ class Market:
         self.closed = False
         self.date_time_created = datetime.datetime.now(datetime.UTC)
         self.date_time_closed = None
-        self.market_book = market_book
-        self.market_catalogue = market_catalogue
+        self._market_book = market_book
+        self._market_catalogue = market_catalogue
+        self.metadata = MarketMetadata(market_catalogue, market_book)
         self.update_market_catalogue = True
         self.orders_cleared = []
         self.market_cleared = []
         self.context = {"simulated": {}}  # data store (raceCard / scores etc)
-        self.blotter = Blotter(market_id)
+        self.blotter = Blotter(
+            market_id, live_orders_callback=flumine.markets.update_live_orders
+        )
+        self.price_history = None  # optional <PriceHistory>
+        self._analytics = None
+        self._previous_market_book = None
+        self._runner_changes = (None, {})  # (<MarketBook>, changes)
         self._transaction_id = 0
 
     def __call__(self, market_book: MarketBook):
         if self.market_book and market_book.version != self.market_book.version:
             self.update_market_catalogue = True
+        self._previous_market_book = self._market_book
         self.market_book = market_book
+        if self.price_history is not None:
+            self.price_history.update(market_book)
+
+    @property
+    def market_book(self) -> Optional[MarketBook]:
+        return self._market_book
+
+    @market_book.setter
+    def market_book(self, market_book: Optional[MarketBook]) -> None:
+        previous = self._market_book
+        self._market_book = market_book
+        # marketDefinition resource is reused by bflw until a new one is received
+        if (
+            previous is None
+            or market_book is None
+            or market_book.market_definition is not previous.market_definition
+        ):
+            self._update_metadata()
+
+    @property
+    def market_catalogue(self) -> Optional[MarketCatalogue]:
+        return self._market_catalogue
+
+    @market_catalogue.setter
+    def market_catalogue(self, market_catalogue: Optional[MarketCatalogue]) -> None:
+        self._market_catalogue = market_catalogue
+        self._update_metadata()
+
+    @property
+    def analytics(self) -> Optional[MarketAnalytics]:
+        """Shared derived values, memoized per publish time"""
+        market_book = self._market_book
+        if market_book is None:
+            return
+        analytics = self._analytics
+        if (
+            analytics is None
+            or analytics.publish_time != market_book.publish_time_epoch
+        ):
+            analytics = self._analytics = MarketAnalytics(market_book)
+        return analytics
+
+    @property
+    def runner_changes(self) -> dict:
+        """Runners changed in the latest update
+        {(selectionId, handicap): {"ladder", "traded", "ltp", "sp", "status"}}
+        """
+        market_book, changes = self._runner_changes
+        if market_book is not self._market_book:
+            changes = get_runner_changes(self._market_book, self._previous_market_book)
+            self._runner_changes = (self._market_book, changes)
+        return changes
+
+    def _update_metadata(self) -> None:
+        self.metadata = MarketMetadata(self._market_catalogue, self._market_book)
+        self.flumine.markets.index_market(self)
+
+    def enable_price_history(self, depth: int = 100) -> PriceHistory:
+        """Store compact best price history for
+        each runner, if already enabled with a
+        smaller depth the history is reset.
+        """
+        if self.price_history is None or self.price_history.depth < depth:
+            self.price_history = PriceHistory(self.market_id, depth)
+            if self.market_book:
+                self.price_history.update(self.market_book)
+        return self.price_history
 
     def open_market(self) -> None:
         self.closed = False
@@ -121,42 +254,24 @@ class Market:
 
     @property
     def event(self) -> dict:
-        event = defaultdict(list)
-        market_start_datetime = self.market_start_datetime
-        event_type_id = self.event_type_id
-        for market in self.flumine.markets.events[self.event_id]:
-            if (
-                market_start_datetime == market.market_start_datetime
-                or event_type_id in ["1", "3"]  # soccer, golf
-            ):
-                event[market.market_type].append(market)
-        return event
+        return self.flumine.markets.event_markets(self)
 
     @property
     def event_type_id(self) -> str:
-        if self.market_catalogue:
-            return self.market_catalogue.event_type.id
-        elif self.market_book:
-            return self.market_book.market_definition.event_type_id
+        return self.metadata.event_type_id
 
     @property
     def event_id(self) -> str:
-        if self.market_catalogue:
-            return self.market_catalogue.event.id
-        elif self.market_book:
-            return self.market_book.market_definition.event_id
+        return self.metadata.event_id
 
     @property
     def market_type(self) -> str:
-        if self.market_catalogue:
-            return self.market_catalogue.description.market_type
-        elif self.market_book:
-            return self.market_book.market_definition.market_type
+        return self.metadata.market_type
 
     @property
     def seconds_to_start(self) -> float:
         return (
-            self.market_start_datetime - datetime.datetime.now(datetime.UTC)
+            self.metadata.market_start_datetime - datetime.datetime.now(datetime.UTC)
         ).total_seconds()
 
     @property
@@ -168,12 +283,7 @@ class Market:
 
     @property
     def market_start_datetime(self):
-        if self.market_book:
-            return self.market_book.market_definition.market_time
-        elif self.market_catalogue:
-            return self.market_catalogue.market_start_time
-        else:
-            return datetime.datetime.fromtimestamp(0, datetime.UTC)
+        return self.metadata.market_start_datetime
 
     @property
     def market_start_hour_minute(self) -> Optional[str]:
@@ -183,31 +293,19 @@ class Market:
 
     @property
     def event_name(self) -> Optional[str]:
-        if self.market_catalogue:
-            return self.market_catalogue.event.name
-        elif self.market_book:
-            return self.market_book.market_definition.event_name
+        return self.metadata.event_name
 
     @property
     def country_code(self) -> Optional[str]:
-        if self.market_catalogue:
-            return self.market_catalogue.event.country_code
-        elif self.market_book:
-            return self.market_book.market_definition.country_code
+        return self.metadata.country_code
 
     @property
     def venue(self) -> Optional[str]:
-        if self.market_catalogue:
-            return self.market_catalogue.event.venue
-        elif self.market_book:
-            return self.market_book.market_definition.venue
+        return self.metadata.venue
 
     @property
     def race_type(self) -> Optional[str]:
-        if self.market_catalogue:
-            return self.market_catalogue.description.race_type
-        elif self.market_book:
-            return self.market_book.market_definition.race_type
+        return self.metadata.race_type
 
     @property
     def status(self) -> Optional[str]:
@@ -232,16 +330,17 @@ class Market:
 
     @property
     def info(self) -> dict:
+        metadata = self.metadata
         return {
             "market_id": self.market_id,
-            "event_id": self.event_id,
-            "event_type_id": self.event_type_id,
-            "event_name": self.event_name,
-            "market_type": self.market_type,
-            "market_start_datetime": str(self.market_start_datetime),
-            "country_code": self.country_code,
-            "venue": self.venue,
-            "race_type": self.race_type,
+            "event_id": metadata.event_id,
+            "event_type_id": metadata.event_type_id,
+            "event_name": metadata.event_name,
+            "market_type": metadata.market_type,
+            "market_start_datetime": str(metadata.market_start_datetime),
+            "country_code": metadata.country_code,
+            "venue": metadata.venue,
+            "race_type": metadata.race_type,
             "orders_cleared": self.orders_cleared,
             "market_cleared": self.market_cleared,
             "closed": self.closed,
@@ -7,19 +7,59 @@ from ..order.order import BetfairOrder
 
 logger = logging.getLogger(__name__)
 
+EVENT_TYPES_IGNORE_START = ["1", "3"]  # soccer, golf
+
 
 class Markets:
     def __init__(self):
         self._markets = {}  # marketId: <Market>
-        self.events = defaultdict(list)  # eventId: [<Market>, ]
+        self._events = {}  # eventId: {marketId: <Market>}
+        # (eventId, marketStartDatetime): {marketType: {marketId: <Market>}}
+        self._event_index = {}
+        self._event_keys = {}  # marketId: (eventId, marketStartDatetime, marketType)
+        self._live_order_market_ids = set()  # maintained by Blotter
 
     def add_market(self, market_id: str, market: Market) -> None:
         if market_id in self._markets:
             self._markets[market_id].open_market()
         else:
             self._markets[market_id] = market
-            if market.event_id:
-                self.events[market.event_id].append(market)
+            self.index_market(market)
+
+    def index_market(self, market: Market) -> None:
+        """Add/move market in the event index, should
+        be called when the event / start time / market
+        type of a market may have changed.
+        """
+        if self._markets.get(market.market_id) is not market:
+            return
+        key = self._create_event_key(market)
+        if key == self._event_keys.get(market.market_id):
+            return
+        self._remove_market_index(market)
+        if key is None:
+            return
+        event_id, market_start_datetime, market_type = key
+        market_id = market.market_id
+        self._events.setdefault(event_id, {})[market_id] = market
+        event = self._event_index.setdefault((event_id, market_start_datetime), {})
+        event.setdefault(market_type, {})[market_id] = market
+        self._event_keys[market.market_id] = key
+
+    def event_markets(self, market: Market) -> dict:
+        """Returns markets grouped by market type that
+        share the same event and start time (soccer /
+        golf ignore start time), the dict is a copy of
+        the index.
+        """
+        event_markets = defaultdict(list)
+        key = self._event_keys.get(market.market_id) or self._create_event_key(market)
+        if key:
+            event = self._event_index.get(key[:2])
+            if event:
+                for market_type, markets in event.items():
+                    event_markets[market_type] = list(markets.values())
+        return event_markets
 
     def close_market(self, market_id: str) -> Market:
         market = self._markets[market_id]
@@ -28,17 +68,48 @@ class Markets:
 
     def remove_market(self, market_id: str) -> None:
         market = self._markets[market_id]
+        key = self._event_keys.get(market_id)
+        self._remove_market_index(market)
+        self._live_order_market_ids.discard(market_id)
         del self._markets[market_id]
-        event_id = market.event_id
-        if event_id in self.events:
-            if market in self.events[event_id]:
-                self.events[event_id].remove(market)
         del market
         logger.debug(
             "Market removed",
-            extra={"market_id": market_id, "event_id": event_id},
+            extra={"market_id": market_id, "event_id": key[0] if key else None},
         )
 
+    def _remove_market_index(self, market: Market) -> None:
+        key = self._event_keys.pop(market.market_id, None)
+        if key is None:
+            return
+        event_id, market_start_datetime, market_type = key
+        market_id = market.market_id
+        event_markets = self._events.get(event_id)
+        if event_markets is not None:
+            event_markets.pop(market_id, None)
+            if not event_markets:
+                del self._events[event_id]
+        event = self._event_index.get((event_id, market_start_datetime))
+        if event is not None:
+            markets = event.get(market_type)
+            if markets is not None:
+                markets.pop(market_id, None)
+                if not markets:
+                    del event[market_type]
+            if not event:
+                del self._event_index[(event_id, market_start_datetime)]
+
+    @staticmethod
+    def _create_event_key(market: Market) -> Optional[tuple]:
+        event_id = market.event_id
+        if not event_id:
+            return
+        if market.event_type_id in EVENT_TYPES_IGNORE_START:
+            market_start_datetime = None
+        else:
+            market_start_datetime = market.market_start_datetime
+        return event_id, market_start_datetime, market.market_type
+
     def get_order(self, market_id: str, order_id: str) -> Optional[BetfairOrder]:
         try:
             return self.markets[market_id].blotter[order_id]
@@ -55,14 +126,30 @@ class Markets:
     def markets(self) -> dict:
         return self._markets
 
+    @property
+    def events(self) -> defaultdict:
+        """eventId: [<Market>, ] (copy of the index)"""
+        events = defaultdict(list)
+        for event_id, markets in self._events.items():
+            events[event_id] = list(markets.values())
+        return events
+
     @property
     def open_market_ids(self) -> list:
         return [m.market_id for m in self if m.status == "OPEN"]
 
+    def update_live_orders(self, market_id: str, live_orders: bool) -> None:
+        # called by Blotter when it gains its first / completes its last live order
+        if live_orders:
+            self._live_order_market_ids.add(market_id)
+        else:
+            self._live_order_market_ids.discard(market_id)
+
     @property
     def live_orders(self) -> bool:
-        for market in self:
-            if market.closed is False and market.blotter.has_live_orders:
+        for market_id in list(self._live_order_market_ids):
+            market = self._markets.get(market_id)
+            if market and market.closed is False:
                 return True
         return False
 
@@ -0,0 +1,145 @@
+"""
+Compact per runner price history stored in a
+numpy ring buffer, each update is written twice
+(at index and index + depth) so that the latest
+n updates are always a contiguous slice and can
+be returned as a view without copying.
+"""
+
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional, see requirements-speed.txt
+    np = None
+
+from ..utils import get_price, get_size
+from ..exceptions import FlumineException
+
+FIELDS = (
+    "publish_time",
+    "back_price",
+    "back_size",
+    "lay_price",
+    "lay_size",
+    "last_price_traded",
+    "total_matched",
+)
+PUBLISH_TIME, BACK_PRICE, BACK_SIZE, LAY_PRICE, LAY_SIZE, LTP, TOTAL_MATCHED = range(
+    len(FIELDS)
+)
+
+
+class RunnerPriceHistory:
+    __slots__ = ["selection_id", "handicap", "depth", "_data", "_index", "_count"]
+
+    def __init__(self, selection_id: int, handicap: float, depth: int):
+        self.selection_id = selection_id
+        self.handicap = handicap
+        self.depth = depth
+        self._data = np.full((depth * 2, len(FIELDS)), np.nan)
+        self._index = 0  # next write position
+        self._count = 0
+
+    def update(self, publish_time: int, runner) -> None:
+        ex = runner.ex
+        row = (
+            publish_time,
+            _nan(get_price(ex.available_to_back, 0)),
+            _nan(get_size(ex.available_to_back, 0)),
+            _nan(get_price(ex.available_to_lay, 0)),
+            _nan(get_size(ex.available_to_lay, 0)),
+            _nan(runner.last_price_traded),
+            _nan(runner.total_matched),
+        )
+        index = self._index
+        self._data[index] = row
+        self._data[index + self.depth] = row
+        self._index = (index + 1) % self.depth
+        if self._count < self.depth:
+            self._count += 1
+
+    def window(self, n: int = None) -> "np.ndarray":
+        """Returns view (oldest first) of the
+        latest n updates, shape (n, len(FIELDS))
+        """
+        if n is None or n > self._count:
+            n = self._count
+        end = self._index + self.depth
+        return self._data[end - n : end]
+
+    def field(self, field: int, n: int = None) -> "np.ndarray":
+        return self.window(n)[:, field]
+
+    def publish_time(self, n: int = None) -> "np.ndarray":
+        return self.field(PUBLISH_TIME, n)
+
+    def back_price(self, n: int = None) -> "np.ndarray":
+        return self.field(BACK_PRICE, n)
+
+    def back_size(self, n: int = None) -> "np.ndarray":
+        return self.field(BACK_SIZE, n)
+
+    def lay_price(self, n: int = None) -> "np.ndarray":
+        return self.field(LAY_PRICE, n)
+
+    def lay_size(self, n: int = None) -> "np.ndarray":
+        return self.field(LAY_SIZE, n)
+
+    def last_price_traded(self, n: int = None) -> "np.ndarray":
+        return self.field(LTP, n)
+
+    def total_matched(self, n: int = None) -> "np.ndarray":
+        return self.field(TOTAL_MATCHED, n)
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class PriceHistory:
+    """
+    Holds a RunnerPriceHistory per runner for
+    a market, updated on each MarketBook.
+
+        history = market.enable_price_history(depth=100)
+        runner_history = history.runner(selection_id)
+        runner_history.back_price(10)  # view of last 10 best back prices
+    """
+
+    def __init__(self, market_id: str, depth: int = 100):
+        if np is None:
+            raise FlumineException("numpy is required for PriceHistory")
+        self.market_id = market_id
+        self.depth = depth
+        self.publish_time = None
+        self._runners = {}  # {(selectionId, handicap): RunnerPriceHistory}
+
+    def update(self, market_book) -> None:
+        publish_time = market_book.publish_time_epoch
+        if publish_time == self.publish_time:
+            return  # snap without update
+        self.publish_time = publish_time
+        runners = self._runners
+        for runner in market_book.runners:
+            key = (runner.selection_id, runner.handicap)
+            runner_history = runners.get(key)
+            if runner_history is None:
+                runner_history = runners[key] = RunnerPriceHistory(
+                    runner.selection_id, runner.handicap, self.depth
+                )
+            runner_history.update(publish_time, runner)
+
+    def runner(
+        self, selection_id: int, handicap: float = 0
+    ) -> Optional[RunnerPriceHistory]:
+        return self._runners.get((selection_id, handicap))
+
+    def __iter__(self):
+        return iter(self._runners.values())
+
+    def __len__(self) -> int:
+        return len(self._runners)
+
+
+def _nan(value) -> float:
+    return np.nan if value is None else value
@@ -0,0 +1,66 @@
+from typing import Optional
+
+"""
+Runner level change sets calculated from the raw
+streaming update held on the MarketBook, allows
+strategies to only process runners that changed.
+
+    {(selectionId, handicap): {"ladder", "ltp"}, }
+"""
+
+LADDER = "ladder"
+TRADED = "traded"
+LTP = "ltp"
+SP = "sp"
+STATUS = "status"
+ALL_CHANGES = frozenset((LADDER, TRADED, LTP, SP, STATUS))
+
+CHANGE_LOOKUP = {
+    "atb": LADDER,
+    "atl": LADDER,
+    "batb": LADDER,
+    "batl": LADDER,
+    "bdatb": LADDER,
+    "bdatl": LADDER,
+    "trd": TRADED,
+    "tv": TRADED,
+    "ltp": LTP,
+    "spn": SP,
+    "spf": SP,
+    "spb": SP,
+    "spl": SP,
+}
+
+
+def get_runner_changes(market_book, previous_market_book=None) -> dict:
+    """Returns {(selectionId, handicap): set(changes)} for
+    the runners updated in this MarketBook, all runners
+    are returned if the book is not from a stream update.
+    """
+    if market_book is None or market_book.streaming_snap:
+        return {}
+    streaming_update = market_book.streaming_update
+    if not isinstance(streaming_update, dict):
+        return {
+            (r.selection_id, r.handicap): set(ALL_CHANGES) for r in market_book.runners
+        }
+    changes = {}
+    for runner_change in streaming_update.get("rc", ()):
+        runner_changes = {
+            CHANGE_LOOKUP[key] for key in runner_change if key in CHANGE_LOOKUP
+        }
+        if runner_changes:
+            changes[(runner_change["id"], runner_change.get("hc", 0))] = runner_changes
+    if "marketDefinition" in streaming_update:
+        previous_status = _runner_status(previous_market_book)
+        for runner in market_book.runners:
+            key = (runner.selection_id, runner.handicap)
+            if previous_status.get(key) != runner.status:
+                changes.setdefault(key, set()).add(STATUS)
+    return changes
+
+
+def _runner_status(market_book: Optional[object]) -> dict:
+    if market_book is None:
+        return {}
+    return {(r.selection_id, r.handicap): r.status for r in market_book.runners}
@@ -0,0 +1,103 @@
+from time import perf_counter_ns
+
+"""
+Handler loop instrumentation, per event type queue wait
+(event created -> dequeued) and handler time plus per
+strategy hook time, recorded into fixed power of two
+nanosecond bucket histograms so that recording is a
+bit_length and two integer increments. Percentiles are
+approximate (bucket upper bound).
+"""
+
+BUCKETS = 64
+
+
+class Histogram:
+    __slots__ = ["buckets", "count", "total", "max"]
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns: int) -> None:
+        if ns < 0:
+            ns = 0
+        self.buckets[ns.bit_length()] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, pct: float) -> int:
+        """Upper bound (ns) of the bucket holding pct"""
+        if not self.count:
+            return 0
+        target = self.count * pct / 100
+        cumulative = 0
+        for i, count in enumerate(self.buckets):
+            cumulative += count
+            if cumulative >= target:
+                return min(2**i - 1 if i else 0, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1e3 if self.count else 0,
+            "p50_us": self.percentile(50) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+            "max_us": self.max / 1e3,
+        }
+
+
+class EventMetrics:
+    __slots__ = ["queue_wait", "handler"]
+
+    def __init__(self):
+        self.queue_wait = Histogram()
+        self.handler = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "queue_wait": self.queue_wait.snapshot(),
+            "handler": self.handler.snapshot(),
+        }
+
+
+class StrategyMetrics:
+    __slots__ = ["check_market_book", "process_market_book", "process_orders"]
+
+    def __init__(self):
+        self.check_market_book = Histogram()
+        self.process_market_book = Histogram()
+        self.process_orders = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "check_market_book": self.check_market_book.snapshot(),
+            "process_market_book": self.process_market_book.snapshot(),
+            "process_orders": self.process_orders.snapshot(),
+        }
+
+
+class HandlerMetrics:
+    def __init__(self):
+        self.events = {}  # {EventType: EventMetrics}
+
+    def record(self, event, start: int) -> None:
+        """Record an event handled from `start` (perf_counter_ns
+        when dequeued) until now.
+        """
+        event_metrics = self.events.get(event.EVENT_TYPE)
+        if event_metrics is None:
+            event_metrics = self.events[event.EVENT_TYPE] = EventMetrics()
+        event_metrics.queue_wait.record(start - event._time_created_ns)
+        event_metrics.handler.record(perf_counter_ns() - start)
+
+    def snapshot(self) -> dict:
+        return {
+            event_type.name: event_metrics.snapshot()
+            for event_type, event_metrics in self.events.items()
+        }
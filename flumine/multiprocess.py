@@ -0,0 +1,556 @@
+import copy
+import zlib
+import logging
+import threading
+import multiprocessing
+from typing import Iterator
+from multiprocessing.connection import wait
+from betfairlightweight.resources import CurrentOrders
+
+from .flumine import Flumine
+from .clients.baseclient import BaseClient
+from .events import events
+from .events.events import EventType
+from .exceptions import ClientError
+from .markets.markets import Markets
+from .streams.marketfilter import compile_market_filters
+from . import config, worker
+
+logger = logging.getLogger(__name__)
+
+"""
+Market partitioned multi process runtime, the parent
+process owns the clients (login / keep alive / account)
+and the streams, N child processes each own the markets
+where partition(market_id) == index along with their
+Blotters and a copy of every strategy:
+
+    framework = MultiProcessFlumine(client, processes=4)
+    framework.add_strategy(strategy)
+    framework.run()
+
+The parent handler loop only routes, MarketBooks, raw
+data and current orders are split by market_id and sent
+to the owning process over a pipe. As orders are owned
+by the process owning the market, order stream updates
+are routed by market_id and customer_strategy_ref is
+shared so that cleared orders / order stream filtering
+is unchanged. Each process polls market catalogues and
+market closure for its own markets.
+
+Strategies and their state must be picklable (processes
+are spawned), bflw clients are rebuilt in each process
+and the parent forwards session token changes.
+
+The parent keeps a MarketRegistry (market status from
+the routed data, live orders / removals reported by the
+partitions over a second pipe) in place of Markets so
+that the MarketStream / OrderStream snaps still work.
+"""
+
+START_METHOD = "spawn"
+
+
+def partition(market_id: str, processes: int) -> int:
+    """Stable (across processes) market_id partition"""
+    return zlib.crc32(market_id.encode()) % processes
+
+
+class StreamRef:
+    """Stands in for a parent process stream in the
+    partition strategies, stream_id is kept in sync.
+    """
+
+    __slots__ = ["stream_id"]
+
+    def __init__(self, stream_id: int):
+        self.stream_id = stream_id
+
+
+class MarketRef:
+    """Stands in for a partition Market in the parent"""
+
+    __slots__ = ["market_id", "status"]
+
+    def __init__(self, market_id: str, status: str):
+        self.market_id = market_id
+        self.status = status
+
+    @property
+    def closed(self) -> bool:
+        return self.status == "CLOSED"
+
+
+class MarketRegistry:
+    """Parent process stand in for Markets, the
+    streams only need the market status (MarketStream
+    snaps) and whether any market has live orders
+    (OrderStream snaps).
+    """
+
+    def __init__(self):
+        self._markets = {}  # marketId: <MarketRef>
+        self._live_order_market_ids = set()  # reported by the partitions
+
+    def update_market(self, market_id: str, status: str) -> None:
+        market = self._markets.get(market_id)
+        if market is None:
+            self._markets[market_id] = MarketRef(market_id, status)
+        else:
+            market.status = status
+
+    def update_live_orders(self, market_id: str, live_orders: bool) -> None:
+        if live_orders:
+            self._live_order_market_ids.add(market_id)
+        else:
+            self._live_order_market_ids.discard(market_id)
+
+    def remove_market(self, market_id: str) -> None:
+        self._markets.pop(market_id, None)
+        self._live_order_market_ids.discard(market_id)
+
+    @property
+    def markets(self) -> dict:
+        return self._markets
+
+    @property
+    def open_market_ids(self) -> list:
+        return [m.market_id for m in self if m.status == "OPEN"]
+
+    @property
+    def live_orders(self) -> bool:
+        for market_id in list(self._live_order_market_ids):
+            market = self._markets.get(market_id)
+            if market and market.closed is False:
+                return True
+        return False
+
+    def __iter__(self) -> Iterator[MarketRef]:
+        return iter(list(self._markets.values()))
+
+    def __len__(self) -> int:
+        return len(self._markets)
+
+
+class PartitionMarkets(Markets):
+    """Partition process Markets, live order changes
+    and removals are sent to the parent MarketRegistry.
+    """
+
+    def __init__(self, conn=None):
+        super(PartitionMarkets, self).__init__()
+        self._conn = conn
+        self._lock = threading.Lock()  # called from handler / worker threads
+
+    def update_live_orders(self, market_id: str, live_orders: bool) -> None:
+        super(PartitionMarkets, self).update_live_orders(market_id, live_orders)
+        self._send(("live_orders", market_id, live_orders))
+
+    def remove_market(self, market_id: str) -> None:
+        super(PartitionMarkets, self).remove_market(market_id)
+        self._send(("removed", market_id))
+
+    def _send(self, message: tuple) -> None:
+        if self._conn is None:
+            return
+        with self._lock:
+            try:
+                self._conn.send(message)
+            except OSError:
+                pass  # parent exiting
+
+
+class MultiProcessFlumine(Flumine):
+    def __init__(self, client: BaseClient = None, processes: int = 2):
+        """
+        :param client: flumine client instance
+        :param processes: Number of market partition processes
+        """
+        super(MultiProcessFlumine, self).__init__(client)
+        self.markets = MarketRegistry()
+        self.processes = processes
+        self._processes = []
+        self._connections = []
+        self._partition_connections = []  # partition -> parent
+        self._partition_reader = threading.Thread(
+            name="PartitionListener", target=self._read_partitions, daemon=True
+        )
+        self._session_tokens = {}
+        self._stream_ids = None
+        self.routed = [0] * processes  # events sent per partition
+
+    def _event_handlers(self) -> dict:
+        event_handlers = {
+            event_type: self._broadcast
+            for event_type in super(MultiProcessFlumine, self)._event_handlers()
+        }
+        event_handlers.update(
+            {
+                EventType.MARKET_BOOK: self._route_market_books,
+                EventType.RAW_DATA: self._route_raw_data,
+                EventType.CURRENT_ORDERS: self._route_current_orders,
+                EventType.TERMINATOR: "break",
+            }
+        )
+        return event_handlers
+
+    def _route_market_books(self, event: events.MarketBookEvent) -> None:
+        self._sync_session_tokens()
+        self._sync_stream_ids()
+        update_market = self.markets.update_market
+        for market_book in event.event:
+            update_market(market_book.market_id, market_book.status)
+        partitions = self._split(event.event, lambda m: m.market_id)
+        for index, market_books in partitions.items():
+            self._send(index, events.MarketBookEvent(market_books))
+
+    def _route_raw_data(self, event: events.RawDataEvent) -> None:
+        self._sync_stream_ids()
+        stream_id, clk, publish_time, data = event.event
+        for datum in data:
+            market_definition = datum.get("marketDefinition")
+            if market_definition:
+                self.markets.update_market(datum["id"], market_definition.get("status"))
+        partitions = self._split(data, lambda d: d["id"])
+        for index, datum in partitions.items():
+            self._send(
+                index, events.RawDataEvent((stream_id, clk, publish_time, datum))
+            )
+
+    def _route_current_orders(self, event: events.CurrentOrdersEvent) -> None:
+        self._sync_session_tokens()
+        orders = [o for current_orders in event.event for o in current_orders.orders]
+        partitions = self._split(orders, lambda o: o.market_id)
+        for index in range(self.processes):
+            # empty events are still sent to trigger process_orders
+            current_orders = CurrentOrders(currentOrders=[], moreAvailable=False)
+            current_orders.orders = partitions.get(index, [])
+            self._send(index, events.CurrentOrdersEvent([current_orders]))
+
+    def _broadcast(self, event) -> None:
+        for index in range(self.processes):
+            self._send(index, event)
+
+    def _split(self, items: list, key) -> dict:
+        partitions = {}
+        processes = self.processes
+        for item in items:
+            index = partition(key(item), processes)
+            if index in partitions:
+                partitions[index].append(item)
+            else:
+                partitions[index] = [item]
+        return partitions
+
+    def _send(self, index: int, message) -> None:
+        self.routed[index] += 1
+        self._connections[index].send(message)
+
+    def _read_partitions(self) -> None:
+        # live orders / removals reported by the partition processes
+        connections = list(self._partition_connections)
+        markets = self.markets
+        while connections:
+            for conn in wait(connections):
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    connections.remove(conn)
+                    continue
+                if message[0] == "live_orders":
+                    markets.update_live_orders(message[1], message[2])
+                elif message[0] == "removed":
+                    markets.remove_market(message[1])
+
+    def _sync_session_tokens(self) -> None:
+        # forward session tokens changed by login / keep alive
+        for i, client in enumerate(self.clients):
+            if client.betting_client is None:
+                continue
+            session_token = client.betting_client.session_token
+            if self._session_tokens.get(i) != session_token:
+                self._session_tokens[i] = session_token
+                for conn in self._connections:
+                    conn.send(("session", i, session_token))
+
+    def _sync_stream_ids(self) -> None:
+        # stream_id changes on (re)subscribe, strategies in the
+        # partitions check MarketBook.streaming_unique_id against it
+        stream_ids = [
+            [s.stream_id for s in strategy.streams] for strategy in self.strategies
+        ]
+        if stream_ids != self._stream_ids:
+            self._stream_ids = stream_ids
+            for conn in self._connections:
+                conn.send(("streams", stream_ids))
+
+    def _start_processes(self) -> None:
+        ctx = multiprocessing.get_context(START_METHOD)
+        client_states = [_client_state(client) for client in self.clients]
+        strategies = [self._strategy_state(strategy) for strategy in self.strategies]
+        for index in range(self.processes):
+            reader, writer = ctx.Pipe(duplex=False)
+            partition_reader, partition_writer = ctx.Pipe(duplex=False)
+            process = ctx.Process(
+                target=_run_partition,
+                args=(
+                    index,
+                    self.processes,
+                    client_states,
+                    strategies,
+                    reader,
+                    partition_writer,
+                ),
+                name="FluminePartition-%s" % index,
+                daemon=True,
+            )
+            process.start()
+            reader.close()
+            partition_writer.close()
+            self._processes.append(process)
+            self._connections.append(writer)
+            self._partition_connections.append(partition_reader)
+        self._partition_reader.start()
+        for i, client in enumerate(self.clients):
+            if client.betting_client:
+                self._session_tokens[i] = client.betting_client.session_token
+
+    def _strategy_state(self, strategy) -> tuple:
+        # streams / clients are process local, market filters recompiled
+        market_filters = {}  # {stream index: [market_filter, ]}
+        for i, stream in enumerate(strategy.streams):
+            if stream not in strategy.local_market_filters:
+                continue
+            strategy_market_filters = self.streams.strategy_market_filters(stream)
+            market_filters[i] = strategy_market_filters[strategy]
+        state = copy.copy(strategy)
+        state.streams = [StreamRef(s.stream_id) for s in strategy.streams]
+        state.clients = None
+        state.local_market_filters = {}
+        return state, market_filters
+
+    def _add_default_workers(self) -> None:
+        # catalogue / closure polling is done by the partition processes
+        client_timeouts = [
+            client.betting_client.session_timeout for client in self.clients
+        ]
+        ka_interval = min((min(client_timeouts) / 2), 1200)
+        self.add_worker(
+            self.WORKER(self, function=worker.keep_alive, interval=ka_interval)
+        )
+        self.add_worker(
+            self.WORKER(
+                self,
+                function=worker.poll_account_balance,
+                interval=120,
+                start_delay=10,  # wait for login
+            )
+        )
+
+    @property
+    def info(self) -> dict:
+        info = super(MultiProcessFlumine, self).info
+        info["processes"] = [
+            {"name": p.name, "pid": p.pid, "alive": p.is_alive(), "routed": routed}
+            for p, routed in zip(self._processes, self.routed)
+        ]
+        return info
+
+    def __enter__(self):
+        logger.info("Starting flumine (multi process)", extra=self.info)
+        if len(self.clients) == 0:
+            raise ClientError("No clients provided")
+
+        config.simulated = self.SIMULATED
+        # login
+        self.clients.login()
+        self.clients.update_account_details()
+        # start partition processes (strategies are started in each)
+        self._start_processes()
+        # add default and start all workers
+        self._add_default_workers()
+        for w in self._workers:
+            w.start()
+        # start streams
+        self.streams.start()
+
+        self._running = True
+
+    def __exit__(self, *args):
+        for conn in self._connections:
+            try:
+                conn.send(("stop",))
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=10)
+        # shutdown workers
+        for w in self._workers:
+            w.shutdown()
+        # shutdown streams
+        self.streams.stop()
+        # logout
+        self.clients.logout()
+        self._running = False
+        logger.info("Exiting flumine", extra=self.info)
+
+    def __repr__(self) -> str:
+        return "<MultiProcessFlumine>"
+
+    def __str__(self) -> str:
+        return "<MultiProcessFlumine>"
+
+
+class PartitionFlumine(Flumine):
+    """Runs in each partition process, events are
+    received from the parent and processed as Flumine.
+    """
+
+    def __init__(self, index: int, processes: int, conn, parent_conn=None):
+        super(PartitionFlumine, self).__init__()
+        self.markets = PartitionMarkets(parent_conn)
+        self.index = index
+        self.processes = processes
+        self._conn = conn
+        self._reader = threading.Thread(
+            name="PartitionReader", target=self._read, daemon=True
+        )
+
+    def add_client(self, client: BaseClient) -> None:
+        # no streams, the parent owns the order stream
+        self.clients.add_client(client)
+
+    def add_strategy(self, strategy, market_filters: dict = None) -> None:
+        logger.info("Adding strategy %s", strategy)
+        strategy.local_market_filters = {
+            strategy.streams[i]: compile_market_filters(stream_market_filters)
+            for i, stream_market_filters in (market_filters or {}).items()
+        }
+        self.strategies(strategy, self.clients, self)
+
+    def _read(self) -> None:
+        while True:
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            if isinstance(message, events.BaseEvent):
+                self.handler_queue.put(message)
+            elif message[0] == "streams":
+                for strategy, stream_ids in zip(self.strategies, message[1]):
+                    for stream, stream_id in zip(strategy.streams, stream_ids):
+                        stream.stream_id = stream_id
+            elif message[0] == "session":
+                _, i, session_token = message
+                self.clients._clients[i].betting_client.set_session_token(session_token)
+            elif message[0] == "stop":
+                break
+        self.handler_queue.put(events.TerminatorEvent(None))
+
+    def _add_default_workers(self) -> None:
+        self.add_worker(
+            self.WORKER(
+                self,
+                function=worker.poll_market_catalogue,
+                interval=120,
+                start_delay=10,  # wait for streams to populate
+            )
+        )
+        self.add_worker(
+            self.WORKER(
+                self,
+                function=worker.poll_market_closure,
+                interval=60,
+                start_delay=10,
+            )
+        )
+
+    def __enter__(self):
+        logger.info(
+            "Starting partition %s/%s", self.index, self.processes, extra=self.info
+        )
+        config.simulated = self.SIMULATED
+        self._add_default_workers()
+        for w in self._workers:
+            w.start()
+        self.strategies.start(self)
+        self._reader.start()
+        self._running = True
+
+    def __exit__(self, *args):
+        self._process_end_flumine()
+        for w in self._workers:
+            w.shutdown()
+        self._running = False
+        logger.info("Exiting partition %s/%s", self.index, self.processes)
+
+    def __repr__(self) -> str:
+        return "<PartitionFlumine %s/%s>" % (self.index, self.processes)
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+
+def _client_state(client: BaseClient) -> tuple:
+    betting_client = client.betting_client
+    if betting_client is None:
+        betting_client_state = None
+    else:
+        betting_client_state = (
+            betting_client.__class__,
+            {
+                "username": betting_client.username,
+                "password": betting_client.password,
+                "app_key": betting_client.app_key,
+                "certs": betting_client.certs,
+                "locale": betting_client.locale,
+                "cert_files": betting_client.cert_files,
+            },
+            {
+                "identity_uri": betting_client.identity_uri,
+                "identity_cert_uri": betting_client.identity_cert_uri,
+                "api_uri": betting_client.api_uri,
+                "session_token": betting_client.session_token,
+            },
+        )
+    return (
+        client.__class__,
+        {
+            "interactive_login": client.interactive_login,
+            "username": client._username,
+            "order_stream": client.order_stream,
+            "paper_trade": client.paper_trade,
+            "simulated_full_match": client.simulated_full_match,
+        },
+        betting_client_state,
+    )
+
+
+def _build_client(client_state: tuple) -> BaseClient:
+    client_class, kwargs, betting_client_state = client_state
+    betting_client = None
+    if betting_client_state:
+        betting_client_class, betting_kwargs, attributes = betting_client_state
+        betting_client = betting_client_class(**betting_kwargs)
+        session_token = attributes.pop("session_token")
+        for key, value in attributes.items():
+            setattr(betting_client, key, value)
+        if session_token:
+            betting_client.set_session_token(session_token)
+    return client_class(betting_client=betting_client, **kwargs)
+
+
+def _run_partition(
+    index: int,
+    processes: int,
+    client_states: list,
+    strategies: list,
+    conn,
+    parent_conn,
+) -> None:
+    framework = PartitionFlumine(index, processes, conn, parent_conn)
+    for client_state in client_states:
+        framework.add_client(_build_client(client_state))
+    for strategy, market_filters in strategies:
+        framework.add_strategy(strategy, market_filters)
+    framework.run()
@@ -1,3 +1,16 @@
+from betfairlightweight.compat import json
+from betfairlightweight.resources.baseresource import BaseResource
+from betfairlightweight.resources.bettingresources import (
+    BettingResource,
+    KeyLine,
+    PriceLadderDescription,
+    RunnerBookOrder,
+    RunnerBookMatch,
+)
+from betfairlightweight.resources.streamingresources import MarketDefinitionKeyLine
+from betfairlightweight.streaming import cache
+from betfairlightweight.utils import utcnow
+
 """
 django style `lazy` object creation, the main bulk of processing
 is turning {priceSize} into <PriceSize> objects but this is
@@ -7,11 +20,19 @@ handled as a dict instead.
 The inclusion of slots further reduces the processing time as well
 as reducing memory.
 
+MarketBook, RunnerBook, MarketDefinition and MarketDefinitionRunner
+follow the same approach for the streaming cache, scalars are set
+on creation and datetimes / nested objects are created on first
+access. A MarketDefinition update that is unchanged reuses the
+previous MarketDefinition and unchanged runners are reused.
+
 This optimisation will improve normal streaming as well as
 simulation, with more speed, less CPU + ram and minimal reduction
 in usability.
 """
 
+strip_datetime = BaseResource.strip_datetime
+
 
 class SP:
     __slots__ = [
@@ -49,3 +70,386 @@ class EX:
         self.available_to_back = availableToBack
         self.available_to_lay = availableToLay
         self.traded_volume = tradedVolume
+
+
+class lazy:
+    """Non data descriptor, the value is created on
+    first access and stored in the `_<name>` slot.
+    """
+
+    __slots__ = ["function", "slot"]
+
+    def __init__(self, function):
+        self.function = function
+        self.slot = "_" + function.__name__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.function(instance)
+            setattr(instance, self.slot, value)
+            return value
+
+
+class Resource:
+    __slots__ = []
+
+    # dict style access as bflw BettingResource
+    _item_name_to_attribute_name_overrides = {}
+    __getitem__ = BettingResource.__getitem__
+    get = BettingResource.get
+
+    def __repr__(self) -> str:
+        return "<%s>" % self.__class__.__name__
+
+    def __str__(self) -> str:
+        return self.__class__.__name__
+
+
+class RunnerBook(Resource):
+    __slots__ = [
+        "selection_id",
+        "status",
+        "total_matched",
+        "adjustment_factor",
+        "handicap",
+        "last_price_traded",
+        "sp",
+        "ex",
+        "matches_by_strategy",
+        "_removal_date_raw",
+        "_orders_raw",
+        "_matches_raw",
+        "_removal_date",
+        "_orders",
+        "_matches",
+    ]
+
+    def __init__(
+        self,
+        selectionId: int,
+        status: str,
+        handicap: float,
+        adjustmentFactor: float = None,
+        lastPriceTraded: float = None,
+        totalMatched: float = None,
+        removalDate: str = None,
+        sp: dict = None,
+        ex: dict = None,
+        orders: list = None,
+        matches: list = None,
+        matchesByStrategy: list = None,
+    ):
+        self.selection_id = selectionId
+        self.status = status
+        self.total_matched = totalMatched
+        self.adjustment_factor = adjustmentFactor
+        self.handicap = handicap
+        self.last_price_traded = lastPriceTraded
+        self.sp = SP(**sp) if sp else None
+        self.ex = EX(**ex) if ex else None
+        self.matches_by_strategy = matchesByStrategy
+        self._removal_date_raw = removalDate
+        self._orders_raw = orders
+        self._matches_raw = matches
+
+    @lazy
+    def removal_date(self):
+        return strip_datetime(self._removal_date_raw)
+
+    @lazy
+    def orders(self):
+        return [RunnerBookOrder(**i) for i in self._orders_raw or ()]
+
+    @lazy
+    def matches(self):
+        return [RunnerBookMatch(**i) for i in self._matches_raw or ()]
+
+    def __str__(self):
+        return "RunnerBook: %s" % self.selection_id
+
+
+class MarketBook(Resource):
+    __slots__ = [
+        "streaming_unique_id",
+        "streaming_update",
+        "streaming_snap",
+        "market_definition",
+        "elapsed_time",
+        "_datetime_created",
+        "_datetime_updated",
+        "_data",
+        "market_id",
+        "bet_delay",
+        "bsp_reconciled",
+        "complete",
+        "cross_matching",
+        "inplay",
+        "is_market_data_delayed",
+        "number_of_active_runners",
+        "number_of_runners",
+        "number_of_winners",
+        "runners_voidable",
+        "status",
+        "total_available",
+        "total_matched",
+        "version",
+        "runners",
+        "publish_time_epoch",
+        "_publish_time",
+        "_last_match_time",
+        "_key_line_description",
+        "_price_ladder_definition",
+    ]
+    strip_datetime = staticmethod(strip_datetime)
+
+    def __init__(self, **kwargs):
+        self.streaming_unique_id = kwargs.pop("streaming_unique_id", None)
+        self.streaming_update = kwargs.pop("streaming_update", None)
+        self.streaming_snap = kwargs.pop("streaming_snap", False)
+        self.market_definition = kwargs.pop("market_definition", None)
+        self.elapsed_time = kwargs.pop("elapsed_time", None)
+        now = utcnow()
+        self._datetime_created = now
+        self._datetime_updated = now
+        self._data = kwargs
+        get = kwargs.get
+        self.market_id = get("marketId")
+        self.bet_delay = get("betDelay")
+        self.bsp_reconciled = get("bspReconciled")
+        self.complete = get("complete")
+        self.cross_matching = get("crossMatching")
+        self.inplay = get("inplay")
+        self.is_market_data_delayed = get("isMarketDataDelayed")
+        self.number_of_active_runners = get("numberOfActiveRunners")
+        self.number_of_runners = get("numberOfRunners")
+        self.number_of_winners = get("numberOfWinners")
+        self.runners_voidable = get("runnersVoidable")
+        self.status = get("status")
+        self.total_available = get("totalAvailable")
+        self.total_matched = get("totalMatched")
+        self.version = get("version")
+        self.runners = [RunnerBook(**i) for i in get("runners") or ()]
+        self.publish_time_epoch = get("publishTime")
+
+    @lazy
+    def publish_time(self):
+        return strip_datetime(self.publish_time_epoch)
+
+    @lazy
+    def last_match_time(self):
+        return strip_datetime(self._data.get("lastMatchTime"))
+
+    @lazy
+    def key_line_description(self):
+        key_line_description = self._data.get("keyLineDescription")
+        return KeyLine(**key_line_description) if key_line_description else None
+
+    @lazy
+    def price_ladder_definition(self):
+        price_ladder_definition = self._data.get("priceLadderDefinition")
+        return (
+            PriceLadderDescription(**price_ladder_definition)
+            if price_ladder_definition
+            else None
+        )
+
+    def json(self) -> str:
+        return json.dumps(self._data)
+
+
+class MarketDefinitionRunner(Resource):
+    __slots__ = [
+        "selection_id",
+        "sort_priority",
+        "status",
+        "handicap",
+        "bsp",
+        "adjustment_factor",
+        "name",
+        "_removal_date_raw",
+        "_removal_date",
+    ]
+
+    def __init__(
+        self,
+        id: int,
+        sortPriority: int,
+        status: str,
+        hc: float = 0,
+        bsp: float = None,
+        adjustmentFactor: float = None,
+        removalDate: str = None,
+        name: str = None,
+    ):
+        self.selection_id = id
+        self.sort_priority = sortPriority
+        self.status = status
+        self.handicap = hc
+        self.bsp = bsp
+        self.adjustment_factor = adjustmentFactor
+        self.name = name  # historic data only
+        self._removal_date_raw = removalDate
+
+    @lazy
+    def removal_date(self):
+        return strip_datetime(self._removal_date_raw)
+
+    def __str__(self):
+        return "MarketDefinitionRunner: %s" % self.selection_id
+
+
+class MarketDefinition(Resource):
+    __slots__ = [
+        "_data",
+        "_previous",
+        "bet_delay",
+        "betting_type",
+        "bsp_market",
+        "bsp_reconciled",
+        "complete",
+        "country_code",
+        "cross_matching",
+        "discount_allowed",
+        "event_id",
+        "event_type_id",
+        "in_play",
+        "market_base_rate",
+        "market_type",
+        "number_of_active_runners",
+        "number_of_winners",
+        "persistence_enabled",
+        "regulators",
+        "runners_voidable",
+        "status",
+        "each_way_divisor",
+        "timezone",
+        "turn_in_play_enabled",
+        "venue",
+        "version",
+        "line_max_unit",
+        "line_min_unit",
+        "line_interval",
+        "race_type",
+        "name",
+        "event_name",
+        "_market_time",
+        "_open_date",
+        "_settled_time",
+        "_suspend_time",
+        "_runners",
+        "_price_ladder_definition",
+        "_key_line_definitions",
+    ]
+
+    def __init__(self, **kwargs):
+        self._data = kwargs
+        self._previous = None
+        get = kwargs.get
+        self.bet_delay = get("betDelay")
+        self.betting_type = get("bettingType")
+        self.bsp_market = get("bspMarket")
+        self.bsp_reconciled = get("bspReconciled")
+        self.complete = get("complete")
+        self.country_code = get("countryCode")
+        self.cross_matching = get("crossMatching")
+        self.discount_allowed = get("discountAllowed")
+        self.event_id = get("eventId")
+        self.event_type_id = get("eventTypeId")
+        self.in_play = get("inPlay")
+        self.market_base_rate = get("marketBaseRate")
+        self.market_type = get("marketType")
+        self.number_of_active_runners = get("numberOfActiveRunners")
+        self.number_of_winners = get("numberOfWinners")
+        self.persistence_enabled = get("persistenceEnabled")
+        self.regulators = get("regulators")
+        self.runners_voidable = get("runnersVoidable")
+        self.status = get("status")
+        self.each_way_divisor = get("eachWayDivisor")
+        self.timezone = get("timezone")
+        self.turn_in_play_enabled = get("turnInPlayEnabled")
+        self.venue = get("venue")
+        self.version = get("version")
+        self.line_max_unit = get("lineMaxUnit")
+        self.line_min_unit = get("lineMinUnit")
+        self.line_interval = get("lineInterval")
+        self.race_type = get("raceType")
+        self.name = get("name")  # historic data only
+        self.event_name = get("eventName")  # historic data only
+
+    @lazy
+    def market_time(self):
+        return strip_datetime(self._data.get("marketTime"))
+
+    @lazy
+    def open_date(self):
+        open_date = self._data.get("openDate")
+        return strip_datetime(open_date) if open_date else None
+
+    @lazy
+    def settled_time(self):
+        return strip_datetime(self._data.get("settledTime"))
+
+    @lazy
+    def suspend_time(self):
+        return strip_datetime(self._data.get("suspendTime"))
+
+    @lazy
+    def runners(self):
+        # reuse unchanged runners from the previous definition
+        previous, self._previous = self._previous, None
+        reuse = {}
+        if previous is not None:
+            for definition, runner in zip(previous._data["runners"], previous.runners):
+                reuse[(definition["id"], definition.get("hc", 0))] = (
+                    definition,
+                    runner,
+                )
+        runners = []
+        for definition in self._data.get("runners") or ():
+            definition_runner = reuse.get((definition["id"], definition.get("hc", 0)))
+            if definition_runner and definition_runner[0] == definition:
+                runners.append(definition_runner[1])
+            else:
+                runners.append(MarketDefinitionRunner(**definition))
+        return runners
+
+    @lazy
+    def price_ladder_definition(self):
+        price_ladder_definition = self._data.get("priceLadderDefinition")
+        return (
+            PriceLadderDescription(**price_ladder_definition)
+            if price_ladder_definition
+            else None
+        )
+
+    @lazy
+    def key_line_definitions(self):
+        key_line_definition = self._data.get("keyLineDefinition")
+        return (
+            MarketDefinitionKeyLine(**key_line_definition)
+            if key_line_definition
+            else None
+        )
+
+
+_process_market_definition = cache.MarketBookCache._process_market_definition
+
+
+def process_market_definition(self, market_definition: dict) -> None:
+    """MarketBookCache._process_market_definition, an
+    unchanged definition reuses the previous resource.
+    """
+    previous = self._market_definition_resource
+    previous_definition = self.market_definition
+    _process_market_definition(self, market_definition)
+    if isinstance(previous, MarketDefinition) and isinstance(
+        self._market_definition_resource, MarketDefinition
+    ):
+        if market_definition == previous_definition:
+            self._market_definition_resource = previous
+        elif hasattr(previous, "_runners"):
+            self._market_definition_resource._previous = previous
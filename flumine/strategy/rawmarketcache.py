@@ -0,0 +1,89 @@
+from typing import Optional
+
+PRICE_FIELDS = {"atb", "atl", "trd", "spb", "spl"}  # [price, size]
+LEVEL_FIELDS = {"batb", "batl", "bdatb", "bdatl"}  # [level, price, size]
+DEFAULT_FIELDS = ("ltp", "tv")
+
+
+class RawMarketCache:
+    """
+    Lightweight incremental cache for raw market
+    deltas received in `process_raw_data`, only the
+    requested runner fields are kept so strategies
+    can skip MarketBook creation entirely.
+
+        def process_raw_data(self, clk, publish_time, datum):
+            cache = self.caches.get(datum["id"])
+            if cache is None:
+                cache = self.caches[datum["id"]] = RawMarketCache(datum["id"])
+            cache.update(publish_time, datum)
+            cache.runners[(selection_id, 0)].get("ltp")
+
+    Price fields are held as {price: size} and level
+    fields as {level: (price, size)}.
+    """
+
+    __slots__ = [
+        "market_id",
+        "fields",
+        "publish_time",
+        "market_definition",
+        "total_matched",
+        "runners",
+    ]
+
+    def __init__(self, market_id: str, fields: tuple = DEFAULT_FIELDS):
+        self.market_id = market_id
+        self.fields = fields
+        self.publish_time = None
+        self.market_definition = None
+        self.total_matched = None
+        self.runners = {}  # {(selectionId, handicap): {field: value}}
+
+    def update(self, publish_time: int, datum: dict) -> None:
+        self.publish_time = publish_time
+        if datum.get("img"):
+            self.runners.clear()
+        if "marketDefinition" in datum:
+            self.market_definition = datum["marketDefinition"]
+        if "tv" in datum:
+            self.total_matched = datum["tv"]
+        runners = self.runners
+        for runner_change in datum.get("rc", ()):
+            key = (runner_change["id"], runner_change.get("hc", 0))
+            runner = runners.get(key)
+            if runner is None:
+                runner = runners[key] = {}
+            for field in self.fields:
+                if field not in runner_change:
+                    continue
+                value = runner_change[field]
+                if field in PRICE_FIELDS:
+                    book = runner.get(field)
+                    if book is None or (field == "trd" and not value):
+                        book = runner[field] = {}
+                    for price, size in value:
+                        if size == 0:
+                            book.pop(price, None)
+                        else:
+                            book[price] = size
+                elif field in LEVEL_FIELDS:
+                    book = runner.get(field)
+                    if book is None:
+                        book = runner[field] = {}
+                    for level, price, size in value:
+                        if size == 0:
+                            book.pop(level, None)
+                        else:
+                            book[level] = (price, size)
+                else:
+                    runner[field] = value
+
+    @property
+    def status(self) -> Optional[str]:
+        if self.market_definition:
+            return self.market_definition.get("status")
+
+    @property
+    def closed(self) -> bool:
+        return self.status == "CLOSED"
@@ -7,6 +7,7 @@ from .runnercontext import RunnerContext
 from ..markets.market import Market
 from ..streams.marketstream import BaseStream, MarketStream
 from ..utils import create_cheap_hash, STRATEGY_NAME_HASH_LENGTH
+from ..metrics import StrategyMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -45,17 +46,23 @@ class BaseStrategy:
         context: dict = None,
         max_selection_exposure: float = 100,
         max_order_exposure: float = 10,
+        stream_shards: int = None,
+        min_update_interval: float = None,
+        critical: bool = True,
     ):
         """
         :param market_filter: Streaming market filter dict or list of market filters
         :param market_data_filter: Streaming market data filter
         :param streaming_timeout: Streaming timeout in seconds, will call snap() on cache
         :param conflate_ms: Streaming conflation
-        :param stream_class: Can be Market or Data (raw)
+        :param stream_class: Can be Market or Data (raw, see process_raw_data)
         :param name: Strategy name (will default to class name)
         :param context: Dictionary holding additional user specific vars
         :param max_selection_exposure: Max exposure per selection
         :param max_order_exposure: Max exposure per order
+        :param stream_shards: Split market_filter across n streams (marketIds/eventTypeIds/countryCodes)
+        :param min_update_interval: Local conflation in seconds, max one MarketBook per market per interval
+        :param critical: If False MarketBooks are not processed when flumine is shedding load
         """
         self.market_filter = market_filter
         self.market_data_filter = market_data_filter or DEFAULT_MARKET_DATA_FILTER
@@ -66,10 +73,17 @@ class BaseStrategy:
         self.context = context or {}
         self.max_selection_exposure = max_selection_exposure
         self.max_order_exposure = max_order_exposure
+        self.stream_shards = stream_shards
+        self.min_update_interval = min_update_interval
+        self.critical = critical
         self.clients = None
 
         self._invested = {}  # {(marketId, selectionId): RunnerContext}
         self.streams = []  # list of streams strategy is subscribed
+        self.local_market_filters = {}  # {stream: predicate} for merged streams
+        self._conflation_times = {}  # {marketId: last processed publish_time_epoch}
+        self._conflation_pending = {}  # {marketId: latest conflated MarketBook}
+        self.metrics = StrategyMetrics()  # hook timings
         # cache
         self.name_hash = create_cheap_hash(self.name, STRATEGY_NAME_HASH_LENGTH)
 
@@ -91,14 +105,63 @@ class BaseStrategy:
     def process_closed_market(self, market: Market, market_book: MarketBook) -> None:
         return
 
+    def process_raw_data(self, clk: str, publish_time: int, datum: dict) -> None:
+        # called with raw market updates when using DataStream
+        return
+
     def process_orders(self, market: Market, orders: list) -> None:
         return
 
+    def process_load_shedding(self, degraded: bool) -> None:
+        # called when flumine enters / leaves degraded mode
+        return
+
     def finish(self, flumine) -> None:
         # called before flumine ends
         return
 
+    def market_filter_match(self, market_book: MarketBook) -> bool:
+        # applies strategy market_filter when sharing a superset stream
+        if self.local_market_filters:
+            streaming_unique_id = market_book.streaming_unique_id
+            for stream, predicate in self.local_market_filters.items():
+                if stream.stream_id == streaming_unique_id:
+                    return predicate(market_book)
+        return True
+
+    def conflate_market_book(self, market_book: MarketBook) -> bool:
+        """Returns True if the MarketBook should be processed
+        now, otherwise it is held (replacing any previously
+        held book) until min_update_interval has elapsed.
+        """
+        market_id = market_book.market_id
+        publish_time = market_book.publish_time_epoch
+        last_publish_time = self._conflation_times.get(market_id)
+        if (
+            last_publish_time is None
+            or publish_time - last_publish_time >= self.min_update_interval * 1e3
+        ):
+            self._conflation_times[market_id] = publish_time
+            self._conflation_pending.pop(market_id, None)
+            return True
+        self._conflation_pending[market_id] = market_book
+        return False
+
+    def conflated_market_books(self, publish_time: int) -> list:
+        # held MarketBooks due for processing at publish_time
+        market_books = []
+        if self._conflation_pending:
+            interval = self.min_update_interval * 1e3
+            for market_id, market_book in list(self._conflation_pending.items()):
+                if publish_time - self._conflation_times[market_id] >= interval:
+                    self._conflation_times[market_id] = publish_time
+                    del self._conflation_pending[market_id]
+                    market_books.append(market_book)
+        return market_books
+
     def remove_market(self, market_id: str) -> None:
+        self._conflation_times.pop(market_id, None)
+        self._conflation_pending.pop(market_id, None)
         to_remove = []
         for invested in self._invested:
             if invested[0] == market_id:
@@ -156,6 +219,9 @@ class BaseStrategy:
             "stream_ids": list(self.stream_ids),
             "max_selection_exposure": self.max_selection_exposure,
             "max_order_exposure": self.max_order_exposure,
+            "stream_shards": self.stream_shards,
+            "min_update_interval": self.min_update_interval,
+            "critical": self.critical,
             "context": self.context,
             "name_hash": self.name_hash,
         }
@@ -2,14 +2,16 @@ import threading
 import queue
 import logging
 import betfairlightweight
-from betfairlightweight import StreamListener
 from tenacity import wait_exponential
 
+from .listener import FlumineStreamListener
+from .metrics import StreamMetrics
+
 logger = logging.getLogger(__name__)
 
 
 class BaseStream(threading.Thread):
-    LISTENER = StreamListener
+    LISTENER = FlumineStreamListener
     MAX_LATENCY = 0.5
     RETRY_WAIT = wait_exponential(multiplier=1, min=2, max=60)
 
@@ -44,11 +46,13 @@ class BaseStream(threading.Thread):
         self.event_id = event_id
         self.operation = operation
         self.listener_kwargs = listener_kwargs
+        self.metrics = StreamMetrics()
         self._listener = self.LISTENER(
             output_queue=self._output_queue,
             max_latency=self.MAX_LATENCY,
             **listener_kwargs,
         )
+        self._listener.metrics = self.metrics
         self._output_thread = threading.Thread(
             name="{0}_output_thread".format(self.name),
             target=self.handle_output,
@@ -64,6 +68,7 @@ class BaseStream(threading.Thread):
     def stop(self) -> None:
         if self._stream:
             self._stream.stop()
+        self._listener.close()
 
     @property
     def betting_client(self) -> betfairlightweight.APIClient:
@@ -76,6 +81,21 @@ class BaseStream(threading.Thread):
         else:
             return self.flumine.clients.get_default()
 
+    def metrics_snapshot(self) -> dict:
+        snapshot = self.metrics.snapshot()
+        snapshot["stream_type"] = self.__class__.__name__
+        snapshot["output_queue_size"] = (
+            self._output_queue.qsize() if self._output_queue else None
+        )
+        snapshot["live_markets"] = self.live_market_count
+        return snapshot
+
+    @property
+    def live_market_count(self) -> int:
+        if self._listener.stream is not None:
+            return len(self._listener.stream._caches)
+        return 0
+
     @property
     def stream_running(self) -> bool:
         if self._stream:
@@ -1,10 +1,12 @@
 import logging
 from typing import Optional
 from tenacity import retry
-from betfairlightweight import StreamListener, filters, BetfairError
+from betfairlightweight import filters, BetfairError
 from betfairlightweight.streaming.stream import BaseStream as BFBaseStream
 
 from .basestream import BaseStream
+from .listener import FlumineStreamListener
+from .recorder import StreamRecorder
 from ..events.events import RawDataEvent
 from .. import config
 
@@ -18,7 +20,11 @@ helps reduce CPU.
 """
 
 
-class FlumineListener(StreamListener):
+class FlumineListener(FlumineStreamListener):
+    def __init__(self, *args, recorder: StreamRecorder = None, **kwargs):
+        super(FlumineListener, self).__init__(*args, **kwargs)
+        self.recorder = recorder
+
     def _add_stream(self, unique_id: int, operation: str) -> BFBaseStream:
         if operation == "marketSubscription":
             return FlumineMarketStream(self, unique_id)
@@ -70,6 +76,8 @@ class FlumineMarketStream(FlumineStream):
                 )
             self._updates_processed += 1
 
+        if self._listener.recorder:
+            self._listener.recorder.put(self._clk, publish_time, data)
         self.on_process([self.unique_id, self._clk, publish_time, data])
         return False
 
@@ -98,12 +106,29 @@ class FlumineOrderStream(FlumineStream):
 class DataStream(BaseStream):
     LISTENER = FlumineListener
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, recorder: StreamRecorder = None, **kwargs):
         BaseStream.__init__(self, *args, **kwargs)
-        self._listener = self.LISTENER(output_queue=self.flumine.handler_queue)
+        self.recorder = recorder
+        self._listener = self.LISTENER(
+            output_queue=self.flumine.handler_queue,
+            recorder=recorder,
+            **self.listener_kwargs,
+        )
+        self._listener.metrics = self.metrics
+
+    def start(self) -> None:
+        if self.recorder and not self.recorder.is_alive():
+            self.recorder.start()
+        BaseStream.start(self)
+
+    def stop(self) -> None:
+        BaseStream.stop(self)
+        if self.recorder:
+            self.recorder.stop()
 
     @retry(wait=RETRY_WAIT)
     def run(self) -> None:
+        self.metrics.connections += 1
         logger.info(
             "Starting DataStream %s",
             self.stream_id,
@@ -138,6 +163,7 @@ class DataStream(BaseStream):
 class OrderDataStream(DataStream):
     @retry(wait=RETRY_WAIT)
     def run(self) -> None:
+        self.metrics.connections += 1
         logger.info(
             "Starting OrderDataStream %s",
             self.stream_id,
@@ -174,3 +200,21 @@ class OrderDataStream(DataStream):
             )
             raise
         logger.info("Stopped OrderDataStream %s", self.stream_id)
+
+
+class RecorderStream(DataStream):
+    """
+    DataStream that records all raw market data to
+    RECORDER_DIRECTORY, subclass to change the
+    directory / compression.
+    """
+
+    RECORDER_DIRECTORY = "recorded"
+    RECORDER_COMPRESSION = "gzip"
+
+    def __init__(self, *args, recorder: StreamRecorder = None, **kwargs):
+        if recorder is None:
+            recorder = StreamRecorder(
+                self.RECORDER_DIRECTORY, compression=self.RECORDER_COMPRESSION
+            )
+        DataStream.__init__(self, *args, recorder=recorder, **kwargs)
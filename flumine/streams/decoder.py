@@ -0,0 +1,71 @@
+import json
+import logging
+from typing import Callable
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+"""
+Pluggable json decoders used by the stream listeners,
+orjson/simdjson are optional and fall back to the
+stdlib json module if not installed.
+"""
+
+
+def _json() -> Callable:
+    return json.loads
+
+
+def _orjson() -> Callable:
+    import orjson
+
+    return orjson.loads
+
+
+def _simdjson() -> Callable:
+    import simdjson
+
+    parser = simdjson.Parser()  # parser (and buffer) reused per listener
+
+    def loads(raw_data):
+        return parser.parse(raw_data, True)
+
+    return loads
+
+
+DECODERS = {
+    "json": _json,
+    "orjson": _orjson,
+    "simdjson": _simdjson,
+}
+DEFAULT_DECODERS = ("orjson", "json")
+
+
+def get_decoder(name: str = None) -> Callable:
+    """Returns json decoder function, defaults to
+    `config.stream_decoder` or the fastest available.
+    """
+    name = name or config.stream_decoder
+    if name is None:
+        for name in DEFAULT_DECODERS:
+            try:
+                return DECODERS[name]()
+            except ImportError:
+                continue
+    try:
+        return DECODERS[name]()
+    except ImportError:
+        logger.warning("Decoder %s unavailable, using json", name)
+        return _json()
+
+
+def available_decoders() -> list:
+    decoders = []
+    for name, decoder in DECODERS.items():
+        try:
+            decoder()
+        except ImportError:
+            continue
+        decoders.append(name)
+    return decoders
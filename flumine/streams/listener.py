@@ -0,0 +1,122 @@
+import logging
+import threading
+from collections import deque
+from typing import Optional, Union
+from betfairlightweight import StreamListener
+
+from .decoder import get_decoder
+from .parsing import ParserPool
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+CHANGE_MESSAGE = '"op":"mcm"'  # offloaded to the ParserPool
+CHANGE_MESSAGE_BYTES = CHANGE_MESSAGE.encode()
+
+
+class FlumineStreamListener(StreamListener):
+    """
+    bflw StreamListener with a pluggable json
+    decoder (see decoder.py) and optional off
+    process parsing (see parsing.py)
+    """
+
+    def __init__(
+        self,
+        *args,
+        decoder: str = None,
+        parse_processes: int = None,
+        **kwargs,
+    ):
+        super(FlumineStreamListener, self).__init__(*args, **kwargs)
+        self.decoder_name = decoder
+        self.decoder = get_decoder(decoder)
+        self.parse_processes = (
+            config.stream_parse_processes
+            if parse_processes is None
+            else parse_processes
+        )
+        self.parser = None  # <ParserPool> created on the first mcm
+        self.parse_error = None  # raw_data of a parsed message that failed
+        # _on_data is called from the stream and ParserPool collect threads
+        self._lock = threading.Lock()
+        self._generation = 0  # incremented on register_stream (reconnect)
+        self._parsed_generations = deque()  # generation of each message in the pool
+        self.metrics = None  # <StreamMetrics> set by stream
+
+    def on_data(self, raw_data: Union[str, bytes]) -> Optional[bool]:
+        if self.parse_error is not None:
+            # stop the socket (bflw raises ListenerError so the stream reconnects)
+            logger.error("Parsed stream message error: %s", self.parse_error)
+            self.parse_error = None
+            return False
+        change_message = (
+            CHANGE_MESSAGE_BYTES if isinstance(raw_data, bytes) else CHANGE_MESSAGE
+        )
+        if self.parse_processes and change_message in raw_data[:16]:
+            if self.parser is None:
+                self.parser = ParserPool(
+                    self.parse_processes, self._on_parsed, self.decoder_name
+                )
+            self._parsed_generations.append(self._generation)
+            self.parser.put(raw_data)
+            return
+        try:
+            data = self.decoder(raw_data)
+        except ValueError:
+            logger.error("value error: %s", raw_data)
+            return
+        with self._lock:
+            return self._on_data(raw_data, data)
+
+    def register_stream(self, unique_id: int, operation: str) -> None:
+        # messages still in the ParserPool are from the previous connection
+        with self._lock:
+            self._generation += 1
+            self.parse_error = None
+            super(FlumineStreamListener, self).register_stream(unique_id, operation)
+
+    def close(self) -> None:
+        if self.parser:
+            self.parser.close()
+            self.parser = None
+
+    def _on_parsed(self, raw_data: str, data: Optional[dict]) -> None:
+        # called (in order) by the ParserPool collect thread, a failure
+        # is returned to the socket on the next on_data
+        generation = self._parsed_generations.popleft()
+        with self._lock:
+            if generation != self._generation:
+                return  # previous connection, cache has been replaced
+            if self.parse_error is not None:
+                return  # socket is stopping, drop
+            if data is None:
+                logger.error("value error: %s", raw_data)
+            elif self._on_data(raw_data, data) is False:
+                self.parse_error = raw_data
+
+    def _on_data(self, raw_data: Union[str, bytes], data: dict) -> Optional[bool]:
+        if self.metrics:
+            self.metrics.on_message(raw_data, data.get("pt"))
+
+        self.status = data.get("status")
+        unique_id = data.get("id")
+
+        if self._error_handler(data, unique_id):
+            return False
+
+        operation = data["op"]
+        if operation == "connection":
+            self._on_connection(data, unique_id)
+        elif operation == "status":
+            self._on_status(data, unique_id)
+        elif operation in ["mcm", "ocm", "rcm", "ccm"]:
+            # historic data does not contain unique_id
+            if self.stream_unique_id not in [unique_id, 0]:
+                logger.warning(
+                    "Unwanted data received from uniqueId: %s, expecting: %s",
+                    unique_id,
+                    self.stream_unique_id,
+                )
+                return
+            self._on_change_message(data, unique_id)
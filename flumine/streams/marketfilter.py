@@ -0,0 +1,117 @@
+from typing import Callable, Optional
+
+"""
+Streaming market filter algebra, used to share a single
+(superset) subscription between strategies with
+overlapping filters, each strategy then applies its own
+narrower filter locally using a precompiled predicate
+on the MarketBook / MarketDefinition.
+"""
+
+# filter key: MarketDefinition attribute (marketIds uses MarketBook.market_id)
+FILTER_ATTRIBUTES = {
+    "eventTypeIds": "event_type_id",
+    "eventIds": "event_id",
+    "marketTypes": "market_type",
+    "venues": "venue",
+    "countryCodes": "country_code",
+    "raceTypes": "race_type",
+    "bettingTypes": "betting_type",
+    "bspMarket": "bsp_market",
+    "turnInPlayEnabled": "turn_in_play_enabled",
+}
+LIST_KEYS = {
+    "marketIds",
+    "eventTypeIds",
+    "eventIds",
+    "marketTypes",
+    "venues",
+    "countryCodes",
+    "raceTypes",
+    "bettingTypes",
+}
+
+
+def covers(market_filter: Optional[dict], other: Optional[dict]) -> bool:
+    """True if every market matching `other` also
+    matches `market_filter`
+    """
+    if not market_filter:
+        return True
+    if not other:
+        return False
+    for key, value in market_filter.items():
+        if key not in other:
+            return False
+        if key in LIST_KEYS:
+            if not set(other[key]).issubset(value):
+                return False
+        elif other[key] != value:
+            return False
+    return True
+
+
+def merge_market_filters(
+    market_filter: Optional[dict], other: Optional[dict]
+) -> Optional[dict]:
+    """Returns the minimal superset of two filters or
+    None if one can't be created without widening the
+    subscription beyond both filters (filters must only
+    differ on a single list key).
+    """
+    if covers(market_filter, other):
+        return market_filter
+    if covers(other, market_filter):
+        return other
+    if set(market_filter) != set(other):
+        return
+    different = [k for k in market_filter if market_filter[k] != other[k]]
+    if len(different) != 1 or different[0] not in LIST_KEYS:
+        return
+    key = different[0]
+    merged = list(market_filter[key])
+    merged += [v for v in other[key] if v not in market_filter[key]]
+    return {**market_filter, key: merged}
+
+
+def compile_market_filter(market_filter: Optional[dict]) -> Callable:
+    """Returns predicate(market_book) -> bool"""
+    checks = []
+    for key, value in (market_filter or {}).items():
+        if key == "marketIds":
+            checks.append((None, frozenset(value)))
+        elif key in FILTER_ATTRIBUTES:
+            values = frozenset(value) if key in LIST_KEYS else frozenset([value])
+            checks.append((FILTER_ATTRIBUTES[key], values))
+    checks = tuple(checks)
+
+    def predicate(market_book) -> bool:
+        market_definition = market_book.market_definition
+        for attribute, values in checks:
+            if attribute is None:
+                if market_book.market_id not in values:
+                    return False
+            elif market_definition is None:
+                return False
+            elif getattr(market_definition, attribute) not in values:
+                return False
+        return True
+
+    return predicate
+
+
+def compile_market_filters(market_filters: list) -> Callable:
+    """Returns predicate(market_book) -> bool matching
+    any of the market filters
+    """
+    if len(market_filters) == 1:
+        return compile_market_filter(market_filters[0])
+    predicates = tuple(compile_market_filter(f) for f in market_filters)
+
+    def predicate(market_book) -> bool:
+        for _predicate in predicates:
+            if _predicate(market_book):
+                return True
+        return False
+
+    return predicate
@@ -1,3 +1,4 @@
+import time
 import queue
 import logging
 from betfairlightweight import BetfairError
@@ -5,6 +6,7 @@ from tenacity import retry
 
 from .basestream import BaseStream
 from ..events.events import MarketBookEvent
+from .. import config
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +14,16 @@ RETRY_WAIT = BaseStream.RETRY_WAIT
 
 
 class MarketStream(BaseStream):
+    SNAP_HEARTBEAT = 60  # snap all open markets every n seconds (None to disable)
+
+    def __init__(self, *args, **kwargs):
+        super(MarketStream, self).__init__(*args, **kwargs)
+        self._updated_market_ids = set()  # markets updated since last snap
+        self._last_heartbeat = time.monotonic()
+
     @retry(wait=RETRY_WAIT)
     def run(self) -> None:
+        self.metrics.connections += 1
         logger.info(
             "Starting MarketStream %s",
             self.stream_id,
@@ -57,10 +67,37 @@ class MarketStream(BaseStream):
                     block=True, timeout=self.streaming_timeout
                 )
             except queue.Empty:
-                market_books = self._listener.snap(
-                    market_ids=self.flumine.markets.open_market_ids
-                )
+                market_books = self._snap_market_books()
+            else:
+                self._updated_market_ids.update(m.market_id for m in market_books)
+                if config.latency_budget is not None:
+                    self.flumine.load_shedder.record(market_books)
             if market_books:
-                self.flumine.handler_queue.put(MarketBookEvent(market_books))
+                self._output(market_books)
 
         logger.info("Stopped output_thread (MarketStream %s)", self.stream_id)
+
+    def _output(self, market_books: list) -> None:
+        self.metrics.market_books += len(market_books)
+        self.flumine.handler_queue.put(MarketBookEvent(market_books))
+
+    def _snap_market_books(self) -> list:
+        # only snap open markets updated since the last snap unless heartbeat is due
+        now = time.monotonic()
+        if self.SNAP_HEARTBEAT is not None and (
+            now - self._last_heartbeat >= self.SNAP_HEARTBEAT
+        ):
+            self._last_heartbeat = now
+            market_ids = self.flumine.markets.open_market_ids
+        else:
+            markets = self.flumine.markets.markets
+            market_ids = []
+            for market_id in self._updated_market_ids:
+                market = markets.get(market_id)
+                if market and market.status == "OPEN":
+                    market_ids.append(market_id)
+        self._updated_market_ids.clear()
+        if market_ids:
+            self.metrics.snaps += 1
+            return self._listener.snap(market_ids=market_ids)
+        return []
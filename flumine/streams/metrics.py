@@ -0,0 +1,64 @@
+import time
+
+"""
+Per stream throughput and latency counters, updated
+from the stream / output threads with plain integer
+increments (no locking) and read with `snapshot()`,
+rates are calculated since the previous snapshot.
+"""
+
+
+class StreamMetrics:
+    __slots__ = [
+        "messages",
+        "bytes",
+        "market_books",
+        "snaps",
+        "connections",
+        "lag",
+        "max_lag",
+        "_last_snapshot",
+    ]
+
+    def __init__(self):
+        self.messages = 0  # raw messages received
+        self.bytes = 0
+        self.market_books = 0  # books / updates output
+        self.snaps = 0
+        self.connections = 0  # calls to run (includes reconnects)
+        self.lag = None  # seconds between publish time and receipt
+        self.max_lag = None  # since previous snapshot
+        self._last_snapshot = (time.monotonic(), 0, 0, 0)
+
+    def on_message(self, raw_data, publish_time: int = None) -> None:
+        self.messages += 1
+        self.bytes += len(raw_data)
+        if publish_time:
+            lag = time.time() - publish_time / 1e3
+            self.lag = lag
+            if self.max_lag is None or lag > self.max_lag:
+                self.max_lag = lag
+
+    @property
+    def reconnects(self) -> int:
+        return max(self.connections - 1, 0)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        last_time, messages, _bytes, market_books = self._last_snapshot
+        elapsed = (now - last_time) or 1e-9
+        snapshot = {
+            "messages": self.messages,
+            "messages_per_sec": (self.messages - messages) / elapsed,
+            "bytes": self.bytes,
+            "bytes_per_sec": (self.bytes - _bytes) / elapsed,
+            "market_books": self.market_books,
+            "market_books_per_sec": (self.market_books - market_books) / elapsed,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "snaps": self.snaps,
+            "reconnects": self.reconnects,
+        }
+        self._last_snapshot = (now, self.messages, self.bytes, self.market_books)
+        self.max_lag = None
+        return snapshot
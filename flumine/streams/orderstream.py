@@ -1,4 +1,3 @@
-import time
 import queue
 import logging
 from betfairlightweight import BetfairError, filters
@@ -18,6 +17,7 @@ SNAP_DELTA = 5
 class OrderStream(BaseStream):
     @retry(wait=RETRY_WAIT)
     def run(self) -> None:
+        self.metrics.connections += 1
         logger.info(
             "Starting OrderStream %s",
             self.stream_id,
@@ -60,29 +60,26 @@ class OrderStream(BaseStream):
 
     def handle_output(self) -> None:
         """Handles output from stream, snaps
-        if live orders or time delta greater
-        than SNAP_DELTA.
+        only when there are live orders (the
+        live order count is maintained by the
+        Blotter) so idle periods are free.
         """
-        last_snap = 1
         while self.is_alive():
+            live_orders = self.flumine.markets.live_orders
             try:
                 order_books = self._output_queue.get(
-                    block=True, timeout=self.streaming_timeout
+                    block=True,
+                    timeout=self.streaming_timeout if live_orders else SNAP_DELTA,
                 )
             except queue.Empty:
-                active_open_markets = [
-                    m
-                    for m in self.flumine.markets
-                    if m.blotter.active and m.status == "OPEN"
-                ]
-                if active_open_markets or (time.time() - last_snap) > SNAP_DELTA:
+                if self.flumine.markets.live_orders:
                     order_books = []
+                    self.metrics.snaps += 1
                 else:
                     continue
-            last_snap = time.time()
-            if order_books or self.flumine.markets.live_orders:
-                for order_book in order_books:
-                    order_book.client = self.client
-                self.flumine.handler_queue.put(CurrentOrdersEvent(order_books))
+            self.metrics.market_books += len(order_books)
+            for order_book in order_books:
+                order_book.client = self.client
+            self.flumine.handler_queue.put(CurrentOrdersEvent(order_books))
 
         logger.info("Stopped output_thread (OrderStream %s)", self.stream_id)
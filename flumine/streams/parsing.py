@@ -0,0 +1,212 @@
+import queue
+import array
+import pickle
+import logging
+import threading
+import multiprocessing
+from typing import Callable
+
+from .decoder import get_decoder
+
+logger = logging.getLogger(__name__)
+
+"""
+Off process market stream parsing, with
+config.stream_parse_processes set the listener hands
+raw mcm messages to a ParserPool instead of decoding
+them in the stream thread so that json decoding does not
+contend for the GIL with the handler thread:
+
+    stream thread    raw message -> input queue
+    dispatch thread  batches messages -> worker process
+    worker process   decode, pack runner ladders
+    collect thread   results (in order) -> listener cache
+
+Runner ladders (atb/atl/trd etc.) are packed into
+PackedLadder (bytes of doubles) by the workers, these
+are cheap to unpickle and only create the [price, size]
+lists when iterated (by the listener cache) in the same
+spirit as patching.EX/SP. Ladder values are returned as
+floats.
+"""
+
+START_METHOD = "spawn"
+MAX_BATCH = 256  # messages per worker request
+LADDER_WIDTHS = {
+    "atb": 2,
+    "atl": 2,
+    "trd": 2,
+    "spb": 2,
+    "spl": 2,
+    "batb": 3,
+    "batl": 3,
+    "bdatb": 3,
+    "bdatl": 3,
+}
+
+
+class PackedLadder:
+    """Lazy read only list of ladder rows, rows are
+    created as new lists on access.
+    """
+
+    __slots__ = ["width", "values"]
+
+    def __init__(self, width: int, values: array.array):
+        self.width = width
+        self.values = values
+
+    @classmethod
+    def from_rows(cls, width: int, rows: list) -> "PackedLadder":
+        return cls(width, array.array("d", [v for row in rows for v in row]))
+
+    def __iter__(self):
+        values, width = self.values, self.width
+        for i in range(0, len(values), width):
+            yield values[i : i + width].tolist()
+
+    def __len__(self) -> int:
+        return len(self.values) // self.width
+
+    def __getitem__(self, index: int) -> list:
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("ladder index out of range")
+        start = index * self.width
+        return self.values[start : start + self.width].tolist()
+
+    def __eq__(self, other) -> bool:
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __reduce__(self):
+        return _unpack_ladder, (self.width, self.values.tobytes())
+
+    def __repr__(self) -> str:
+        return "<PackedLadder %s>" % list(self)
+
+
+def _unpack_ladder(width: int, data: bytes) -> PackedLadder:
+    values = array.array("d")
+    values.frombytes(data)
+    return PackedLadder(width, values)
+
+
+def pack_message(data: dict) -> dict:
+    """Replaces runner ladders with PackedLadders"""
+    for market_change in data.get("mc") or ():
+        for runner_change in market_change.get("rc") or ():
+            for key, rows in runner_change.items():
+                width = LADDER_WIDTHS.get(key)
+                if width and rows:
+                    runner_change[key] = PackedLadder.from_rows(width, rows)
+    return data
+
+
+def _worker(conn, decoder: str) -> None:
+    loads = get_decoder(decoder)
+    while True:
+        try:
+            batch = pickle.loads(conn.recv_bytes())
+        except EOFError:
+            break
+        results = []
+        for raw_data in batch:
+            try:
+                results.append(pack_message(loads(raw_data)))
+            except ValueError:
+                results.append(None)
+        conn.send_bytes(pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ParserPool:
+    def __init__(self, processes: int, callback: Callable, decoder: str = None):
+        """
+        :param processes: Number of worker processes
+        :param callback: Called in order with (raw_data, data) from the
+        collect thread, data is None if the message could not be decoded
+        :param decoder: Decoder used by the workers (see decoder.py)
+        """
+        self.callback = callback
+        self._input = queue.SimpleQueue()
+        self._pending = queue.SimpleQueue()  # (worker index, batch) in send order
+        self._connections = []
+        self._processes = []
+        ctx = multiprocessing.get_context(START_METHOD)
+        for i in range(processes):
+            conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(child_conn, decoder),
+                name="FlumineParser-%s" % i,
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._connections.append(conn)
+            self._processes.append(process)
+        self._dispatch_thread = threading.Thread(
+            name="FlumineParserDispatch", target=self._dispatch, daemon=True
+        )
+        self._collect_thread = threading.Thread(
+            name="FlumineParserCollect", target=self._collect, daemon=True
+        )
+        self._dispatch_thread.start()
+        self._collect_thread.start()
+
+    def put(self, raw_data: str) -> None:
+        self._input.put(raw_data)
+
+    def close(self) -> None:
+        # queued messages are parsed before the workers stop
+        self._input.put(None)
+
+    def _dispatch(self) -> None:
+        connections, index = self._connections, 0
+        running = True
+        while running:
+            batch = [self._input.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._input.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = batch[: batch.index(None)]
+            if batch:
+                try:
+                    connections[index].send_bytes(
+                        pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL)
+                    )
+                except OSError:
+                    logger.critical("ParserPool worker %s send error", index)
+                    break
+                self._pending.put((index, batch))
+                index = (index + 1) % len(connections)
+        self._pending.put(None)
+
+    def _collect(self) -> None:
+        while True:
+            pending = self._pending.get()
+            if pending is None:
+                break
+            index, batch = pending
+            try:
+                results = pickle.loads(self._connections[index].recv_bytes())
+            except (EOFError, OSError):
+                logger.critical("ParserPool worker %s recv error", index)
+                break
+            for raw_data, data in zip(batch, results):
+                try:
+                    self.callback(raw_data, data)
+                except Exception:
+                    logger.error("ParserPool callback error", exc_info=True)
+        for conn in self._connections:
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=1)
@@ -0,0 +1,185 @@
+import os
+import gzip
+import json
+import queue
+import logging
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+from ..exceptions import FlumineException
+
+logger = logging.getLogger(__name__)
+
+"""
+Background recorder for raw market stream data, each
+market is written to its own compressed file in the
+same format as the betfair historic data / recorded
+files in tests/resources:
+
+    {"op":"mcm","clk":"123","pt":1497351220318,"mc":[{"id":"1.123",..}]}
+
+Messages are handed to the writer thread through a
+bounded queue with `put_nowait` so the stream thread
+and handler_queue are never blocked, messages are
+dropped (and counted) if the writer falls behind.
+"""
+
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst", None: ""}
+
+
+def _encode(message: dict) -> bytes:
+    if orjson:
+        return orjson.dumps(message)
+    return json.dumps(message, separators=(",", ":")).encode()
+
+
+class StreamRecorder(threading.Thread):
+    def __init__(
+        self,
+        directory: str,
+        compression: str = "gzip",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 100000,
+    ):
+        threading.Thread.__init__(self, daemon=True, name=self.__class__.__name__)
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise FlumineException("Unknown compression '%s'" % compression)
+        if compression == "zstd" and zstandard is None:
+            raise FlumineException("zstandard is required for zstd compression")
+        self.directory = directory
+        self.compression = compression
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.messages_dropped = 0
+        self.messages_written = 0
+        self.files_rotated = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._files = {}  # {marketId: file}
+        self._batch = {}  # {marketId: [bytes, ]}
+        self._batch_count = 0
+        self._running = False
+
+    def put(self, clk: str, publish_time: int, data: list) -> bool:
+        """Called from the stream thread, never blocks"""
+        try:
+            self._queue.put_nowait((clk, publish_time, data))
+        except queue.Full:
+            self.messages_dropped += 1
+            return False
+        return True
+
+    def run(self) -> None:
+        logger.info(
+            "Starting StreamRecorder",
+            extra={"directory": self.directory, "compression": self.compression},
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        self._running = True
+        while self._running:
+            try:
+                item = self._queue.get(block=True, timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush()
+                continue
+            if item is None:
+                break
+            self._process(*item)
+            if self._batch_count >= self.batch_size:
+                self.flush()
+        # drain and close
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self._process(*item)
+        self.flush()
+        for market_id in list(self._files):
+            self._close_file(market_id)
+        logger.info("Stopped StreamRecorder")
+
+    def stop(self, timeout: float = 10) -> None:
+        self._running = False
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self.is_alive():
+            self.join(timeout)
+
+    def flush(self) -> None:
+        for market_id, lines in self._batch.items():
+            f = self._files.get(market_id)
+            if f is None:
+                f = self._files[market_id] = self._open_file(market_id)
+            f.write(b"".join(lines))
+            self.messages_written += len(lines)
+        self._batch.clear()
+        self._batch_count = 0
+        for market_id in [m for m, f in self._files.items() if f.closing]:
+            self._close_file(market_id)
+
+    def _process(self, clk: str, publish_time: int, data: list) -> None:
+        for market_change in data:
+            market_id = market_change["id"]
+            line = _encode(
+                {"op": "mcm", "clk": clk, "pt": publish_time, "mc": [market_change]}
+            )
+            self._batch.setdefault(market_id, []).append(line + b"\n")
+            self._batch_count += 1
+            market_definition = market_change.get("marketDefinition")
+            if market_definition and market_definition.get("status") == "CLOSED":
+                # rotate file once batch has been written
+                f = self._files.get(market_id)
+                if f is None:
+                    f = self._files[market_id] = self._open_file(market_id)
+                f.closing = True
+
+    def _open_file(self, market_id: str) -> "RecorderFile":
+        path = os.path.join(
+            self.directory, market_id + COMPRESSION_EXTENSIONS[self.compression]
+        )
+        if self.compression == "gzip":
+            f = gzip.open(path, "ab")
+        elif self.compression == "zstd":
+            f = zstandard.ZstdCompressor().stream_writer(open(path, "ab"))
+        else:
+            f = open(path, "ab")
+        return RecorderFile(path, f)
+
+    def _close_file(self, market_id: str) -> None:
+        f = self._files.pop(market_id)
+        f.close()
+        if f.closing:
+            self.files_rotated += 1
+            logger.info("StreamRecorder file rotated", extra={"path": f.path})
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+
+class RecorderFile:
+    __slots__ = ["path", "file", "closing"]
+
+    def __init__(self, path: str, file):
+        self.path = path
+        self.file = file
+        self.closing = False
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+
+    def close(self) -> None:
+        self.file.close()
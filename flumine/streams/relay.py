@@ -0,0 +1,347 @@
+import time
+import struct
+import pickle
+import logging
+from typing import Optional
+from multiprocessing import shared_memory, resource_tracker
+from tenacity import retry
+
+from .basestream import BaseStream
+from .marketstream import MarketStream, RETRY_WAIT
+from .marketfilter import compile_market_filter
+from ..events.events import MarketBookEvent
+from ..patching import MarketBook, MarketDefinition
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+"""
+Shared memory market data relay for strategy processes
+running on the same host, one process connects to the
+exchange with a RelayPublisherStream and every MarketBook
+it outputs is written to a shared memory ring buffer as
+a compact snapshot (the serialised book, the update
+that produced it and the streaming_snap flag). Other
+processes use RelayStream as their strategy.stream_class
+and rebuild the MarketBooks from the ring, one connection
+and one decode shared by many consumers:
+
+    # publisher
+    strategy = Strategy(stream_class=RelayPublisherStream, ..)
+    # consumers
+    strategy = Strategy(stream_class=RelayStream, market_filter=..)
+
+Snapshots are self contained so consumers can join at
+any time, a consumer that falls a full ring behind the
+publisher skips to the latest write (counted as an
+overrun). The ring is single writer / many readers and
+readers poll, payloads are pickled so only co-located
+trusted processes should share a relay. Subclass to
+change RELAY_NAME / RELAY_SIZE.
+"""
+
+RELAY_NAME = "flumine_relay"
+RELAY_SIZE = 64 * 1024 * 1024
+
+_created = set()  # relays created by this process
+
+
+class RingBuffer:
+    """Single writer, multi reader ring buffer of length
+    prefixed messages in shared memory. The header holds
+    the total bytes written and the reserved position (the
+    end of the write in progress, published before any
+    bytes are written so readers can detect a torn copy,
+    seqlock style), messages never wrap (a WRAP marker
+    sends readers back to the start).
+    """
+
+    HEADER = struct.Struct("<QQ")  # write position, reserved position
+    LENGTH = struct.Struct("<I")
+    WRAP = 0xFFFFFFFF
+
+    def __init__(self, name: str, size: int = RELAY_SIZE, create: bool = False):
+        if create:
+            try:
+                self._shm = shared_memory.SharedMemory(
+                    name=name, create=True, size=self.HEADER.size + size
+                )
+            except FileExistsError:
+                logger.warning("Removing stale relay %s", name)
+                shared_memory.SharedMemory(name=name).unlink()
+                self._shm = shared_memory.SharedMemory(
+                    name=name, create=True, size=self.HEADER.size + size
+                )
+            self.HEADER.pack_into(self._shm.buf, 0, 0, 0)
+            _created.add(name)
+        else:
+            self._shm = _attach(name)
+        self.name = name
+        self.create = create
+        self.capacity = self._shm.size - self.HEADER.size
+        self.position = self.write_position  # writer position
+
+    @property
+    def write_position(self) -> int:
+        return self.HEADER.unpack_from(self._shm.buf, 0)[0]
+
+    @property
+    def reserved_position(self) -> int:
+        return self.HEADER.unpack_from(self._shm.buf, 0)[1]
+
+    def write(self, payload: bytes) -> None:
+        buf, capacity, header_size = self._shm.buf, self.capacity, self.HEADER.size
+        size = self.LENGTH.size + len(payload)
+        if size > capacity:
+            raise ValueError(
+                "Message (%s bytes) larger than relay (%s bytes)" % (size, capacity)
+            )
+        position = self.position
+        offset = position % capacity
+        if offset + size > capacity:
+            wrap_offset = offset
+            position += capacity - offset
+            offset = 0
+        else:
+            wrap_offset = None
+        # reserve, readers overlapping the reserved bytes discard their copy
+        self.HEADER.pack_into(buf, 0, self.position, position + size)
+        if wrap_offset is not None and capacity - wrap_offset >= self.LENGTH.size:
+            self.LENGTH.pack_into(buf, header_size + wrap_offset, self.WRAP)
+        start = header_size + offset
+        self.LENGTH.pack_into(buf, start, len(payload))
+        start += self.LENGTH.size
+        buf[start : start + len(payload)] = payload
+        self.position = position + size
+        # publish, readers only read up to the header position
+        self.HEADER.pack_into(buf, 0, self.position, self.position)
+
+    def reader(self) -> "RingReader":
+        return RingReader(self)
+
+    def close(self) -> None:
+        self._shm.close()
+        if self.create:
+            self._shm.unlink()
+            _created.discard(self.name)
+
+
+class RingReader:
+    def __init__(self, ring: RingBuffer):
+        self.ring = ring
+        self.position = ring.write_position  # join at the latest write
+        self.overruns = 0
+
+    def read(self) -> Optional[bytes]:
+        """Returns the next message or None if there are
+        no new messages.
+        """
+        ring = self.ring
+        buf, capacity, header_size = ring._shm.buf, ring.capacity, ring.HEADER.size
+        length_size = ring.LENGTH.size
+        while True:
+            write_position = ring.write_position
+            position = self.position
+            if position == write_position:
+                return
+            if write_position - position > capacity:
+                self._overrun(write_position)
+                continue
+            offset = position % capacity
+            if capacity - offset < length_size:
+                self.position += capacity - offset
+                continue
+            (length,) = ring.LENGTH.unpack_from(buf, header_size + offset)
+            if length == ring.WRAP:
+                self.position += capacity - offset
+                continue
+            start = header_size + offset + length_size
+            payload = bytes(buf[start : start + length])
+            # the writer may have reserved these bytes during the copy
+            if ring.reserved_position - position > capacity:
+                self._overrun(ring.write_position)
+                continue
+            self.position = position + length_size + length
+            return payload
+
+    def _overrun(self, write_position: int) -> None:
+        self.overruns += 1
+        self.position = write_position
+        logger.warning(
+            "Relay %s reader overrun, skipping to latest write",
+            self.ring.name,
+            extra={"overruns": self.overruns},
+        )
+
+
+class RelayPublisherStream(MarketStream):
+    """MarketStream that also publishes its output to
+    the relay.
+    """
+
+    RELAY_NAME = RELAY_NAME
+    RELAY_SIZE = RELAY_SIZE
+
+    def __init__(self, *args, **kwargs):
+        super(RelayPublisherStream, self).__init__(*args, **kwargs)
+        self.relay = None
+
+    def start(self) -> None:
+        if self.relay is None:
+            self.relay = RingBuffer(self.RELAY_NAME, self.RELAY_SIZE, create=True)
+            logger.info(
+                "Publishing MarketStream %s to relay %s",
+                self.stream_id,
+                self.RELAY_NAME,
+            )
+        super(RelayPublisherStream, self).start()
+
+    def stop(self) -> None:
+        super(RelayPublisherStream, self).stop()
+        relay, self.relay = self.relay, None
+        if relay:
+            relay.close()
+
+    def _output(self, market_books: list) -> None:
+        relay = self.relay
+        if relay:
+            try:
+                relay.write(encode(market_books))
+            except ValueError as e:
+                logger.error("Relay %s publish error: %s", self.RELAY_NAME, e)
+        super(RelayPublisherStream, self)._output(market_books)
+
+
+class RelayStream(BaseStream):
+    """Market stream fed by a RelayPublisherStream in
+    another process, the strategy market_filter is
+    applied locally (the publisher decides the
+    subscription and market_data_filter).
+    """
+
+    RELAY_NAME = RELAY_NAME
+    POLL_INTERVAL = 0.001
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("output_queue", False)
+        super(RelayStream, self).__init__(*args, **kwargs)
+        self._predicate = (
+            compile_market_filter(self.market_filter) if self.market_filter else None
+        )
+        self._reader = None
+        self._stopped = False
+        self._overruns = 0
+        self._market_definitions = {}  # {marketId: MarketDefinition}
+
+    @retry(wait=RETRY_WAIT)
+    def run(self) -> None:
+        self.metrics.connections += 1
+        logger.info(
+            "Starting RelayStream %s",
+            self.stream_id,
+            extra={
+                "stream_id": self.stream_id,
+                "relay_name": self.RELAY_NAME,
+                "market_filter": self.market_filter,
+            },
+        )
+        try:
+            ring = RingBuffer(self.RELAY_NAME)
+        except FileNotFoundError:
+            logger.warning("RelayStream %s relay not found", self.stream_id)
+            raise
+        self._reader = reader = ring.reader()
+        try:
+            while not self._stopped:
+                payload = reader.read()
+                if payload is None:
+                    time.sleep(self.POLL_INTERVAL)
+                else:
+                    self._process(payload, reader.overruns)
+        finally:
+            self._reader = None
+            ring.close()
+        logger.info("Stopped RelayStream %s", self.stream_id)
+
+    def handle_output(self) -> None:
+        return  # books are output by the reader
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    def _process(self, payload: bytes, overruns: int) -> None:
+        if overruns != self._overruns:
+            # definition updates may have been missed
+            self._overruns = overruns
+            self._market_definitions.clear()
+        market_books = []
+        predicate = self._predicate
+        publish_time = None
+        for streaming_update, streaming_snap, data in pickle.loads(payload):
+            market_book = self._create_market_book(
+                streaming_update, streaming_snap, data
+            )
+            publish_time = market_book.publish_time_epoch
+            if predicate is None or predicate(market_book):
+                market_books.append(market_book)
+        self.metrics.on_message(payload, publish_time)
+        if market_books:
+            self.metrics.market_books += len(market_books)
+            if config.latency_budget is not None:
+                self.flumine.load_shedder.record(market_books)
+            self.flumine.handler_queue.put(MarketBookEvent(market_books))
+
+    def _create_market_book(
+        self, streaming_update, streaming_snap: bool, data: dict
+    ) -> MarketBook:
+        # reuse the MarketDefinition unless it has been updated
+        market_id = data["marketId"]
+        market_definition = self._market_definitions.get(market_id)
+        if (
+            market_definition is None
+            or not isinstance(streaming_update, dict)
+            or "marketDefinition" in streaming_update
+        ):
+            definition = data.get("marketDefinition")
+            market_definition = MarketDefinition(**definition) if definition else None
+            self._market_definitions[market_id] = market_definition
+        if data.get("status") == "CLOSED":
+            self._market_definitions.pop(market_id, None)
+        return MarketBook(
+            streaming_unique_id=self.stream_id,
+            streaming_update=streaming_update,
+            streaming_snap=streaming_snap,
+            market_definition=market_definition,
+            **data,
+        )
+
+    def metrics_snapshot(self) -> dict:
+        snapshot = super(RelayStream, self).metrics_snapshot()
+        snapshot["overruns"] = self._overruns
+        return snapshot
+
+    @property
+    def live_market_count(self) -> int:
+        return len(self._market_definitions)
+
+    @property
+    def stream_running(self) -> bool:
+        return self._reader is not None
+
+
+def encode(market_books: list) -> bytes:
+    return pickle.dumps(
+        [(m.streaming_update, m.streaming_snap, m._data) for m in market_books],
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # readers must not unlink the publisher's memory on exit
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _created:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
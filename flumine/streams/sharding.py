@@ -0,0 +1,51 @@
+import zlib
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+"""
+Splits a streaming market filter across multiple
+stream connections, shards are created on the first
+key with multiple values (marketIds are split on a
+stable hash, other values round robin). Streams are
+created before any markets are known and can't be
+resubscribed so shards are not weighted by market
+count, use Streams.live_market_counts to monitor.
+"""
+
+SHARD_KEYS = ("marketIds", "eventTypeIds", "countryCodes")
+
+
+def shard_key(market_filter: dict, shard_by: str = None) -> Optional[str]:
+    if shard_by:
+        return shard_by if len(market_filter.get(shard_by) or []) > 1 else None
+    for key in SHARD_KEYS:
+        if len(market_filter.get(key) or []) > 1:
+            return key
+
+
+def market_id_shard(market_id: str, shards: int) -> int:
+    # stable across processes unlike hash()
+    return zlib.crc32(market_id.encode()) % shards
+
+
+def shard_market_filter(market_filter: dict, shards: int, shard_by: str = None) -> list:
+    """Returns list of market filters"""
+    if market_filter is None or shards is None or shards < 2:
+        return [market_filter]
+    key = shard_key(market_filter, shard_by)
+    if key is None:
+        logger.warning(
+            "Unable to shard market filter",
+            extra={"market_filter": market_filter, "shards": shards},
+        )
+        return [market_filter]
+    values = market_filter[key]
+    if key == "marketIds":
+        buckets = [[] for _ in range(shards)]
+        for market_id in values:
+            buckets[market_id_shard(market_id, shards)].append(market_id)
+    else:
+        buckets = [values[i::shards] for i in range(shards)]
+    return [{**market_filter, key: bucket} for bucket in buckets if bucket]
@@ -0,0 +1,226 @@
+import logging
+import threading
+from typing import Optional
+from betfairlightweight import BetfairError
+from tenacity import retry
+
+from .listener import FlumineStreamListener
+from .marketstream import MarketStream, RETRY_WAIT
+
+logger = logging.getLogger(__name__)
+
+"""
+Hot-standby market stream, a second connection runs
+the same subscription and both connections feed the
+primary listener cache through a publish time gate,
+each market change is only applied if it is newer than
+the last change applied for that market so whichever
+connection delivers first wins and a disconnect on
+either connection is invisible to strategies.
+
+Changes for a market with the same publish time are
+matched by their position within that publish time on
+each connection, this relies on both connections
+receiving the same deltas so conflate_ms is not
+supported (conflation batches each connection
+differently).
+
+A change is only applied if the connection's previous
+change for the market is already in the cache, a
+connection that has fallen behind the cache (or missed
+changes) waits for the other connection to catch up.
+
+The primary cache is replaced when the primary
+(re)subscribes so the gate is reset on register_stream
+and on a primary SUB_IMAGE, primary images are always
+applied and standby changes for markets missing from
+the primary cache are dropped (the primary images every
+market it is subscribed to).
+"""
+
+STANDBY_ID_OFFSET = 500  # standby unique_id = stream_id + offset
+PRIMARY, STANDBY = "primary", "standby"
+
+
+class PublishTimeGate:
+    """Per market publish time dedupe shared by
+    the primary and standby listeners.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.duplicates = 0
+        self.dropped = 0  # no cache entry / connection ahead of the cache
+        self.standby_updates = 0
+        # {marketId: [publish_time, changes applied, {connection: changes received}]}
+        self._publish_times = {}
+        # {connection: {marketId: publish_time of the last change received}}
+        self._received = {}
+
+    def reset(self) -> None:
+        # primary cache replaced, lock must be held by caller
+        self._publish_times.clear()
+        self._received.pop(PRIMARY, None)
+
+    def filter(
+        self,
+        market_changes: list,
+        publish_time: int,
+        connection: str,
+        caches: dict = None,
+    ) -> list:
+        # lock must be held by caller (filter and cache update are atomic)
+        publish_times = self._publish_times
+        received = self._received.setdefault(connection, {})
+        changes = []
+        for market_change in market_changes:
+            market_id = market_change["id"]
+            previous = received.get(market_id)
+            received[market_id] = publish_time
+            state = publish_times.get(market_id)
+            img = market_change.get("img")
+            if caches is not None and market_id not in caches:
+                self.dropped += 1
+            elif state is None or (img and connection == PRIMARY):
+                publish_times[market_id] = [publish_time, 1, {connection: 1}]
+                changes.append(market_change)
+            elif publish_time > state[0]:
+                if img or previous is None or previous <= state[0]:
+                    publish_times[market_id] = [publish_time, 1, {connection: 1}]
+                    changes.append(market_change)
+                else:
+                    # previous change missing from the cache
+                    self.dropped += 1
+            elif publish_time == state[0]:
+                # nth change at this publish time on this connection
+                count = state[2][connection] = state[2].get(connection, 0) + 1
+                if count > state[1]:
+                    state[1] = count
+                    changes.append(market_change)
+                else:
+                    self.duplicates += 1
+            else:
+                self.duplicates += 1
+        return changes
+
+
+class HotStandbyListener(FlumineStreamListener):
+    """Primary listener, owns the cache"""
+
+    def __init__(self, *args, **kwargs):
+        super(HotStandbyListener, self).__init__(*args, **kwargs)
+        self.gate = PublishTimeGate()
+
+    def register_stream(self, unique_id: int, operation: str) -> None:
+        super(HotStandbyListener, self).register_stream(unique_id, operation)
+        with self.gate.lock:
+            self.gate.reset()
+
+    def _on_change_message(self, data: dict, unique_id: int) -> None:
+        if "mc" not in data:
+            return super(HotStandbyListener, self)._on_change_message(data, unique_id)
+        with self.gate.lock:
+            if data.get("ct") == "SUB_IMAGE":
+                self.gate.reset()
+            data["mc"] = self.gate.filter(data["mc"], data["pt"], PRIMARY)
+            super(HotStandbyListener, self)._on_change_message(data, unique_id)
+
+    def on_standby_change(self, data: dict) -> None:
+        # called from the standby connection thread
+        stream = self.stream
+        with self.gate.lock:
+            # changes need a primary cache entry (e.g. after a primary reconnect)
+            caches = stream._caches if stream is not None else {}
+            market_changes = self.gate.filter(data["mc"], data["pt"], STANDBY, caches)
+            if market_changes:
+                self.gate.standby_updates += len(market_changes)
+                # clk is connection specific so is not passed on
+                stream.on_update({"op": "mcm", "pt": data["pt"], "mc": market_changes})
+
+
+class StandbyListener(FlumineStreamListener):
+    """Standby listener, holds no cache and forwards
+    market changes to the primary listener.
+    """
+
+    def __init__(self, primary: HotStandbyListener, *args, **kwargs):
+        super(StandbyListener, self).__init__(*args, **kwargs)
+        self.primary = primary
+
+    def _on_change_message(self, data: dict, unique_id: int) -> None:
+        self.stream._update_clk(data)  # allows the standby to resume
+        if "mc" in data:
+            self.primary.on_standby_change(data)
+
+
+class HotStandbyMarketStream(MarketStream):
+    LISTENER = HotStandbyListener
+
+    def __init__(self, *args, **kwargs):
+        super(HotStandbyMarketStream, self).__init__(*args, **kwargs)
+        if self.conflate_ms:
+            logger.warning(
+                "conflate_ms is not supported by HotStandbyMarketStream %s, ignoring",
+                self.stream_id,
+                extra={"conflate_ms": self.conflate_ms},
+            )
+            self.conflate_ms = None
+        self._standby_listener = StandbyListener(
+            self._listener, max_latency=None, **self.listener_kwargs
+        )
+        self._standby_stream = None
+        self._standby_thread = threading.Thread(
+            name="{0}_standby_thread".format(self.name),
+            target=self._run_standby,
+            daemon=True,
+        )
+
+    def run(self) -> None:
+        if not self._standby_thread.is_alive():
+            logger.info("Starting standby connection (MarketStream %s)", self.stream_id)
+            self._standby_thread.start()
+        MarketStream.run(self)
+
+    @retry(wait=RETRY_WAIT)
+    def _run_standby(self) -> None:
+        self._standby_stream = self.betting_client.streaming.create_stream(
+            unique_id=self.standby_id, listener=self._standby_listener
+        )
+        try:
+            self._standby_stream.subscribe_to_markets(
+                market_filter=self.market_filter,
+                market_data_filter=self.market_data_filter,
+                conflate_ms=self.conflate_ms,
+                initial_clk=self._standby_listener.initial_clk,
+                clk=self._standby_listener.clk,
+            )
+            self._standby_stream.start()
+        except BetfairError:
+            logger.error(
+                "MarketStream %s standby run error", self.stream_id, exc_info=True
+            )
+            raise
+        except Exception:
+            logger.critical(
+                "MarketStream %s standby run error", self.stream_id, exc_info=True
+            )
+            raise
+        logger.info("Stopped standby connection (MarketStream %s)", self.stream_id)
+
+    def stop(self) -> None:
+        if self._standby_stream:
+            self._standby_stream.stop()
+        self._standby_listener.close()
+        super(HotStandbyMarketStream, self).stop()
+
+    @property
+    def standby_id(self) -> Optional[int]:
+        if self.stream_id is not None:
+            return self.stream_id + STANDBY_ID_OFFSET
+
+    def metrics_snapshot(self) -> dict:
+        snapshot = super(HotStandbyMarketStream, self).metrics_snapshot()
+        snapshot["standby_updates"] = self._listener.gate.standby_updates
+        snapshot["standby_duplicates"] = self._listener.gate.duplicates
+        snapshot["standby_dropped"] = self._listener.gate.dropped
+        return snapshot
@@ -9,6 +9,9 @@ from .marketstream import MarketStream
 from .datastream import DataStream
 from .orderstream import OrderStream
 from .simulatedorderstream import SimulatedOrderStream
+from .sharding import shard_market_filter
+from .marketfilter import covers, merge_market_filters, compile_market_filters
+from .. import config
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +21,7 @@ class Streams:
         self.flumine = flumine
         self._streams = []
         self._stream_id = 0
+        self._subscriptions = {}  # {stream: [(strategy, market_filter), ]}
 
     def __call__(self, strategy: BaseStrategy) -> None:
         logger.info("this function is not called at all")
@@ -54,6 +58,8 @@ class Streams:
             market_filters = [strategy.market_filter]
         else:
             market_filters = strategy.market_filter
+        if strategy.stream_shards:
+            market_filters = self._shard_market_filters(strategy, market_filters)
         for market_filter in market_filters:
             for stream in self:  # check if market stream already exists
                 if (
@@ -70,8 +76,15 @@ class Streams:
                         strategy,
                     )
                     strategy.streams.append(stream)
+                    self._subscribe(stream, strategy, market_filter)
                     break
-            else:  # nope? lets create a new one
+            else:
+                # superset stream available?
+                stream = self._merge_stream(strategy, market_filter)
+                if stream:
+                    strategy.streams.append(stream)
+                    continue
+                # nope? lets create a new one
                 stream_id = self._increment_stream_id()
                 logger.info(
                     "Creating new %s (%s) for strategy %s",
@@ -89,6 +102,86 @@ class Streams:
                 )
                 self._streams.append(stream)
                 strategy.streams.append(stream)
+                self._subscribe(stream, strategy, market_filter)
+
+    def _merge_stream(
+        self, strategy: BaseStrategy, market_filter: Optional[dict]
+    ) -> Optional[MarketStream]:
+        """Reuse a MarketStream with a filter covering
+        market_filter or widen the filter of a stream
+        that has not yet started, the strategy then
+        filters the MarketBooks locally.
+        """
+        if not config.merge_market_filters or strategy.stream_shards:
+            return
+        fields = (strategy.market_data_filter or {}).get("fields") or []
+        if "EX_MARKET_DEF" not in fields:
+            return  # predicate requires the marketDefinition
+        for stream in self:
+            if (
+                type(stream) is not strategy.stream_class
+                or not isinstance(stream, MarketStream)
+                or stream.market_data_filter != strategy.market_data_filter
+                or stream.streaming_timeout != strategy.streaming_timeout
+                or stream.conflate_ms != strategy.conflate_ms
+            ):
+                continue
+            if covers(stream.market_filter, market_filter):
+                merged = stream.market_filter
+            elif stream.is_alive():
+                continue  # subscription can't be changed
+            else:
+                merged = merge_market_filters(stream.market_filter, market_filter)
+                if merged is None:
+                    continue
+            logger.info(
+                "Using %s (%s) with merged market filter for strategy %s",
+                strategy.stream_class,
+                stream.stream_id,
+                strategy,
+                extra={"market_filter": merged},
+            )
+            stream.market_filter = merged
+            self._subscribe(stream, strategy, market_filter)
+            return stream
+
+    def _subscribe(
+        self, stream: MarketStream, strategy: BaseStrategy, market_filter: dict
+    ) -> None:
+        # (re)compile local filters for all strategies using the stream,
+        # keyed by stream as stream_id changes on (re)subscribe
+        subscriptions = self._subscriptions.setdefault(stream, [])
+        subscriptions.append((strategy, market_filter))
+        for _strategy, market_filters in self.strategy_market_filters(stream).items():
+            if any(covers(f, stream.market_filter) for f in market_filters):
+                _strategy.local_market_filters.pop(stream, None)
+            else:
+                _strategy.local_market_filters[stream] = compile_market_filters(
+                    market_filters
+                )
+
+    def strategy_market_filters(self, stream: MarketStream) -> dict:
+        """Market filters subscribed to the stream by each
+        strategy, a strategy market_filter list may merge
+        more than one filter into the same stream.
+        """
+        market_filters = {}
+        for strategy, market_filter in self._subscriptions.get(stream, []):
+            market_filters.setdefault(strategy, []).append(market_filter)
+        return market_filters
+
+    def _shard_market_filters(
+        self, strategy: BaseStrategy, market_filters: list
+    ) -> list:
+        sharded = []
+        for market_filter in market_filters:
+            sharded += shard_market_filter(market_filter, strategy.stream_shards)
+        logger.info(
+            "Sharded market filter for strategy %s",
+            strategy,
+            extra={"market_filters": sharded, "shards": strategy.stream_shards},
+        )
+        return sharded
 
     def add_order_stream(
         self,
@@ -139,6 +232,17 @@ class Streams:
         for stream in self:
             stream.stop()
 
+    @property
+    def live_market_counts(self) -> dict:
+        """Live markets held in each stream listener cache"""
+        return {stream.stream_id: stream.live_market_count for stream in self}
+
+    def metrics(self) -> dict:
+        """Snapshot of stream metrics, rates are
+        calculated since the previous call.
+        """
+        return {stream.stream_id: stream.metrics_snapshot() for stream in self}
+
     def _increment_stream_id(self) -> int:
         self._stream_id += int(1e3)
         return self._stream_id
@@ -0,0 +1,395 @@
+import json
+import time
+import random
+import logging
+import datetime
+import threading
+from collections import Counter
+from typing import Optional, Union
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+"""
+Local stand-in for the betfair identity, betting and
+account apis (json-rpc), used to test and benchmark
+BetfairClient, the workers and order execution without
+the exchange:
+
+    server = MockBettingServer(latency=0.01, error_rate=0.05)
+    server.start()
+    server.configure(client.betting_client)
+
+Latency and error rate can be a single value or a dict
+of {method: value} (method being the short api name,
+e.g. "placeOrders"), errors are returned as json-rpc
+APINGExceptions (TOO_MANY_REQUESTS) so bflw raises
+APIError as it would live.
+"""
+
+IDENTITY_PATH = "/identity/"
+API_PATH = "/api/"
+
+ACCOUNT_DETAILS = {
+    "currencyCode": "GBP",
+    "firstName": "mock",
+    "lastName": "mock",
+    "localeCode": "en",
+    "region": "GBR",
+    "timezone": "GMT",
+    "discountRate": 0.0,
+    "pointsBalance": 0,
+    "countryCode": "GB",
+}
+ACCOUNT_FUNDS = {
+    "availableToBetBalance": 1000.0,
+    "exposure": 0.0,
+    "retainedCommission": 0.0,
+    "exposureLimit": -10000.0,
+    "discountRate": 0.0,
+    "pointsBalance": 0,
+    "wallet": "UK",
+}
+
+
+class MockBettingServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Union[float, dict] = 0.0,
+        error_rate: Union[float, dict] = 0.0,
+        market_catalogues: dict = None,
+        cleared_orders: list = None,
+        seed: int = None,
+    ):
+        """
+        :param host: Bind host
+        :param port: Bind port (0 for any free port)
+        :param latency: Response delay in seconds (or {method: latency})
+        :param error_rate: Probability of an APINGException (or {method: rate})
+        :param market_catalogues: {marketId: catalogue dict} returned by listMarketCatalogue
+        :param cleared_orders: Cleared order dicts returned by listClearedOrders
+        :param seed: Random seed used for error injection
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.market_catalogues = market_catalogues or {}
+        self.cleared_orders = cleared_orders or []
+        self.requests = Counter()  # {method: count}
+        self.errors = Counter()
+        self._random = random.Random(seed)
+        self._bet_id = 0
+        self._orders = {}  # {betId: place instruction}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self) -> None:
+        self._server = ThreadingHTTPServer((self.host, self.port), MockBettingHandler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.1},
+            name="MockBettingServer",
+            daemon=True,
+        ).start()
+        logger.info("Started MockBettingServer", extra={"url": self.url})
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def configure(self, betting_client) -> None:
+        """Point a bflw APIClient at the server"""
+        betting_client.identity_uri = self.url + IDENTITY_PATH
+        betting_client.identity_cert_uri = self.url + IDENTITY_PATH
+        betting_client.api_uri = self.url + API_PATH
+
+    @property
+    def url(self) -> str:
+        return "http://%s:%s" % (self.host, self.port)
+
+    def handle(self, path: str, body: bytes) -> dict:
+        if path.startswith(IDENTITY_PATH):
+            method = path[len(IDENTITY_PATH) :]
+            if self._process(method):
+                return {"token": "", "status": "FAIL", "error": "NO_SESSION"}
+            return self.identity(method)
+        request = json.loads(body)
+        method = request["method"].split("/")[-1]
+        if self._process(method):
+            return _error(request, "TOO_MANY_REQUESTS")
+        function = getattr(self, method, None)
+        if function is None:
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": -32601, "message": "DSC-0021"},
+                "id": request.get("id"),
+            }
+        return {
+            "jsonrpc": "2.0",
+            "result": function(request.get("params") or {}),
+            "id": request.get("id"),
+        }
+
+    def _process(self, method: str) -> bool:
+        # apply latency and return True if error should be injected
+        latency = _lookup(self.latency, method)
+        if latency:
+            time.sleep(latency)
+        error_rate = _lookup(self.error_rate, method)
+        with self._lock:
+            self.requests[method] += 1
+            error = bool(error_rate) and self._random.random() < error_rate
+            if error:
+                self.errors[method] += 1
+            return error
+
+    def _add_order(self, instruction: dict) -> str:
+        with self._lock:
+            self._bet_id += 1
+            bet_id = str(self._bet_id)
+            self._orders[bet_id] = instruction
+            return bet_id
+
+    """ identity """
+
+    @staticmethod
+    def identity(method: str) -> dict:
+        if method == "certlogin":
+            return {"sessionToken": "mock-session", "loginStatus": "SUCCESS"}
+        return {
+            "token": "mock-session",
+            "product": "mock",
+            "status": "SUCCESS",
+            "error": "",
+        }
+
+    """ betting """
+
+    def placeOrders(self, params: dict) -> dict:
+        return {
+            "customerRef": params.get("customerRef"),
+            "status": "SUCCESS",
+            "marketId": params.get("marketId"),
+            "instructionReports": [
+                {
+                    "status": "SUCCESS",
+                    "instruction": instruction,
+                    "betId": self._add_order(instruction),
+                    "placedDate": _now(),
+                    "averagePriceMatched": 0.0,
+                    "sizeMatched": 0.0,
+                    "orderStatus": "EXECUTABLE",
+                }
+                for instruction in params.get("instructions", [])
+            ],
+        }
+
+    def cancelOrders(self, params: dict) -> dict:
+        return {
+            "customerRef": params.get("customerRef"),
+            "status": "SUCCESS",
+            "marketId": params.get("marketId"),
+            "instructionReports": [
+                self._cancel_report(instruction)
+                for instruction in params.get("instructions") or []
+            ],
+        }
+
+    def replaceOrders(self, params: dict) -> dict:
+        reports = []
+        for instruction in params.get("instructions", []):
+            order = self._orders.get(instruction["betId"]) or {
+                "selectionId": 1,
+                "side": "BACK",
+                "orderType": "LIMIT",
+                "limitOrder": {"size": 2.0, "persistenceType": "LAPSE"},
+            }
+            new_instruction = dict(
+                order,
+                limitOrder=dict(
+                    order.get("limitOrder") or {}, price=instruction["newPrice"]
+                ),
+            )
+            reports.append(
+                {
+                    "status": "SUCCESS",
+                    "cancelInstructionReport": self._cancel_report(
+                        {"betId": instruction["betId"]}
+                    ),
+                    "placeInstructionReport": {
+                        "status": "SUCCESS",
+                        "instruction": new_instruction,
+                        "betId": self._add_order(new_instruction),
+                        "placedDate": _now(),
+                        "averagePriceMatched": 0.0,
+                        "sizeMatched": 0.0,
+                        "orderStatus": "EXECUTABLE",
+                    },
+                }
+            )
+        return {
+            "customerRef": params.get("customerRef"),
+            "status": "SUCCESS",
+            "marketId": params.get("marketId"),
+            "instructionReports": reports,
+        }
+
+    def updateOrders(self, params: dict) -> dict:
+        return {
+            "customerRef": params.get("customerRef"),
+            "status": "SUCCESS",
+            "marketId": params.get("marketId"),
+            "instructionReports": [
+                {"status": "SUCCESS", "instruction": instruction}
+                for instruction in params.get("instructions", [])
+            ],
+        }
+
+    def listMarketCatalogue(self, params: dict) -> list:
+        market_ids = (params.get("filter") or {}).get("marketIds") or list(
+            self.market_catalogues
+        )
+        catalogues = [
+            self.market_catalogues.get(market_id) or _market_catalogue(market_id)
+            for market_id in market_ids
+        ]
+        return catalogues[: params.get("maxResults") or len(catalogues)]
+
+    def listClearedOrders(self, params: dict) -> dict:
+        market_ids = params.get("marketIds")
+        orders = [
+            o
+            for o in self.cleared_orders
+            if not market_ids or o.get("marketId") in market_ids
+        ]
+        from_record = params.get("fromRecord") or 0
+        record_count = params.get("recordCount") or 1000
+        return {
+            "clearedOrders": orders[from_record : from_record + record_count],
+            "moreAvailable": from_record + record_count < len(orders),
+        }
+
+    def listCurrentOrders(self, params: dict) -> dict:
+        return {"currentOrders": [], "moreAvailable": False}
+
+    """ account """
+
+    def getAccountDetails(self, params: dict) -> dict:
+        return dict(ACCOUNT_DETAILS)
+
+    def getAccountFunds(self, params: dict) -> dict:
+        return dict(ACCOUNT_FUNDS)
+
+    @staticmethod
+    def _cancel_report(instruction: dict) -> dict:
+        return {
+            "status": "SUCCESS",
+            "instruction": instruction,
+            "sizeCancelled": instruction.get("sizeReduction") or 2.0,
+            "cancelledDate": _now(),
+        }
+
+
+class MockBettingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for requests.Session
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            response = self.server.mock.handle(self.path, body)
+        except (ValueError, KeyError):
+            self.send_error(400)
+            return
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        return
+
+
+def _lookup(value: Union[float, dict], method: str) -> Optional[float]:
+    if isinstance(value, dict):
+        return value.get(method)
+    return value
+
+
+def _error(request: dict, error_code: str) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "error": {
+            "code": -32099,
+            "message": "ANGX-0007",
+            "data": {
+                "APINGException": {
+                    "requestUUID": None,
+                    "errorCode": error_code,
+                    "errorDetails": "Injected error",
+                },
+                "exceptionname": "APINGException",
+            },
+        },
+        "id": request.get("id"),
+    }
+
+
+def _market_catalogue(market_id: str) -> dict:
+    return {
+        "marketId": market_id,
+        "marketName": "Mock",
+        "marketStartTime": "2030-01-01T12:00:00.000Z",
+        "totalMatched": 0.0,
+        "description": {
+            "persistenceEnabled": True,
+            "bspMarket": False,
+            "marketTime": "2030-01-01T12:00:00.000Z",
+            "suspendTime": "2030-01-01T12:00:00.000Z",
+            "bettingType": "ODDS",
+            "turnInPlayEnabled": True,
+            "marketType": "WIN",
+            "regulator": "MALTA LOTTERIES AND GAMBLING AUTHORITY",
+            "marketBaseRate": 5.0,
+            "discountAllowed": True,
+            "wallet": "UK wallet",
+            "rules": "",
+            "rulesHasDate": True,
+            "priceLadderDescription": {"type": "CLASSIC"},
+        },
+        "runners": [
+            {
+                "selectionId": selection_id,
+                "runnerName": "Runner %s" % selection_id,
+                "handicap": 0.0,
+                "sortPriority": selection_id,
+                "metadata": {"runnerId": str(selection_id)},
+            }
+            for selection_id in range(1, 4)
+        ],
+        "eventType": {"id": "7", "name": "Horse Racing"},
+        "event": {
+            "id": "1",
+            "name": "Mock",
+            "countryCode": "GB",
+            "timezone": "Europe/London",
+            "venue": "Mock",
+            "openDate": "2030-01-01T12:00:00.000Z",
+        },
+    }
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S.000Z"
+    )
@@ -0,0 +1,417 @@
+import ssl
+import gzip
+import json
+import time
+import random
+import socket
+import logging
+import threading
+from typing import Callable, Iterator, Optional
+from betfairlightweight.streaming import BetfairStream
+
+logger = logging.getLogger(__name__)
+
+"""
+Local stand-in for the betfair streaming api, used to
+load test the stream -> listener -> handler_queue path.
+Speaks the connection / authentication / heartbeat and
+market / order subscription protocol used by bflw:
+
+    server = MockStreamServer(synthetic_source(markets=50), rate=1000)
+    server.start()
+    client.betting_client.streaming = LocalStreaming(server.address)
+
+Market data is taken from a source, a callable returning
+an iterator of mcm messages ({"pt": .., "mc": [..]}), the
+clk sent is the message index so a resubscribe with
+initial_clk/clk resumes from the next message. Publish
+time is rewritten to the send time so latency can be
+measured by the client.
+"""
+
+CRLF = b"\r\n"
+
+
+class MockStreamServer:
+    def __init__(
+        self,
+        source: Callable[[], Iterator[dict]] = None,
+        rate: Optional[float] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        certfile: str = None,
+        keyfile: str = None,
+        disconnect_after: int = None,
+        heartbeat_ms: int = 5000,
+        update_publish_time: bool = True,
+    ):
+        """
+        :param source: Callable returning an iterator of market change messages
+        :param rate: Messages per second per subscription (None is unthrottled)
+        :param host: Bind host
+        :param port: Bind port (0 for any free port)
+        :param certfile: SSL certificate (plain TCP if None)
+        :param keyfile: SSL key
+        :param disconnect_after: Close each connection after n messages
+        :param heartbeat_ms: Heartbeat interval when no data is available
+        :param update_publish_time: Set pt to the send time
+        """
+        self.source = source
+        self.rate = rate
+        self.host = host
+        self.port = port
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.disconnect_after = disconnect_after
+        self.heartbeat_ms = heartbeat_ms
+        self.update_publish_time = update_publish_time
+        self.connections = 0
+        self.subscriptions = 0
+        self.messages_sent = 0
+        self._socket = None
+        self._ssl_context = None
+        self._clients = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self) -> None:
+        if self.certfile:
+            self._ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self._ssl_context.load_cert_chain(self.certfile, self.keyfile)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen()
+        self.port = self._socket.getsockname()[1]
+        self._running = True
+        threading.Thread(
+            target=self._accept_loop, name="MockStreamServer", daemon=True
+        ).start()
+        logger.info("Started MockStreamServer", extra={"address": self.address})
+
+    def stop(self) -> None:
+        self._running = False
+        self.disconnect()
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+    def disconnect(self) -> None:
+        """Injected disconnect, closes all client connections"""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+
+    @property
+    def address(self) -> tuple:
+        return self.host, self.port
+
+    def _accept_loop(self) -> None:
+        while self._running:
+            try:
+                sock, _ = self._socket.accept()
+            except OSError:
+                break
+            if self._ssl_context:
+                try:
+                    sock = self._ssl_context.wrap_socket(sock, server_side=True)
+                except (ssl.SSLError, OSError):
+                    logger.error("MockStreamServer SSL handshake error", exc_info=True)
+                    continue
+            client = MockStreamConnection(self, sock)
+            with self._lock:
+                self._clients.append(client)
+                self.connections += 1
+            threading.Thread(target=client.run, daemon=True).start()
+
+
+class MockStreamConnection:
+    def __init__(self, server: MockStreamServer, sock: socket.socket):
+        self.server = server
+        self.socket = sock
+        self.messages_sent = 0
+        self._send_lock = threading.Lock()
+        self._open = True
+
+    def run(self) -> None:
+        self.send({"op": "connection", "connectionId": "mock-%s" % id(self)})
+        reader = self.socket.makefile("rb")
+        try:
+            for line in reader:
+                if not line.strip():
+                    continue
+                self.on_request(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        self.close()
+
+    def on_request(self, request: dict) -> None:
+        op, unique_id = request.get("op"), request.get("id")
+        if op in ("authentication", "heartbeat"):
+            self.send_status(unique_id)
+        elif op in ("marketSubscription", "orderSubscription"):
+            self.server.subscriptions += 1
+            self.send_status(unique_id)
+            threading.Thread(
+                target=self.publish,
+                args=(op, unique_id, request.get("initialClk"), request.get("clk")),
+                daemon=True,
+            ).start()
+        else:
+            self.send_status(unique_id, "FAILURE", "INVALID_REQUEST")
+
+    def send_status(
+        self, unique_id: int, status_code: str = "SUCCESS", error_code: str = None
+    ) -> None:
+        message = {
+            "op": "status",
+            "id": unique_id,
+            "statusCode": status_code,
+            "connectionClosed": False,
+        }
+        if error_code:
+            message["errorCode"] = error_code
+        self.send(message)
+
+    def publish(
+        self, op: str, unique_id: int, initial_clk: str = None, clk: str = None
+    ) -> None:
+        if op == "orderSubscription" or self.server.source is None:
+            lookup = "oc" if op == "orderSubscription" else "mc"
+            self.send(
+                {
+                    "op": "ocm" if lookup == "oc" else "mcm",
+                    "id": unique_id,
+                    "initialClk": "0",
+                    "clk": "0",
+                    "pt": _now(),
+                    "ct": "SUB_IMAGE",
+                    lookup: [],
+                }
+            )
+            self.heartbeat(unique_id, "ocm" if lookup == "oc" else "mcm", "0")
+            return
+        resume = int(clk) if initial_clk and clk else None
+        interval = 1 / self.server.rate if self.server.rate else None
+        next_time = time.perf_counter()
+        i = -1
+        for i, message in enumerate(self.server.source()):
+            if resume is not None and i <= resume:
+                continue
+            if not self._open:
+                return
+            if interval:
+                next_time += interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            message = dict(message, op="mcm", id=unique_id, clk=str(i))
+            if i == 0:
+                message["initialClk"] = "0"
+                message["ct"] = "SUB_IMAGE"
+            elif resume is not None and i == resume + 1:
+                message["ct"] = "RESUB_DELTA"
+            if self.server.update_publish_time:
+                message["pt"] = _now()
+            if not self.send(message):
+                return
+            if (
+                self.server.disconnect_after
+                and self.messages_sent >= self.server.disconnect_after
+            ):
+                logger.info("MockStreamServer injected disconnect")
+                self.close()
+                return
+        self.heartbeat(unique_id, "mcm", str(max(i, resume or 0)))
+
+    def heartbeat(self, unique_id: int, op: str, clk: str) -> None:
+        while self._open:
+            time.sleep(self.server.heartbeat_ms / 1e3)
+            self.send(
+                {"op": op, "id": unique_id, "clk": clk, "pt": _now(), "ct": "HEARTBEAT"}
+            )
+
+    def send(self, message: dict) -> bool:
+        data = json.dumps(message, separators=(",", ":")).encode() + CRLF
+        with self._send_lock:
+            if not self._open:
+                return False
+            try:
+                self.socket.sendall(data)
+            except OSError:
+                self._open = False
+                return False
+            self.messages_sent += 1
+            if message.get("op") in ("mcm", "ocm"):
+                self.server.messages_sent += 1
+        return True
+
+    def close(self) -> None:
+        self._open = False
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+class LocalBetfairStream(BetfairStream):
+    """BetfairStream connecting to a MockStreamServer"""
+
+    def __init__(self, *args, address: tuple, use_ssl: bool = False, **kwargs):
+        super(LocalBetfairStream, self).__init__(*args, **kwargs)
+        self.address = address
+        self.use_ssl = use_ssl
+
+    def _create_socket(self) -> socket.socket:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.use_ssl:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            s = context.wrap_socket(s, server_hostname=self.address[0])
+        s.settimeout(self.timeout)
+        s.connect(self.address)
+        return s
+
+
+class LocalStreaming:
+    """Replacement for `betting_client.streaming`"""
+
+    def __init__(self, address: tuple, use_ssl: bool = False):
+        self.address = address
+        self.use_ssl = use_ssl
+
+    def create_stream(
+        self,
+        unique_id: int = 0,
+        listener=None,
+        timeout: float = 64,
+        buffer_size: int = 1024,
+        host: str = None,
+    ) -> LocalBetfairStream:
+        return LocalBetfairStream(
+            unique_id,
+            listener,
+            app_key="mock",
+            session_token="mock",
+            timeout=timeout,
+            buffer_size=buffer_size,
+            host=host,
+            address=self.address,
+            use_ssl=self.use_ssl,
+        )
+
+
+def file_source(*file_paths: str) -> Callable[[], Iterator[dict]]:
+    """Replays recorded / historic market files"""
+
+    def source() -> Iterator[dict]:
+        for file_path in file_paths:
+            opener = gzip.open if file_path.endswith(".gz") else open
+            with opener(file_path, "rt") as f:
+                for line in f:
+                    if line.strip():
+                        data = json.loads(line)
+                        if "mc" in data:
+                            yield {"pt": data["pt"], "mc": data["mc"]}
+
+    return source
+
+
+def synthetic_source(
+    markets: int = 10,
+    runners: int = 10,
+    updates: Optional[int] = None,
+    markets_per_message: int = 1,
+    seed: int = None,
+) -> Callable[[], Iterator[dict]]:
+    """Random ladder / traded deltas, the first message
+    is a full image (with marketDefinition) of every
+    market, updates is the number of delta messages
+    (None is unlimited).
+    """
+    market_ids = ["1.%s" % (100000000 + i) for i in range(markets)]
+    selection_ids = list(range(1, runners + 1))
+
+    def source() -> Iterator[dict]:
+        rand = random.Random(seed)
+        yield {
+            "pt": _now(),
+            "mc": [
+                {
+                    "id": market_id,
+                    "img": True,
+                    "marketDefinition": _market_definition(market_id, selection_ids),
+                    "rc": [
+                        {
+                            "id": selection_id,
+                            "atb": [[2.0, 10]],
+                            "atl": [[2.02, 10]],
+                            "ltp": 2.0,
+                            "tv": 0,
+                        }
+                        for selection_id in selection_ids
+                    ],
+                }
+                for market_id in market_ids
+            ],
+        }
+        count = 0
+        while updates is None or count < updates:
+            count += 1
+            market_changes = []
+            for market_id in rand.sample(market_ids, min(markets_per_message, markets)):
+                price = round(rand.uniform(1.5, 10), 1)
+                market_changes.append(
+                    {
+                        "id": market_id,
+                        "rc": [
+                            {
+                                "id": rand.choice(selection_ids),
+                                "atb": [[price, round(rand.uniform(0, 100), 2)]],
+                                "atl": [[round(price + 0.1, 1), rand.randint(0, 100)]],
+                                "ltp": price,
+                            }
+                        ],
+                    }
+                )
+            yield {"pt": _now(), "mc": market_changes}
+
+    return source
+
+
+def _market_definition(market_id: str, selection_ids: list) -> dict:
+    return {
+        "betDelay": 0,
+        "bettingType": "ODDS",
+        "bspMarket": False,
+        "bspReconciled": False,
+        "complete": True,
+        "crossMatching": True,
+        "discountAllowed": True,
+        "eventId": "1%s" % market_id[-6:],
+        "eventTypeId": "7",
+        "inPlay": False,
+        "marketBaseRate": 5.0,
+        "marketTime": "2030-01-01T12:00:00.000Z",
+        "marketType": "WIN",
+        "numberOfActiveRunners": len(selection_ids),
+        "numberOfWinners": 1,
+        "persistenceEnabled": True,
+        "regulators": ["MR_INT"],
+        "runnersVoidable": False,
+        "status": "OPEN",
+        "timezone": "GMT",
+        "turnInPlayEnabled": True,
+        "version": 1,
+        "runners": [
+            {"id": selection_id, "sortPriority": i, "status": "ACTIVE"}
+            for i, selection_id in enumerate(selection_ids, 1)
+        ],
+    }
+
+
+def _now() -> int:
+    return int(time.time() * 1e3)
@@ -1,5 +1,6 @@
 import logging
 import hashlib
+import bisect
 from typing import Optional, Tuple
 from decimal import Decimal
 
@@ -73,6 +74,20 @@ def make_line_prices(min_unit: float, max_unit: float, interval: float) -> list:
 PRICES = make_prices(MIN_PRICE, CUTOFFS)
 PRICES_FLOAT = [float(price) for price in PRICES]
 FINEST_PRICES = make_prices(MIN_PRICE, ((1000, 100),))
+PRICES_INDEX = {price: i for i, price in enumerate(PRICES_FLOAT)}
+
+
+def price_tick_difference(price: float, other_price: float) -> int:
+    """Number of ticks from price to other_price,
+    off ladder prices are rounded down to the
+    nearest tick.
+    """
+    try:
+        return PRICES_INDEX[other_price] - PRICES_INDEX[price]
+    except KeyError:
+        return bisect.bisect_right(PRICES_FLOAT, other_price) - bisect.bisect_right(
+            PRICES_FLOAT, price
+        )
 
 
 def get_price(data: list, level: int) -> Optional[float]:
@@ -1,4 +1,5 @@
 import time
+import asyncio
 import threading
 import logging
 from typing import Callable, Optional
@@ -95,6 +96,99 @@ class BackgroundWorker(threading.Thread):
         self.join(timeout)
 
 
+class AsyncWorker:
+    """BackgroundWorker run as a task on the AsyncFlumine
+    event loop, coroutine functions are awaited and
+    blocking functions are run in the flumine executor.
+    """
+
+    def __init__(
+        self,
+        flumine,
+        function: Callable,
+        interval: Optional[int],
+        func_args: tuple = None,
+        func_kwargs: dict = None,
+        start_delay: int = 0,
+        context: dict = None,
+        name: str = None,
+    ):
+        self.name = name or function.__name__
+        self.flumine = flumine
+        self.function = function
+        self.interval = interval
+        self.func_args = func_args if func_args is not None else []
+        self.func_kwargs = func_kwargs if func_kwargs is not None else {}
+        self.start_delay = start_delay
+        self.context = context or {}
+        self._running = False
+        self._task = None
+
+    def start(self) -> None:
+        # must be called from the event loop
+        self._task = asyncio.get_running_loop().create_task(self.run(), name=self.name)
+
+    async def run(self) -> None:
+        logger.info(
+            "AsyncWorker %s starting",
+            self.name,
+            extra={
+                "worker_name": self.name,
+                "function": self.function,
+                "context": self.context,
+                "start_delay": self.start_delay,
+                "interval": self.interval,
+            },
+        )
+        await asyncio.sleep(self.start_delay)
+        self._running = True
+        while self._running:
+            try:
+                if asyncio.iscoroutinefunction(self.function):
+                    await self.function(
+                        self.context, self.flumine, *self.func_args, **self.func_kwargs
+                    )
+                else:
+                    await self.flumine.run_in_executor(
+                        self.function,
+                        self.context,
+                        self.flumine,
+                        *self.func_args,
+                        **self.func_kwargs,
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(
+                    "Error in AsyncWorker %s: %s",
+                    self.name,
+                    e,
+                    extra={
+                        "worker_name": self.name,
+                        "function": self.function,
+                        "context": self.context,
+                    },
+                    exc_info=True,
+                )
+            if self.interval is None:
+                break
+            await asyncio.sleep(self.interval)
+        self._running = False
+
+    def shutdown(self, timeout: int = None) -> None:
+        logger.info(
+            "AsyncWorker %s shutting down",
+            self.name,
+            extra={"worker_name": self.name, "function": self.function},
+        )
+        self._running = False
+        if self._task:
+            self._task.cancel()
+
+    def is_alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+
 def keep_alive(context: dict, flumine) -> None:
     """Attempt keep alive if required or
     login if keep alive failed
@@ -158,6 +252,13 @@ def poll_account_balance(context: dict, flumine) -> None:
         logger.debug("Client update account details", extra=client.info)
 
 
+def log_stream_metrics(context: dict, flumine) -> None:
+    extra = {"streams": flumine.streams.metrics()}
+    if hasattr(flumine.handler_queue, "metrics_snapshot"):  # PriorityHandlerQueue
+        extra["handler_queue"] = flumine.handler_queue.metrics_snapshot()
+    logger.info("Stream metrics", extra=extra)
+
+
 def poll_market_closure(context: dict, flumine) -> None:
     markets = [
         market for market in list(flumine.markets.markets.values()) if market.closed
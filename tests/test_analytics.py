@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+
+from flumine.markets.analytics import MarketAnalytics
+
+
+def create_runner(selection_id, back, lay, status="ACTIVE"):
+    runner = mock.Mock(selection_id=selection_id, handicap=0, status=status)
+    runner.ex.available_to_back = [{"price": p, "size": s} for p, s in back]
+    runner.ex.available_to_lay = [{"price": p, "size": s} for p, s in lay]
+    return runner
+
+
+class MarketAnalyticsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mock_market_book = mock.Mock(
+            publish_time_epoch=123,
+            runners=[
+                create_runner(1, [(2.0, 10), (1.99, 10)], [(2.02, 20)]),
+                create_runner(2, [(4.0, 5)], []),
+                create_runner(3, [], []),
+                create_runner(4, [(1.01, 100)], [(1.02, 100)], status="REMOVED"),
+            ],
+        )
+        self.analytics = MarketAnalytics(self.mock_market_book)
+
+    def test_init(self):
+        self.assertEqual(self.analytics.market_book, self.mock_market_book)
+        self.assertEqual(self.analytics.publish_time, 123)
+        self.assertIsNone(self.analytics._runners)
+
+    def test_best_back(self):
+        self.assertEqual(self.analytics.best_back(1), (2.0, 10))
+        self.assertEqual(self.analytics.best_back(3), (None, None))
+        self.assertEqual(self.analytics.best_back(4), (None, None))
+
+    def test_best_lay(self):
+        self.assertEqual(self.analytics.best_lay(1), (2.02, 20))
+        self.assertEqual(self.analytics.best_lay(2), (None, None))
+
+    def test_spread(self):
+        self.assertEqual(self.analytics.spread(1), 1)
+        self.assertIsNone(self.analytics.spread(2))
+        self.assertIsNone(self.analytics.spread(5))
+
+    def test_weight_of_money(self):
+        self.assertEqual(self.analytics.weight_of_money(1), 0.5)
+        self.assertEqual(self.analytics.weight_of_money(2), 1)
+        self.assertIsNone(self.analytics.weight_of_money(3))
+        self.assertIsNone(self.analytics.weight_of_money(5))
+
+    def test_overround(self):
+        self.assertEqual(self.analytics.back_overround, 0.75)
+        self.assertEqual(self.analytics.lay_overround, 0.495)
+
+    def test_calculated_once(self):
+        self.analytics.best_back(1)
+        self.mock_market_book.runners = []
+        self.assertEqual(self.analytics.best_back(1), (2.0, 10))
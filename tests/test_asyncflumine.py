@@ -0,0 +1,156 @@
+import queue
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from flumine import AsyncFlumine, BaseStrategy
+from flumine.asyncflumine import AsyncHandlerQueue
+from flumine.clients.exchangetype import ExchangeType
+from flumine.events import events
+from flumine.events.events import EventType
+from flumine.events.handlerqueue import PriorityHandlerQueue
+from flumine.worker import AsyncWorker
+
+
+class AsyncHandlerQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.handler_queue = AsyncHandlerQueue(queue.Queue())
+
+    def test_pending(self):
+        self.handler_queue.put(1)
+        self.assertEqual(self.handler_queue.qsize(), 1)
+        self.assertFalse(self.handler_queue.empty())
+        self.assertEqual(self.handler_queue.get_nowait(), 1)
+        self.assertTrue(self.handler_queue.empty())
+
+    def test_attach(self):
+        async def _run():
+            self.handler_queue.put(1)
+            self.handler_queue.attach(asyncio.get_running_loop())
+            self.handler_queue.put(2)
+            return [await self.handler_queue.get(), await self.handler_queue.get()]
+
+        self.assertEqual(asyncio.run(_run()), [1, 2])
+
+    def test_put_threadsafe(self):
+        async def _run():
+            self.handler_queue.attach(asyncio.get_running_loop())
+            thread = threading.Thread(target=self.handler_queue.put, args=(3,))
+            thread.start()
+            return await asyncio.wait_for(self.handler_queue.get(), 1)
+
+        self.assertEqual(asyncio.run(_run()), 3)
+
+    def test_priority(self):
+        handler_queue = AsyncHandlerQueue(PriorityHandlerQueue())
+        market_book = events.MarketBookEvent(None)
+        orders = events.CurrentOrdersEvent(None)
+
+        async def _run():
+            handler_queue.attach(asyncio.get_running_loop())
+            handler_queue.put(market_book)
+            handler_queue.put(orders)
+            return [await handler_queue.get(), await handler_queue.get()]
+
+        self.assertEqual(asyncio.run(_run()), [orders, market_book])
+        self.assertEqual(handler_queue.depths(), {"high": 0, "normal": 0, "low": 0})
+
+
+class AsyncStrategy(BaseStrategy):
+    async def process_market_book(self, market, market_book):
+        await asyncio.sleep(0)
+        self.processed = (market, market_book)
+
+
+class AsyncFlumineTest(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mock.Mock(EXCHANGE=ExchangeType.SIMULATED)
+        self.flumine = AsyncFlumine(self.mock_client, max_workers=2)
+
+    def tearDown(self):
+        self.flumine.executor.shutdown()
+
+    def test_init(self):
+        self.assertIsInstance(self.flumine.handler_queue, AsyncHandlerQueue)
+        self.assertIsInstance(self.flumine.handler_queue._handler_queue, queue.Queue)
+        self.assertEqual(self.flumine.executor._max_workers, 2)
+        self.assertEqual(self.flumine.WORKER, AsyncWorker)
+        self.assertEqual(self.flumine.tasks_in_flight, 0)
+
+    @mock.patch("flumine.baseflumine.config.priority_handler_queue", True)
+    def test_init_priority_handler_queue(self):
+        flumine = AsyncFlumine(self.mock_client, max_workers=2)
+        self.addCleanup(flumine.executor.shutdown)
+        self.assertIsInstance(
+            flumine.handler_queue._handler_queue, PriorityHandlerQueue
+        )
+        self.assertIn("handler_queue", flumine.metrics())
+
+    def test_str(self):
+        self.assertEqual(str(self.flumine), "<AsyncFlumine>")
+        self.assertEqual(repr(self.flumine), "<AsyncFlumine>")
+
+    @mock.patch("flumine.asyncflumine.AsyncFlumine._add_default_workers")
+    @mock.patch("flumine.asyncflumine.AsyncFlumine._process_market_books")
+    def test_run(self, mock__process_market_books, _):
+        mock_event = mock.Mock(EVENT_TYPE=EventType.MARKET_BOOK, _time_created_ns=0)
+        self.flumine.handler_queue.put(mock_event)
+        self.flumine.handler_queue.put(mock.Mock(EVENT_TYPE=EventType.TERMINATOR))
+        self.flumine.run()
+        mock__process_market_books.assert_called_with(mock_event)
+        self.mock_client.login.assert_called_with()
+        self.mock_client.logout.assert_called_with()
+        self.assertFalse(self.flumine._running)
+        self.assertEqual(
+            self.flumine.handler_metrics.events[EventType.MARKET_BOOK].handler.count,
+            1,
+        )
+
+    @mock.patch("flumine.asyncflumine.AsyncFlumine._add_default_workers")
+    def test_run_async_hook(self, _):
+        strategy = AsyncStrategy(market_filter={})
+        self.flumine.add_strategy(strategy)
+
+        async def _run():
+            task = asyncio.get_running_loop().create_task(self.flumine.run_async())
+            await asyncio.sleep(0)
+            result = strategy.process_market_book(1, 2)
+            self.assertIsInstance(result, asyncio.Task)
+            self.assertEqual(self.flumine.tasks_in_flight, 1)
+            self.flumine.handler_queue.put(mock.Mock(EVENT_TYPE=EventType.TERMINATOR))
+            await task
+
+        asyncio.run(_run())
+        self.assertEqual(strategy.processed, (1, 2))
+        self.assertEqual(self.flumine.tasks_in_flight, 0)
+
+    def test_add_strategy_sync_hooks(self):
+        strategy = BaseStrategy(market_filter={})
+        self.flumine.add_strategy(strategy)
+        self.assertNotIn("process_market_book", strategy.__dict__)
+
+    def test_run_in_executor(self):
+        async def _run():
+            self.flumine.loop = asyncio.get_running_loop()
+            return await self.flumine.run_in_executor(
+                lambda a, b=None: (threading.current_thread().name, a, b), 1, b=2
+            )
+
+        name, a, b = asyncio.run(_run())
+        self.assertTrue(name.startswith("AsyncFlumine"))
+        self.assertEqual((a, b), (1, 2))
+
+    def test_task_error(self):
+        async def error():
+            raise ValueError
+
+        async def _run():
+            self.flumine.loop = asyncio.get_running_loop()
+            task = self.flumine.create_task(error())
+            await asyncio.wait([task])
+
+        with mock.patch("flumine.asyncflumine.logger") as mock_logger:
+            asyncio.run(_run())
+        mock_logger.error.assert_called()
+        self.assertEqual(self.flumine.tasks_in_flight, 0)
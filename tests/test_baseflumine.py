@@ -1,3 +1,5 @@
+import time
+import queue
 import unittest
 from unittest import mock
 
@@ -6,6 +8,9 @@ from flumine.baseflumine import (
     Market,
 )
 from flumine.clients.exchangetype import ExchangeType
+from flumine.events.handlerqueue import PriorityHandlerQueue
+from flumine.strategy.strategy import BaseStrategy
+from flumine.events import events
 
 from flumine.exceptions import ClientError
 
@@ -19,6 +24,13 @@ class BaseFlumineTest(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             self.base_flumine.run()
 
+    def test_handler_queue(self):
+        self.assertIsInstance(self.base_flumine.handler_queue, queue.Queue)
+
+    @mock.patch("flumine.baseflumine.config.priority_handler_queue", True)
+    def test_handler_queue_priority(self):
+        self.assertIsInstance(BaseFlumine().handler_queue, PriorityHandlerQueue)
+
     def test_add_client(self):
         mock_clients = mock.Mock()
         self.base_flumine.clients = mock_clients
@@ -40,7 +52,7 @@ class BaseFlumineTest(unittest.TestCase):
 
     def test__process_market_books(self):
         self.base_flumine.streams = mock.Mock()
-        mock_strategy = mock.Mock(stream_ids=[1])
+        mock_strategy = mock.Mock(stream_ids=[1], min_update_interval=None)
         self.base_flumine.add_strategy(mock_strategy)
         mock_market_book = mock.Mock(
             publish_time_epoch=123, market_id="1.123", streaming_unique_id=1, runners=[]
@@ -65,7 +77,7 @@ class BaseFlumineTest(unittest.TestCase):
         it is subscribed to.
         """
         self.base_flumine.streams = mock.Mock()
-        mock_strategy = mock.Mock(stream_ids=[1, 2])
+        mock_strategy = mock.Mock(stream_ids=[1, 2], min_update_interval=None)
         self.base_flumine.add_strategy(mock_strategy)
         mock_market_book = mock.Mock(
             publish_time_epoch=123, market_id="1.123", streaming_unique_id=5, runners=[]
@@ -82,7 +94,7 @@ class BaseFlumineTest(unittest.TestCase):
         of strategy.check_market_book().
         """
         self.base_flumine.streams = mock.Mock()
-        mock_strategy = mock.Mock(stream_ids=[1])
+        mock_strategy = mock.Mock(stream_ids=[1], min_update_interval=None)
         check_pattern = (False, True, True, False, True)
         mock_strategy.check_market_book.side_effect = check_pattern
         self.base_flumine.add_strategy(mock_strategy)
@@ -101,6 +113,200 @@ class BaseFlumineTest(unittest.TestCase):
                 mock_strategy.process_market_book.call_count, process_call_count
             )
 
+    def test__process_market_books_conflated(self):
+        self.base_flumine.streams = mock.Mock()
+        strategy = BaseStrategy(market_filter={}, min_update_interval=1)
+        strategy.streams = [mock.Mock(stream_id=1)]
+        strategy.check_market_book = mock.Mock(return_value=True)
+        strategy.process_market_book = mock.Mock()
+        self.base_flumine.add_strategy(strategy)
+        market_books = [
+            mock.Mock(
+                publish_time_epoch=publish_time,
+                market_id=market_id,
+                streaming_unique_id=1,
+                status="OPEN",
+                runners=[],
+            )
+            for publish_time, market_id in (
+                (1000, "1.1"),
+                (1200, "1.1"),
+                (1500, "1.1"),
+                (1600, "1.2"),
+                (2100, "1.2"),
+            )
+        ]
+        for market_book in market_books:
+            self.base_flumine._process_market_books(mock.Mock(event=[market_book]))
+        # 1.1 @1000, 1.2 @1600, latest held 1.1 book @2100
+        self.assertEqual(
+            [c[0][1] for c in strategy.process_market_book.call_args_list],
+            [market_books[0], market_books[3], market_books[2]],
+        )
+        self.assertEqual(strategy._conflation_pending, {"1.2": market_books[4]})
+
+    def test__process_market_books_conflated_degraded(self):
+        self.base_flumine.streams = mock.Mock()
+        strategy = BaseStrategy(market_filter={}, min_update_interval=1, critical=False)
+        strategy.streams = [mock.Mock(stream_id=1)]
+        strategy.check_market_book = mock.Mock(return_value=True)
+        strategy.process_market_book = mock.Mock()
+        self.base_flumine.add_strategy(strategy)
+        market_books = [
+            mock.Mock(
+                publish_time_epoch=publish_time,
+                market_id=market_id,
+                streaming_unique_id=1,
+                status="OPEN",
+                runners=[],
+            )
+            for publish_time, market_id in (
+                (1000, "1.1"),
+                (1200, "1.1"),
+                (2100, "1.2"),
+            )
+        ]
+        self.base_flumine._process_market_books(mock.Mock(event=market_books[:2]))
+        self.base_flumine.load_shedder.degraded = True
+        self.base_flumine._process_market_books(mock.Mock(event=market_books[2:]))
+        # 1.2 and the held 1.1 book @1200 (now due) are shed
+        self.assertEqual(
+            [c[0][1] for c in strategy.process_market_book.call_args_list],
+            [market_books[0]],
+        )
+        self.assertEqual(strategy._conflation_pending, {})
+        self.assertEqual(self.base_flumine.load_shedder.skipped_strategy_checks, 2)
+
+    @mock.patch("flumine.config.latency_budget", 1)
+    def test__process_market_books_load_shedding(self):
+        self.base_flumine.streams = mock.Mock()
+        critical = mock.Mock(stream_ids=[1], min_update_interval=None, critical=True)
+        non_critical = mock.Mock(
+            stream_ids=[1], min_update_interval=None, critical=False
+        )
+        self.base_flumine.add_strategy(critical)
+        self.base_flumine.add_strategy(non_critical)
+        load_shedder = self.base_flumine.load_shedder
+        now = time.time() * 1e3
+
+        def market_book(publish_time):
+            return mock.Mock(
+                publish_time_epoch=publish_time,
+                market_id="1.123",
+                streaming_unique_id=1,
+                streaming_snap=False,
+                status="OPEN",
+                runners=[],
+            )
+
+        # new market, latency over budget
+        self.base_flumine._process_market_books(
+            mock.Mock(event=[market_book(now - 5000)])
+        )
+        self.assertTrue(load_shedder.degraded)
+        self.assertEqual(critical.process_market_book.call_count, 1)
+        # superseded
+        load_shedder.record([market_book(now)])
+        self.base_flumine._process_market_books(
+            mock.Mock(event=[market_book(now - 4000)])
+        )
+        self.assertEqual(load_shedder.shed_market_books, 1)
+        self.assertEqual(critical.process_market_book.call_count, 1)
+        # latest, non critical skipped
+        self.base_flumine._process_market_books(
+            mock.Mock(event=[market_book(now - 3000), market_book(now)])
+        )
+        self.assertEqual(load_shedder.shed_market_books, 2)
+        self.assertEqual(critical.process_market_book.call_count, 2)
+        self.assertEqual(non_critical.check_market_book.call_count, 1)
+        self.assertEqual(load_shedder.skipped_strategy_checks, 1)
+        # recovered
+        self.assertFalse(load_shedder.degraded)
+        self.base_flumine._process_market_books(
+            mock.Mock(event=[market_book(time.time() * 1e3)])
+        )
+        self.assertEqual(non_critical.check_market_book.call_count, 2)
+        self.assertEqual(self.base_flumine.handler_queue.qsize(), 2)
+
+    def test__process_strategy_market_book(self):
+        strategy = BaseStrategy(market_filter={})
+        strategy.check_market_book = mock.Mock(side_effect=[False, True])
+        strategy.process_market_book = mock.Mock()
+        for _ in range(2):
+            self.base_flumine._process_strategy_market_book(strategy, 1, 2)
+        strategy.process_market_book.assert_called_once_with(1, 2)
+        self.assertEqual(strategy.metrics.check_market_book.count, 2)
+        self.assertEqual(strategy.metrics.process_market_book.count, 1)
+
+    def test_metrics(self):
+        strategy = BaseStrategy(market_filter={})
+        self.base_flumine.strategies = [strategy]
+        self.base_flumine.handler_metrics.record(events.MarketBookEvent(None), 0)
+        metrics = self.base_flumine.metrics()
+        self.assertEqual(metrics["events"]["MARKET_BOOK"]["handler"]["count"], 1)
+        self.assertEqual(
+            metrics["strategies"]["BaseStrategy"]["check_market_book"]["count"], 0
+        )
+        self.assertEqual(metrics["load_shedding"], self.base_flumine.load_shedder.info)
+        self.assertNotIn("handler_queue", metrics)
+        self.base_flumine.handler_queue = PriorityHandlerQueue()
+        self.assertEqual(
+            self.base_flumine.metrics()["handler_queue"],
+            {"high": 0, "normal": 0, "low": 0},
+        )
+
+    def test__process_load_shedding(self):
+        mock_strategy = mock.Mock()
+        self.base_flumine.strategies = [mock_strategy]
+        self.base_flumine._process_load_shedding(mock.Mock(event=True))
+        mock_strategy.process_load_shedding.assert_called_with(True)
+
+    def test__process_raw_data(self):
+        mock_strategy = mock.Mock(stream_ids=[1])
+        mock_strategy_two = mock.Mock(stream_ids=[2])
+        self.base_flumine.strategies = [mock_strategy, mock_strategy_two]
+        datum = {"id": "1.123", "rc": []}
+        mock_event = mock.Mock(event=[1, "AAA", 123, [datum]])
+        self.base_flumine._process_raw_data(mock_event)
+        self.assertIn("1.123", self.base_flumine.markets.markets)
+        mock_strategy.process_raw_data.assert_called_with("AAA", 123, datum)
+        mock_strategy_two.process_raw_data.assert_not_called()
+
+    def test__process_raw_data_no_strategies(self):
+        # OrderDataStream
+        datum = {"id": "1.123", "orc": []}
+        mock_event = mock.Mock(event=[1, "AAA", 123, [datum]])
+        self.base_flumine._process_raw_data(mock_event)
+        self.assertEqual(self.base_flumine.markets.markets, {})
+
+    def test__process_raw_data_closed(self):
+        mock_strategy = mock.Mock(stream_ids=[1])
+        self.base_flumine.strategies = [mock_strategy]
+        datum = {
+            "id": "1.123",
+            "marketDefinition": {
+                "status": "CLOSED",
+                "numberOfWinners": 1,
+                "runners": [
+                    {"id": 1, "status": "WINNER", "sortPriority": 1},
+                    {"id": 2, "status": "LOSER", "sortPriority": 2},
+                ],
+            },
+        }
+        mock_event = mock.Mock(event=[1, "AAA", 123, [datum]])
+        self.base_flumine._process_raw_data(mock_event)
+        mock_strategy.process_raw_data.assert_called_with("AAA", 123, datum)
+        event = self.base_flumine.handler_queue.get_nowait()
+        self.assertIsInstance(event, events.CloseMarketEvent)
+        market_book = event.event
+        self.assertEqual(market_book.market_id, "1.123")
+        self.assertEqual(market_book.streaming_unique_id, 1)
+        self.assertEqual(market_book.status, "CLOSED")
+        self.assertEqual(
+            [(r.selection_id, r.status) for r in market_book.runners],
+            [(1, "WINNER"), (2, "LOSER")],
+        )
+
     @mock.patch("flumine.baseflumine.Market")
     def test__add_market(self, mock_market):
         mock_market_book = mock.Mock()
@@ -0,0 +1,151 @@
+import unittest
+
+import betfairlightweight
+from betfairlightweight import filters
+from betfairlightweight.exceptions import APIError, KeepAliveError
+
+from flumine.testing import bettingserver
+from flumine.testing.bettingserver import MockBettingServer
+
+MARKET_ID = "1.123"
+
+
+class MockBettingServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockBettingServer(
+            cleared_orders=[
+                {"marketId": MARKET_ID, "betId": str(i), "profit": 1.0}
+                for i in range(3)
+            ],
+            seed=1,
+        )
+        self.server.start()
+        self.betting_client = betfairlightweight.APIClient(
+            "username", "password", app_key="app_key"
+        )
+        self.server.configure(self.betting_client)
+        self.betting_client.login_interactive()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def _place(self):
+        return self.betting_client.betting.place_orders(
+            MARKET_ID,
+            [
+                filters.place_instruction(
+                    order_type="LIMIT",
+                    selection_id=123,
+                    side="LAY",
+                    limit_order=filters.limit_order(
+                        size=2.0, price=3.0, persistence_type="LAPSE"
+                    ),
+                )
+            ],
+            customer_ref="ref",
+        )
+
+    def test_configure(self):
+        self.assertEqual(
+            self.betting_client.api_uri, "http://127.0.0.1:%s/api/" % self.server.port
+        )
+        self.assertEqual(self.betting_client.session_token, "mock-session")
+
+    def test_keep_alive(self):
+        self.assertEqual(self.betting_client.keep_alive().status, "SUCCESS")
+
+    def test_place_orders(self):
+        response = self._place()
+        self.assertEqual(response.status, "SUCCESS")
+        self.assertEqual(response.market_id, MARKET_ID)
+        self.assertEqual(response.customer_ref, "ref")
+        self.assertEqual(response.place_instruction_reports[0].bet_id, "1")
+        self.assertEqual(self._place().place_instruction_reports[0].bet_id, "2")
+        self.assertEqual(self.server.requests["placeOrders"], 2)
+
+    def test_cancel_orders(self):
+        response = self.betting_client.betting.cancel_orders(
+            MARKET_ID, [filters.cancel_instruction("1", 1.5)]
+        )
+        self.assertEqual(response.status, "SUCCESS")
+        self.assertEqual(response.cancel_instruction_reports[0].size_cancelled, 1.5)
+
+    def test_replace_orders(self):
+        self._place()
+        response = self.betting_client.betting.replace_orders(
+            MARKET_ID, [filters.replace_instruction("1", 4.0)]
+        )
+        report = response.replace_instruction_reports[0]
+        self.assertEqual(report.cancel_instruction_reports.status, "SUCCESS")
+        self.assertEqual(report.place_instruction_reports.bet_id, "2")
+        instruction = report.place_instruction_reports.instruction
+        self.assertEqual(instruction.selection_id, 123)
+        self.assertEqual(instruction.side, "LAY")
+        self.assertEqual(instruction.limit_order.price, 4.0)
+
+    def test_replace_orders_unknown(self):
+        response = self.betting_client.betting.replace_orders(
+            MARKET_ID, [filters.replace_instruction("999", 4.0)]
+        )
+        self.assertEqual(response.status, "SUCCESS")
+
+    def test_update_orders(self):
+        response = self.betting_client.betting.update_orders(
+            MARKET_ID, [filters.update_instruction("1", "PERSIST")]
+        )
+        self.assertEqual(response.status, "SUCCESS")
+
+    def test_list_market_catalogue(self):
+        self.server.market_catalogues["1.1"] = dict(
+            bettingserver._market_catalogue("1.1"), marketName="Custom"
+        )
+        market_catalogues = self.betting_client.betting.list_market_catalogue(
+            filter=filters.market_filter(market_ids=["1.1", "1.2"]), max_results=1
+        )
+        self.assertEqual(len(market_catalogues), 1)
+        self.assertEqual(market_catalogues[0].market_id, "1.1")
+        self.assertEqual(market_catalogues[0].market_name, "Custom")
+        self.assertEqual(len(market_catalogues[0].runners), 3)
+
+    def test_list_cleared_orders(self):
+        cleared_orders = self.betting_client.betting.list_cleared_orders(
+            bet_status="SETTLED", market_ids=[MARKET_ID], record_count=2
+        )
+        self.assertEqual(len(cleared_orders.orders), 2)
+        self.assertTrue(cleared_orders.more_available)
+        cleared_orders = self.betting_client.betting.list_cleared_orders(
+            bet_status="SETTLED", market_ids=[MARKET_ID], from_record=2
+        )
+        self.assertEqual(len(cleared_orders.orders), 1)
+        self.assertFalse(cleared_orders.more_available)
+        cleared_orders = self.betting_client.betting.list_cleared_orders(
+            bet_status="SETTLED", market_ids=["1.999"]
+        )
+        self.assertEqual(cleared_orders.orders, [])
+
+    def test_account(self):
+        self.assertEqual(
+            self.betting_client.account.get_account_details().currency_code, "GBP"
+        )
+        self.assertEqual(
+            self.betting_client.account.get_account_funds().available_to_bet_balance,
+            1000.0,
+        )
+
+    def test_error_injection(self):
+        self.server.error_rate = {"placeOrders": 1, "keepAlive": 1}
+        with self.assertRaises(APIError):
+            self._place()
+        with self.assertRaises(KeepAliveError):
+            self.betting_client.keep_alive()
+        self.betting_client.account.get_account_funds()
+        self.assertEqual(self.server.errors["placeOrders"], 1)
+        self.assertEqual(self.server.errors["keepAlive"], 1)
+        self.assertEqual(sum(self.server.errors.values()), 2)
+
+    def test_latency(self):
+        self.server.latency = {"getAccountFunds": 0.05}
+        self.betting_client.account.get_account_funds()
+        self.assertGreaterEqual(
+            self.betting_client.account.get_account_funds().elapsed_time, 0.05
+        )
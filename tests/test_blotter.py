@@ -599,6 +599,20 @@ class BlotterTest(unittest.TestCase):
         self.blotter._live_orders = ["test"]
         self.blotter.complete_order("test")
 
+    def test_live_orders_callback(self):
+        mock_callback = mock.Mock()
+        self.blotter._live_orders_callback = mock_callback
+        mock_order = mock.Mock()
+        mock_order_two = mock.Mock()
+        self.blotter["123"] = mock_order
+        mock_callback.assert_called_once_with("1.23", True)
+        self.blotter["456"] = mock_order_two
+        self.blotter.complete_order(mock_order)
+        mock_callback.assert_called_once_with("1.23", True)
+        self.blotter.complete_order(mock_order_two)
+        mock_callback.assert_called_with("1.23", False)
+        self.assertEqual(mock_callback.call_count, 2)
+
     def test__contains(self):
         self.blotter._orders = {"123": "test"}
         self.assertIn("123", self.blotter)
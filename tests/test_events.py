@@ -16,6 +16,7 @@ class BaseEventTest(unittest.TestCase):
         self.assertIsNone(base_event.QUEUE_TYPE)
         self.assertEqual(base_event.event, mock_event)
         self.assertIsNotNone(base_event._time_created)
+        self.assertGreater(base_event._time_created_ns, 0)
 
     def test_elapsed_seconds(self):
         self.assertGreaterEqual(self.base_event.elapsed_seconds, 0)
@@ -3,6 +3,8 @@ from unittest import mock
 
 from flumine import Flumine
 from flumine.clients.exchangetype import ExchangeType
+from flumine.events import events
+from flumine.events.events import EventType
 
 
 class FlumineTest(unittest.TestCase):
@@ -16,6 +18,18 @@ class FlumineTest(unittest.TestCase):
     def test_repr(self):
         assert repr(self.flumine) == "<Flumine>"
 
+    @mock.patch("flumine.flumine.Flumine._add_default_workers")
+    @mock.patch("flumine.flumine.Flumine._process_current_orders")
+    def test_run(self, mock__process_current_orders, _):
+        event = events.CurrentOrdersEvent(None)
+        self.flumine.handler_queue.put(event)
+        self.flumine.handler_queue.put(mock.Mock(EVENT_TYPE=EventType.TERMINATOR))
+        self.flumine.run()
+        mock__process_current_orders.assert_called_with(event)
+        event_metrics = self.flumine.handler_metrics.events[EventType.CURRENT_ORDERS]
+        self.assertEqual(event_metrics.queue_wait.count, 1)
+        self.assertEqual(event_metrics.handler.count, 1)
+
     # def test_trade(self):
     # self.flumine.add_strategy()
     # self.flumine.run()
@@ -0,0 +1,94 @@
+import queue
+import threading
+import unittest
+from unittest import mock
+
+from flumine.events import events
+from flumine.events.handlerqueue import Priority, PriorityHandlerQueue
+
+
+class PriorityHandlerQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.handler_queue = PriorityHandlerQueue(starvation_limit=3)
+
+    def test_init(self):
+        self.assertEqual(self.handler_queue.starvation_limit, 3)
+        self.assertTrue(self.handler_queue.empty())
+        self.assertEqual(
+            self.handler_queue.depths(), {"high": 0, "normal": 0, "low": 0}
+        )
+
+    def test_priority(self):
+        catalogue = events.MarketCatalogueEvent(None)
+        market_book = events.MarketBookEvent(None)
+        orders = events.CurrentOrdersEvent(None)
+        close = events.CloseMarketEvent(None)
+        cleared = events.ClearedOrdersEvent(None)
+        for event in (catalogue, market_book, orders, close, cleared):
+            self.handler_queue.put(event)
+        self.assertEqual(self.handler_queue.qsize(), 5)
+        self.assertEqual(
+            self.handler_queue.depths(), {"high": 2, "normal": 1, "low": 2}
+        )
+        self.assertEqual(
+            [self.handler_queue.get() for _ in range(5)],
+            [orders, close, market_book, catalogue, cleared],
+        )
+
+    def test_terminator(self):
+        terminator = mock.Mock(EVENT_TYPE=events.EventType.TERMINATOR)
+        market_book = events.MarketBookEvent(None)
+        orders = events.CurrentOrdersEvent(None)
+        for event in (terminator, market_book, orders):
+            self.handler_queue.put(event)
+        self.assertEqual(
+            [self.handler_queue.get() for _ in range(3)],
+            [orders, market_book, terminator],
+        )
+
+    def test_unknown_event(self):
+        self.handler_queue.put("test")
+        self.assertEqual(self.handler_queue.depths()["normal"], 1)
+
+    def test_starvation(self):
+        catalogue = events.MarketCatalogueEvent(None)
+        self.handler_queue.put(catalogue)
+        market_books = [events.MarketBookEvent(i) for i in range(10)]
+        for market_book in market_books:
+            self.handler_queue.put(market_book)
+        result = [self.handler_queue.get() for _ in range(11)]
+        self.assertEqual(result[:3], market_books[:3])
+        self.assertEqual(result[3], catalogue)
+        self.assertEqual(result[4:], market_books[3:])
+        self.assertEqual(self.handler_queue.metrics_snapshot()["low"]["promotions"], 1)
+
+    def test_get_nowait_empty(self):
+        with self.assertRaises(queue.Empty):
+            self.handler_queue.get_nowait()
+
+    def test_get_timeout(self):
+        with self.assertRaises(queue.Empty):
+            self.handler_queue.get(timeout=0.01)
+
+    def test_get_block(self):
+        event = events.CurrentOrdersEvent(None)
+        threading.Timer(0.01, self.handler_queue.put, args=(event,)).start()
+        self.assertEqual(self.handler_queue.get(timeout=1), event)
+
+    def test_metrics_snapshot(self):
+        for _ in range(3):
+            self.handler_queue.put(events.MarketBookEvent(None))
+        self.handler_queue.get()
+        snapshot = self.handler_queue.metrics_snapshot()
+        self.assertEqual(
+            snapshot["normal"],
+            {"depth": 2, "max_depth": 3, "puts": 3, "promotions": 0},
+        )
+        self.assertEqual(
+            snapshot["high"], {"depth": 0, "max_depth": 0, "puts": 0, "promotions": 0}
+        )
+        # max depth reset
+        self.assertEqual(
+            self.handler_queue.metrics_snapshot()["normal"]["max_depth"], 2
+        )
+        self.assertEqual(Priority.NORMAL, 1)
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+from flumine.events.events import EventType
+from flumine.loadshedding import LoadShedder
+
+
+class LoadShedderTest(unittest.TestCase):
+    def setUp(self):
+        self.mock_flumine = mock.Mock()
+        self.load_shedder = LoadShedder(self.mock_flumine)
+
+    def test_init(self):
+        self.assertEqual(self.load_shedder.flumine, self.mock_flumine)
+        self.assertFalse(self.load_shedder.degraded)
+        self.assertEqual(self.load_shedder.publish_times, {})
+        self.assertEqual(self.load_shedder.shed_market_books, 0)
+
+    def test_record(self):
+        self.load_shedder.record(
+            [
+                mock.Mock(market_id="1.1", publish_time_epoch=1),
+                mock.Mock(market_id="1.1", publish_time_epoch=2),
+                mock.Mock(market_id="1.2", publish_time_epoch=3),
+            ]
+        )
+        self.assertEqual(self.load_shedder.publish_times, {"1.1": 2, "1.2": 3})
+
+    @mock.patch("flumine.loadshedding.config")
+    def test_update(self, mock_config):
+        mock_config.latency_budget = 1
+        self.assertFalse(self.load_shedder.update(0.9))
+        self.assertTrue(self.load_shedder.update(1.1))
+        event = self.mock_flumine.handler_queue.put.call_args[0][0]
+        self.assertEqual(event.EVENT_TYPE, EventType.LOAD_SHEDDING)
+        self.assertTrue(event.event)
+        self.assertTrue(self.load_shedder.update(0.6))  # hysteresis
+        self.assertFalse(self.load_shedder.update(0.4))
+        self.assertFalse(self.mock_flumine.handler_queue.put.call_args[0][0].event)
+        self.assertEqual(self.load_shedder.degraded_count, 1)
+
+    @mock.patch("flumine.loadshedding.config")
+    def test_update_disabled(self, mock_config):
+        mock_config.latency_budget = None
+        self.assertFalse(self.load_shedder.update(100))
+        self.load_shedder.degraded = True
+        self.assertFalse(self.load_shedder.update(100))
+
+    def test_superseded(self):
+        self.load_shedder.publish_times = {"1.1": 2}
+        self.assertTrue(
+            self.load_shedder.superseded(
+                mock.Mock(market_id="1.1", publish_time_epoch=1)
+            )
+        )
+        self.assertFalse(
+            self.load_shedder.superseded(
+                mock.Mock(market_id="1.1", publish_time_epoch=2)
+            )
+        )
+        self.assertFalse(
+            self.load_shedder.superseded(
+                mock.Mock(market_id="1.2", publish_time_epoch=1)
+            )
+        )
+        self.assertEqual(self.load_shedder.shed_market_books, 1)
+
+    def test_remove_market(self):
+        self.load_shedder.publish_times = {"1.1": 2}
+        self.load_shedder.remove_market("1.1")
+        self.load_shedder.remove_market("1.2")
+        self.assertEqual(self.load_shedder.publish_times, {})
+
+    def test_info(self):
+        self.assertEqual(
+            self.load_shedder.info,
+            {
+                "degraded": False,
+                "degraded_count": 0,
+                "shed_market_books": 0,
+                "skipped_strategy_checks": 0,
+            },
+        )
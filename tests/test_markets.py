@@ -4,7 +4,7 @@ from unittest import mock
 from collections import defaultdict
 
 from flumine.markets.markets import Markets
-from flumine.markets.market import Market
+from flumine.markets.market import Market, MarketMetadata
 from flumine import config
 
 
@@ -17,16 +17,101 @@ class MarketsTest(unittest.TestCase):
         self.assertEqual(self.markets.events, {})
 
     def test_add_market(self):
-        mock_market = mock.Mock(event_id="1234")
+        mock_market = mock.Mock(
+            market_id="1.1",
+            event_id="1234",
+            event_type_id="7",
+            market_start_datetime=12,
+            market_type="WIN",
+        )
         self.markets.add_market("1.1", mock_market)
         self.assertEqual(self.markets._markets, {"1.1": mock_market})
         self.assertEqual(self.markets.events, {"1234": [mock_market]})
+        self.assertEqual(
+            self.markets._event_index, {("1234", 12): {"WIN": {"1.1": mock_market}}}
+        )
+        self.assertEqual(self.markets._event_keys, {"1.1": ("1234", 12, "WIN")})
 
     def test_add_market_no_event_id(self):
-        mock_market = mock.Mock(event_id=None)
+        mock_market = mock.Mock(market_id="1.1", event_id=None)
         self.markets.add_market("1.1", mock_market)
         self.assertEqual(self.markets._markets, {"1.1": mock_market})
         self.assertEqual(self.markets.events, {})
+        self.assertEqual(self.markets._event_index, {})
+
+    def test_index_market_retimed(self):
+        mock_market = mock.Mock(
+            market_id="1.1",
+            event_id="1234",
+            event_type_id="7",
+            market_start_datetime=12,
+            market_type="WIN",
+        )
+        self.markets.add_market("1.1", mock_market)
+        mock_market.market_start_datetime = 13
+        self.markets.index_market(mock_market)
+        self.assertEqual(self.markets.events, {"1234": [mock_market]})
+        self.assertEqual(
+            self.markets._event_index, {("1234", 13): {"WIN": {"1.1": mock_market}}}
+        )
+        self.assertEqual(self.markets._event_keys, {"1.1": ("1234", 13, "WIN")})
+
+    def test_index_market_soccer(self):
+        mock_market = mock.Mock(
+            market_id="1.1",
+            event_id="1234",
+            event_type_id="1",
+            market_start_datetime=12,
+            market_type="MATCH_ODDS",
+        )
+        self.markets.add_market("1.1", mock_market)
+        self.assertEqual(
+            self.markets._event_index,
+            {("1234", None): {"MATCH_ODDS": {"1.1": mock_market}}},
+        )
+
+    def test_index_market_unknown(self):
+        mock_market = mock.Mock(market_id="1.1", event_id="1234")
+        self.markets.index_market(mock_market)
+        self.assertEqual(self.markets.events, {})
+        self.assertEqual(self.markets._event_index, {})
+
+    def test_event_markets(self):
+        mock_market = mock.Mock(
+            market_id="1.1",
+            event_id="1234",
+            event_type_id="7",
+            market_start_datetime=12,
+            market_type="WIN",
+        )
+        self.assertEqual(self.markets.event_markets(mock_market), {})
+        self.markets.add_market("1.1", mock_market)
+        self.assertEqual(
+            self.markets.event_markets(mock_market), {"WIN": [mock_market]}
+        )
+        # lookups do not modify the index
+        event_markets = self.markets.event_markets(mock_market)
+        self.assertEqual(event_markets["PLACE"], [])
+        event_markets["WIN"].append(1)
+        self.assertEqual(
+            self.markets._event_index, {("1234", 12): {"WIN": {"1.1": mock_market}}}
+        )
+
+    def test_events(self):
+        mock_market = mock.Mock(
+            market_id="1.1",
+            event_id="1234",
+            event_type_id="7",
+            market_start_datetime=12,
+            market_type="WIN",
+        )
+        self.markets.add_market("1.1", mock_market)
+        events = self.markets.events
+        self.assertEqual(events, {"1234": [mock_market]})
+        # copy of the index
+        self.assertEqual(events["4321"], [])
+        events["1234"].append(1)
+        self.assertEqual(self.markets._events, {"1234": {"1.1": mock_market}})
 
     def test_add_market_reopen(self):
         mock_market = mock.Mock()
@@ -43,12 +128,34 @@ class MarketsTest(unittest.TestCase):
         mock_market.close_market.assert_called_with()
 
     def test_remove_market(self):
-        mock_market = mock.Mock(event_id=1234)
-        self.markets._markets = {"1.1": mock_market}
-        self.markets.events = {1234: [mock_market]}
+        mock_market = mock.Mock(
+            market_id="1.1",
+            event_id=1234,
+            event_type_id="7",
+            market_start_datetime=12,
+            market_type="WIN",
+        )
+        mock_market_two = mock.Mock(
+            market_id="1.2",
+            event_id=1234,
+            event_type_id="7",
+            market_start_datetime=12,
+            market_type="PLACE",
+        )
+        self.markets.add_market("1.1", mock_market)
+        self.markets.add_market("1.2", mock_market_two)
         self.markets.remove_market("1.1")
+        self.assertEqual(self.markets._markets, {"1.2": mock_market_two})
+        self.assertEqual(self.markets._events, {1234: {"1.2": mock_market_two}})
+        self.assertEqual(self.markets.events, {1234: [mock_market_two]})
+        self.assertEqual(
+            self.markets._event_index, {(1234, 12): {"PLACE": {"1.2": mock_market_two}}}
+        )
+        self.markets.remove_market("1.2")
         self.assertEqual(self.markets._markets, {})
-        self.assertEqual(self.markets.events, {1234: []})
+        self.assertEqual(self.markets.events, {})
+        self.assertEqual(self.markets._event_index, {})
+        self.assertEqual(self.markets._event_keys, {})
 
     def test_remove_market_no_event(self):
         mock_market = mock.Mock(event_id=1234)
@@ -57,15 +164,6 @@ class MarketsTest(unittest.TestCase):
         self.assertEqual(self.markets._markets, {})
         self.assertEqual(self.markets.events, {})
 
-    def test_remove_market_err(self):
-        mock_market = mock.Mock(event_id=1234)
-        mock_market_two = mock.Mock(event_id=1234)
-        self.markets._markets = {"1.1": mock_market, "2.2": mock_market_two}
-        self.markets.events = {1234: [mock_market]}
-        self.markets.remove_market("2.2")
-        self.assertEqual(self.markets._markets, {"1.1": mock_market})
-        self.assertEqual(self.markets.events, {1234: [mock_market]})
-
     def test_get_order(self):
         mock_market = mock.Mock()
         mock_market.closed = False
@@ -102,11 +200,16 @@ class MarketsTest(unittest.TestCase):
         self.assertFalse(self.markets.live_orders)
         mock_market = mock.Mock()
         mock_market.closed = False
-        mock_market.blotter.has_live_orders = True
         self.markets._markets = {"1.234": mock_market}
+        self.assertFalse(self.markets.live_orders)
+        self.markets.update_live_orders("1.234", True)
         self.assertTrue(self.markets.live_orders)
-        mock_market.blotter.has_live_orders = False
+        mock_market.closed = True
+        self.assertFalse(self.markets.live_orders)
+        mock_market.closed = False
+        self.markets.update_live_orders("1.234", False)
         self.assertFalse(self.markets.live_orders)
+        self.assertEqual(self.markets._live_order_market_ids, set())
 
     def test_iter(self):
         self.assertEqual(len([i for i in self.markets]), 0)
@@ -140,6 +243,7 @@ class MarketTest(unittest.TestCase):
         self.assertEqual(self.market.market_cleared, [])
         self.assertEqual(self.market.context, {"simulated": {}})
         self.assertIsNotNone(self.market.blotter)
+        self.assertIsNone(self.market.price_history)
         self.assertEqual(self.market._transaction_id, 0)
 
     def test_call(self):
@@ -147,6 +251,55 @@ class MarketTest(unittest.TestCase):
         self.market(mock_market_book)
         self.assertEqual(self.market.market_book, mock_market_book)
         self.assertTrue(self.market.update_market_catalogue)
+        self.mock_flumine.markets.index_market.assert_called_with(self.market)
+
+    def test_call_same_definition(self):
+        mock_market_book = mock.Mock(
+            market_definition=self.mock_market_book.market_definition
+        )
+        self.market(mock_market_book)
+        self.assertEqual(self.market.market_book, mock_market_book)
+        self.mock_flumine.markets.index_market.assert_not_called()
+
+    @mock.patch("flumine.markets.market.PriceHistory")
+    def test_enable_price_history(self, mock_price_history):
+        price_history = self.market.enable_price_history(10)
+        self.assertEqual(price_history, mock_price_history.return_value)
+        mock_price_history.assert_called_with("1.234", 10)
+        price_history.update.assert_called_with(self.mock_market_book)
+        price_history.depth = 10
+        self.assertEqual(self.market.enable_price_history(5), price_history)
+        mock_price_history.assert_called_once()
+
+    def test_call_price_history(self):
+        self.market.price_history = mock.Mock()
+        mock_market_book = mock.Mock()
+        self.market(mock_market_book)
+        self.market.price_history.update.assert_called_with(mock_market_book)
+
+    def test_analytics(self):
+        self.mock_market_book.publish_time_epoch = 1
+        analytics = self.market.analytics
+        self.assertEqual(analytics.market_book, self.mock_market_book)
+        self.assertIs(self.market.analytics, analytics)
+        self.mock_market_book.publish_time_epoch = 2
+        self.assertIsNot(self.market.analytics, analytics)
+        self.market.market_book = None
+        self.assertIsNone(self.market.analytics)
+
+    @mock.patch("flumine.markets.market.get_runner_changes")
+    def test_runner_changes(self, mock_get_runner_changes):
+        mock_market_book = mock.Mock()
+        self.market(mock_market_book)
+        self.assertEqual(
+            self.market.runner_changes, mock_get_runner_changes.return_value
+        )
+        self.assertEqual(
+            self.market.runner_changes, mock_get_runner_changes.return_value
+        )
+        mock_get_runner_changes.assert_called_once_with(
+            mock_market_book, self.mock_market_book
+        )
 
     def test_open_market(self):
         self.market.closed = True
@@ -220,9 +373,19 @@ class MarketTest(unittest.TestCase):
         mock_transaction.replace_order.assert_called_with(mock_order, 2, False, True)
 
     def test_event(self):
-        self.market.market_catalogue.event.id = 12
-        self.market.market_book.market_definition.market_time = 12
-        self.market.flumine.markets.events = defaultdict(list)
+        self.assertEqual(
+            self.market.event,
+            self.mock_flumine.markets.event_markets.return_value,
+        )
+        self.mock_flumine.markets.event_markets.assert_called_with(self.market)
+
+    def test_event_index(self):
+        markets = Markets()
+        self.market.flumine.markets = markets
+        self.mock_market_catalogue.event.id = 12
+        self.mock_market_catalogue.event_type.id = "7"
+        self.mock_market_book.market_definition.market_time = 12
+        self.market.market_catalogue = self.mock_market_catalogue
         self.assertEqual(self.market.event, {})
 
         m_one = mock.Mock(market_type=1, event_id=12, market_start_datetime=12)
@@ -230,11 +393,10 @@ class MarketTest(unittest.TestCase):
         m_three = mock.Mock(market_type=3, event_id=123, market_start_datetime=12)
         m_four = mock.Mock(market_type=1, event_id=12, market_start_datetime=12)
         m_five = mock.Mock(market_type=2, event_id=12, market_start_datetime=13)
-        self.market.flumine.markets.events[m_one.event_id].append(m_one)
-        self.market.flumine.markets.events[m_two.event_id].append(m_two)
-        self.market.flumine.markets.events[m_three.event_id].append(m_three)
-        self.market.flumine.markets.events[m_four.event_id].append(m_four)
-        self.market.flumine.markets.events[m_five.event_id].append(m_five)
+        for i, m in enumerate([m_one, m_two, m_three, m_four, m_five]):
+            m.market_id = str(i)
+            m.event_type_id = "7"
+            markets.add_market(m.market_id, m)
         self.assertEqual(self.market.event, {1: [m_one, m_four], 2: [m_two]})
 
     def test_event_type_id_mc(self):
@@ -297,9 +459,10 @@ class MarketTest(unittest.TestCase):
         self.assertLess(self.market.seconds_to_start, 0)
 
     def test_seconds_to_start_market_catalogue(self):
-        self.market.market_book.market_definition.market_time = (
+        self.mock_market_book.market_definition.market_time = (
             datetime.datetime.fromtimestamp(1, datetime.UTC)
         )
+        self.market.market_catalogue = self.mock_market_catalogue
         self.assertLess(self.market.seconds_to_start, 0)
 
     def test_seconds_to_start_none(self):
@@ -395,6 +558,33 @@ class MarketTest(unittest.TestCase):
             self.market.race_type, mock_market_book.market_definition.race_type
         )
 
+    def test_metadata_snapshot(self):
+        self.assertEqual(
+            self.market.metadata.event_id, self.mock_market_catalogue.event.id
+        )
+        # updated only on a new catalogue / marketDefinition
+        self.mock_market_catalogue.event.id = 123
+        self.assertNotEqual(self.market.event_id, 123)
+        self.market.market_catalogue = self.mock_market_catalogue
+        self.assertEqual(self.market.event_id, 123)
+
+        self.market.market_catalogue = None
+        mock_market_book = mock.Mock()
+        mock_market_book.market_definition.venue = "Ascot"
+        self.market(mock_market_book)
+        self.assertEqual(self.market.metadata.venue, "Ascot")
+        self.market(mock.Mock(market_definition=mock_market_book.market_definition))
+        self.assertEqual(self.market.venue, "Ascot")
+
+    def test_metadata_empty(self):
+        metadata = MarketMetadata()
+        self.assertIsNone(metadata.event_id)
+        self.assertIsNone(metadata.venue)
+        self.assertEqual(
+            metadata.market_start_datetime,
+            datetime.datetime.fromtimestamp(0, datetime.UTC),
+        )
+
     def test_status(self):
         mock_market_book = mock.Mock(status="OPEN")
         self.market.market_book = mock_market_book
@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+
+from flumine import metrics
+from flumine.events import events
+from flumine.events.events import EventType
+
+
+class HistogramTest(unittest.TestCase):
+    def setUp(self):
+        self.histogram = metrics.Histogram()
+
+    def test_init(self):
+        self.assertEqual(len(self.histogram.buckets), metrics.BUCKETS)
+        self.assertEqual(self.histogram.count, 0)
+        self.assertEqual(self.histogram.percentile(99), 0)
+
+    def test_record(self):
+        for ns in (0, 1, 1000, 1000, -5):
+            self.histogram.record(ns)
+        self.assertEqual(self.histogram.count, 5)
+        self.assertEqual(self.histogram.total, 2001)
+        self.assertEqual(self.histogram.max, 1000)
+        self.assertEqual(self.histogram.buckets[0], 2)
+        self.assertEqual(self.histogram.buckets[1], 1)
+        self.assertEqual(self.histogram.buckets[10], 2)
+
+    def test_percentile(self):
+        for _ in range(98):
+            self.histogram.record(100)
+        self.histogram.record(5000)
+        self.histogram.record(100000)
+        self.assertEqual(self.histogram.percentile(50), 127)
+        self.assertEqual(self.histogram.percentile(99), 8191)
+        self.assertEqual(self.histogram.percentile(100), 100000)
+
+    def test_snapshot(self):
+        self.histogram.record(2000)
+        self.assertEqual(
+            self.histogram.snapshot(),
+            {"count": 1, "mean_us": 2.0, "p50_us": 2.0, "p99_us": 2.0, "max_us": 2.0},
+        )
+
+
+class HandlerMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.handler_metrics = metrics.HandlerMetrics()
+
+    @mock.patch("flumine.metrics.perf_counter_ns", return_value=5000)
+    def test_record(self, _):
+        event = events.MarketBookEvent(None)
+        event._time_created_ns = 1000
+        self.handler_metrics.record(event, 3000)
+        self.handler_metrics.record(event, 3000)
+        event_metrics = self.handler_metrics.events[EventType.MARKET_BOOK]
+        self.assertEqual(event_metrics.queue_wait.count, 2)
+        self.assertEqual(event_metrics.queue_wait.max, 2000)
+        self.assertEqual(event_metrics.handler.max, 2000)
+        snapshot = self.handler_metrics.snapshot()
+        self.assertEqual(list(snapshot), ["MARKET_BOOK"])
+        self.assertEqual(snapshot["MARKET_BOOK"]["handler"]["count"], 2)
+
+
+class StrategyMetricsTest(unittest.TestCase):
+    def test_snapshot(self):
+        strategy_metrics = metrics.StrategyMetrics()
+        strategy_metrics.process_orders.record(10)
+        snapshot = strategy_metrics.snapshot()
+        self.assertEqual(
+            list(snapshot),
+            ["check_market_book", "process_market_book", "process_orders"],
+        )
+        self.assertEqual(snapshot["process_orders"]["count"], 1)
@@ -0,0 +1,334 @@
+import os
+import queue
+import unittest
+import threading
+import multiprocessing
+from unittest import mock
+
+import betfairlightweight
+
+from flumine import BaseStrategy
+from flumine import multiprocess
+from flumine.clients.betfairclient import BetfairClient
+from flumine.clients.exchangetype import ExchangeType
+from flumine.events import events
+from flumine.events.events import EventType
+from flumine.streams import orderstream
+from flumine.streams.marketstream import MarketStream
+from flumine.streams.orderstream import OrderStream
+from flumine.testing.bettingserver import MockBettingServer
+from flumine.testing.streamserver import (
+    MockStreamServer,
+    LocalStreaming,
+    synthetic_source,
+)
+
+
+class PartitionStrategy(BaseStrategy):
+    def check_market_book(self, market, market_book):
+        return True
+
+    def process_market_book(self, market, market_book):
+        self.context["results"].put(
+            (
+                market_book.market_id,
+                multiprocess.partition(market_book.market_id, 2),
+                market.flumine.index,
+            )
+        )
+
+
+class PartitionTest(unittest.TestCase):
+    def test_partition(self):
+        self.assertEqual(multiprocess.partition("1.123", 4), 2)
+        self.assertEqual(
+            {multiprocess.partition("1.%s" % i, 3) for i in range(100)}, {0, 1, 2}
+        )
+
+
+class MultiProcessFlumineTest(unittest.TestCase):
+    def setUp(self):
+        self.mock_client = mock.Mock(EXCHANGE=ExchangeType.BETFAIR, paper_trade=False)
+        self.flumine = multiprocess.MultiProcessFlumine(self.mock_client, processes=2)
+        self.connections = [mock.Mock(), mock.Mock()]
+        self.flumine._connections = self.connections
+
+    def test_init(self):
+        self.assertEqual(self.flumine.processes, 2)
+        self.assertEqual(self.flumine.routed, [0, 0])
+        self.assertIsInstance(self.flumine.markets, multiprocess.MarketRegistry)
+
+    def test_event_handlers(self):
+        event_handlers = self.flumine._event_handlers()
+        self.assertEqual(
+            event_handlers[EventType.MARKET_BOOK], self.flumine._route_market_books
+        )
+        self.assertEqual(
+            event_handlers[EventType.MARKET_CATALOGUE], self.flumine._broadcast
+        )
+        self.assertEqual(event_handlers[EventType.TERMINATOR], "break")
+
+    def test__route_market_books(self):
+        market_books = [mock.Mock(market_id="1.%s" % i) for i in range(10)]
+        self.flumine._route_market_books(events.MarketBookEvent(market_books))
+        for index, conn in enumerate(self.connections):
+            event = conn.send.call_args[0][0]
+            self.assertEqual(event.EVENT_TYPE, EventType.MARKET_BOOK)
+            self.assertEqual(
+                [m.market_id for m in event.event],
+                [
+                    m.market_id
+                    for m in market_books
+                    if multiprocess.partition(m.market_id, 2) == index
+                ],
+            )
+        self.assertEqual(self.flumine.routed, [1, 1])
+
+    def test__route_market_books_markets(self):
+        self.flumine._route_market_books(
+            events.MarketBookEvent(
+                [
+                    mock.Mock(market_id="1.1", status="OPEN"),
+                    mock.Mock(market_id="1.2", status="SUSPENDED"),
+                ]
+            )
+        )
+        self.assertEqual(len(self.flumine.markets), 2)
+        self.assertEqual(self.flumine.markets.open_market_ids, ["1.1"])
+        self.flumine._route_market_books(
+            events.MarketBookEvent([mock.Mock(market_id="1.1", status="CLOSED")])
+        )
+        self.assertEqual(self.flumine.markets.open_market_ids, [])
+        self.assertTrue(self.flumine.markets.markets["1.1"].closed)
+
+    def test__route_raw_data_markets(self):
+        data = [{"id": "1.1", "marketDefinition": {"status": "OPEN"}}, {"id": "1.2"}]
+        self.flumine._route_raw_data(events.RawDataEvent((1, "clk", 123, data)))
+        self.assertEqual(self.flumine.markets.open_market_ids, ["1.1"])
+        self.assertEqual(len(self.flumine.markets), 1)
+
+    def test__read_partitions(self):
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        self.flumine._partition_connections = [reader]
+        self.flumine.markets.update_market("1.1", "OPEN")
+        self.flumine.markets.update_market("1.2", "OPEN")
+        writer.send(("live_orders", "1.1", True))
+        writer.send(("live_orders", "1.2", True))
+        writer.send(("removed", "1.2"))
+        writer.close()
+        self.flumine._read_partitions()
+        self.assertTrue(self.flumine.markets.live_orders)
+        self.assertEqual(self.flumine.markets._live_order_market_ids, {"1.1"})
+        self.assertEqual(list(self.flumine.markets.markets), ["1.1"])
+
+    def test_stream_snaps(self):
+        # parent streams snap from the MarketRegistry
+        market_stream = MarketStream(self.flumine, 1000, 0.01, None, {}, {})
+        market_stream._listener = mock.Mock()
+        self.flumine._route_market_books(
+            events.MarketBookEvent([mock.Mock(market_id="1.1", status="OPEN")])
+        )
+        market_stream._updated_market_ids = {"1.1"}
+        market_stream._snap_market_books()
+        market_stream._listener.snap.assert_called_with(market_ids=["1.1"])
+
+        order_stream = OrderStream(self.flumine, 2000, 0.01, None)
+        order_stream._output_queue = mock.Mock()
+        order_stream._output_queue.get.side_effect = queue.Empty
+        with mock.patch.object(OrderStream, "is_alive", side_effect=[True, False]):
+            order_stream.handle_output()
+        order_stream._output_queue.get.assert_called_with(
+            block=True, timeout=orderstream.SNAP_DELTA
+        )
+        self.assertTrue(self.flumine.handler_queue.empty())
+        self.flumine.markets.update_live_orders("1.1", True)
+        with mock.patch.object(OrderStream, "is_alive", side_effect=[True, False]):
+            order_stream.handle_output()
+        order_stream._output_queue.get.assert_called_with(block=True, timeout=0.01)
+        event = self.flumine.handler_queue.get_nowait()
+        self.assertEqual(event.EVENT_TYPE, EventType.CURRENT_ORDERS)
+
+    def test__route_raw_data(self):
+        data = [{"id": "1.%s" % i} for i in range(10)]
+        self.flumine._route_raw_data(events.RawDataEvent((1, "clk", 123, data)))
+        sent = [c.send.call_args[0][0].event for c in self.connections]
+        self.assertEqual(
+            sorted(d["id"] for s in sent for d in s[3]), sorted(d["id"] for d in data)
+        )
+        self.assertEqual(sent[0][:3], (1, "clk", 123))
+
+    def test__route_current_orders(self):
+        orders = [mock.Mock(market_id="1.%s" % i) for i in range(6)]
+        self.flumine._route_current_orders(
+            events.CurrentOrdersEvent(
+                [mock.Mock(orders=orders[:3]), mock.Mock(orders=orders[3:])]
+            )
+        )
+        for index, conn in enumerate(self.connections):
+            event = conn.send.call_args[0][0]
+            self.assertEqual(
+                event.event[0].orders,
+                [o for o in orders if multiprocess.partition(o.market_id, 2) == index],
+            )
+
+    def test__broadcast(self):
+        event = events.MarketCatalogueEvent([])
+        self.flumine._broadcast(event)
+        for conn in self.connections:
+            conn.send.assert_called_with(event)
+
+    def test__sync_session_tokens(self):
+        self.mock_client.betting_client.session_token = "abc"
+        self.flumine._sync_session_tokens()
+        self.flumine._sync_session_tokens()
+        for conn in self.connections:
+            conn.send.assert_called_once_with(("session", 0, "abc"))
+
+    def test__sync_stream_ids(self):
+        strategy = mock.Mock(streams=[mock.Mock(stream_id=1001)])
+        self.flumine.strategies._strategies.append(strategy)
+        self.flumine._sync_stream_ids()
+        self.flumine._sync_stream_ids()
+        for conn in self.connections:
+            conn.send.assert_called_once_with(("streams", [[1001]]))
+        strategy.streams[0].stream_id = 1002
+        self.flumine._sync_stream_ids()
+        for conn in self.connections:
+            conn.send.assert_called_with(("streams", [[1002]]))
+
+    def test__strategy_state(self):
+        strategy = BaseStrategy(market_filter={"marketIds": ["1.1"]})
+        mock_stream = mock.Mock(stream_id=1000)
+        strategy.streams = [mock.Mock(stream_id=2000), mock_stream]
+        strategy.local_market_filters = {mock_stream: lambda m: True}
+        self.flumine.streams._subscriptions = {
+            mock_stream: [
+                (mock.Mock(), {}),
+                (strategy, {"marketIds": ["1.1"]}),
+                (strategy, {"marketIds": ["1.2"]}),
+            ]
+        }
+        state, market_filters = self.flumine._strategy_state(strategy)
+        self.assertEqual(state.stream_ids, [2000, 1000])
+        self.assertEqual(state.local_market_filters, {})
+        self.assertEqual(
+            market_filters, {1: [{"marketIds": ["1.1"]}, {"marketIds": ["1.2"]}]}
+        )
+        self.assertIsNone(state.clients)
+        self.assertEqual(len(strategy.local_market_filters), 1)
+
+    def test_str(self):
+        self.assertEqual(str(self.flumine), "<MultiProcessFlumine>")
+
+
+class PartitionFlumineTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = mock.Mock()
+        self.flumine = multiprocess.PartitionFlumine(1, 2, self.conn)
+
+    def test_add_strategy(self):
+        strategy = BaseStrategy(market_filter={})
+        strategy.streams = [multiprocess.StreamRef(1000)]
+        self.flumine.add_strategy(
+            strategy, {0: [{"marketIds": ["1.1"]}, {"marketIds": ["1.2"]}]}
+        )
+        self.assertIn(strategy, self.flumine.strategies)
+        predicate = strategy.local_market_filters[strategy.streams[0]]
+        self.assertTrue(predicate(mock.Mock(market_id="1.1")))
+        self.assertTrue(predicate(mock.Mock(market_id="1.2")))
+        self.assertFalse(predicate(mock.Mock(market_id="1.3")))
+
+    def test__read(self):
+        mock_client = mock.Mock()
+        self.flumine.clients._clients.append(mock_client)
+        event = events.MarketBookEvent([])
+        strategy = mock.Mock(streams=[multiprocess.StreamRef(1000)])
+        self.flumine.strategies._strategies.append(strategy)
+        self.conn.recv.side_effect = [
+            event,
+            ("session", 0, "abc"),
+            ("streams", [[1001]]),
+            ("stop",),
+        ]
+        self.flumine._read()
+        mock_client.betting_client.set_session_token.assert_called_with("abc")
+        self.assertEqual(strategy.streams[0].stream_id, 1001)
+        self.assertEqual(self.flumine.handler_queue.get(), event)
+        self.assertEqual(
+            self.flumine.handler_queue.get().EVENT_TYPE, EventType.TERMINATOR
+        )
+
+    def test_markets(self):
+        parent_conn = mock.Mock()
+        flumine = multiprocess.PartitionFlumine(1, 2, self.conn, parent_conn)
+        self.assertIsInstance(flumine.markets, multiprocess.PartitionMarkets)
+        flumine.markets.update_live_orders("1.1", True)
+        parent_conn.send.assert_called_with(("live_orders", "1.1", True))
+        flumine.markets.add_market("1.1", mock.Mock(market_id="1.1", event_id=None))
+        flumine.markets.remove_market("1.1")
+        parent_conn.send.assert_called_with(("removed", "1.1"))
+        self.assertFalse(flumine.markets.live_orders)
+
+    def test__read_eof(self):
+        self.conn.recv.side_effect = EOFError
+        self.flumine._read()
+        self.assertEqual(
+            self.flumine.handler_queue.get().EVENT_TYPE, EventType.TERMINATOR
+        )
+
+    def test_str(self):
+        self.assertEqual(str(self.flumine), "<PartitionFlumine 1/2>")
+
+
+class ClientStateTest(unittest.TestCase):
+    def test_build_client(self):
+        betting_client = betfairlightweight.APIClient("user", "pass", app_key="key")
+        betting_client.api_uri = "http://127.0.0.1:1/api/"
+        betting_client.set_session_token("token")
+        client = BetfairClient(betting_client, interactive_login=True)
+        clone = multiprocess._build_client(multiprocess._client_state(client))
+        self.assertIsInstance(clone, BetfairClient)
+        self.assertTrue(clone.interactive_login)
+        self.assertEqual(clone.betting_client.username, "user")
+        self.assertEqual(clone.betting_client.app_key, "key")
+        self.assertEqual(clone.betting_client.api_uri, "http://127.0.0.1:1/api/")
+        self.assertEqual(clone.betting_client.session_token, "token")
+
+
+@unittest.skipUnless(
+    os.environ.get("FLUMINE_INTEGRATION"), "FLUMINE_INTEGRATION not set"
+)
+class MultiProcessIntegrationTest(unittest.TestCase):
+    def test_run(self):
+        betting_server = MockBettingServer()
+        betting_server.start()
+        stream_server = MockStreamServer(
+            synthetic_source(markets=6, runners=2, updates=0)
+        )
+        stream_server.start()
+        self.addCleanup(betting_server.stop)
+        self.addCleanup(stream_server.stop)
+
+        betting_client = betfairlightweight.APIClient("user", "pass", app_key="key")
+        betting_server.configure(betting_client)
+        betting_client.streaming = LocalStreaming(stream_server.address)
+        client = BetfairClient(
+            betting_client, interactive_login=True, order_stream=False
+        )
+        framework = multiprocess.MultiProcessFlumine(client, processes=2)
+        results = multiprocessing.get_context("spawn").Queue()
+        framework.add_strategy(
+            PartitionStrategy(market_filter={}, context={"results": results})
+        )
+        thread = threading.Thread(target=framework.run, daemon=True)
+        thread.start()
+        received = [results.get(timeout=30) for _ in range(6)]
+        framework.handler_queue.put(events.TerminatorEvent(None))
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len({r[0] for r in received}), 6)
+        self.assertEqual(len(framework.markets), 6)
+        for market_id, expected_index, index in received:
+            self.assertEqual(index, expected_index)
+        with self.assertRaises(queue.Empty):
+            results.get(timeout=0.1)
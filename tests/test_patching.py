@@ -0,0 +1,246 @@
+import queue
+import unittest
+
+from betfairlightweight.resources import bettingresources, streamingresources
+from betfairlightweight.streaming import cache
+
+from flumine import patching
+from flumine.streams.listener import FlumineStreamListener
+
+MARKET_DEFINITION = {
+    "betDelay": 0,
+    "bettingType": "ODDS",
+    "bspMarket": True,
+    "bspReconciled": False,
+    "complete": True,
+    "crossMatching": False,
+    "discountAllowed": True,
+    "eventId": "28270094",
+    "eventTypeId": "7",
+    "inPlay": False,
+    "marketBaseRate": 5.0,
+    "marketTime": "2017-06-14T18:55:00.000Z",
+    "numberOfActiveRunners": 2,
+    "numberOfWinners": 1,
+    "persistenceEnabled": True,
+    "regulators": ["MR_INT"],
+    "runnersVoidable": False,
+    "status": "OPEN",
+    "timezone": "Europe/London",
+    "turnInPlayEnabled": True,
+    "version": 1,
+    "priceLadderDefinition": {"type": "CLASSIC"},
+    "runners": [
+        {"id": 1, "sortPriority": 1, "status": "ACTIVE"},
+        {
+            "id": 2,
+            "sortPriority": 2,
+            "status": "REMOVED",
+            "removalDate": "2017-06-14T07:00:50.000Z",
+        },
+    ],
+}
+
+
+def _market_books(path: str) -> list:
+    output_queue = queue.Queue()
+    listener = FlumineStreamListener(
+        output_queue=output_queue, max_latency=None, decoder="json"
+    )
+    listener.register_stream(0, "marketSubscription")
+    market_books = []
+    with open(path) as f:
+        for line in f:
+            listener.on_data(line)
+            while not output_queue.empty():
+                market_books += output_queue.get()
+    return market_books
+
+
+class LazyTest(unittest.TestCase):
+    def test_lazy(self):
+        calls = []
+
+        class Test:
+            __slots__ = ["_value"]
+
+            @patching.lazy
+            def value(self):
+                calls.append(1)
+                return 123
+
+        test = Test()
+        self.assertEqual(test.value, 123)
+        self.assertEqual(test.value, 123)
+        self.assertEqual(len(calls), 1)
+        self.assertIsInstance(Test.value, patching.lazy)
+
+
+class MarketBookTest(unittest.TestCase):
+    def test_init(self):
+        market_book = patching.MarketBook(
+            streaming_unique_id=1000,
+            streaming_snap=True,
+            marketId="1.123",
+            status="OPEN",
+            publishTime=1497351220318,
+            lastMatchTime="2017-06-14T18:55:00.000Z",
+            priceLadderDefinition={"type": "CLASSIC"},
+            runners=[{"selectionId": 1, "status": "ACTIVE", "handicap": 0}],
+        )
+        self.assertEqual(market_book.streaming_unique_id, 1000)
+        self.assertTrue(market_book.streaming_snap)
+        self.assertEqual(market_book.market_id, "1.123")
+        self.assertEqual(market_book["marketId"], "1.123")
+        self.assertEqual(market_book.publish_time_epoch, 1497351220318)
+        self.assertEqual(
+            market_book.publish_time,
+            bettingresources.BaseResource.strip_datetime(1497351220318),
+        )
+        self.assertEqual(market_book.last_match_time.year, 2017)
+        self.assertEqual(market_book.price_ladder_definition.type, "CLASSIC")
+        self.assertIsNone(market_book.key_line_description)
+        self.assertEqual(market_book.runners[0].selection_id, 1)
+        self.assertEqual(
+            market_book.json(),
+            bettingresources.MarketBook(**market_book._data).json(),
+        )
+        self.assertEqual(str(market_book), "MarketBook")
+        self.assertEqual(repr(market_book), "<MarketBook>")
+        with self.assertRaises(AttributeError):
+            market_book.foo = 1
+
+
+class RunnerBookTest(unittest.TestCase):
+    def test_init(self):
+        runner_book = patching.RunnerBook(
+            selectionId=1,
+            status="REMOVED",
+            handicap=0,
+            removalDate="2017-06-14T07:00:50.000Z",
+            ex={"availableToBack": [{"price": 2, "size": 1}]},
+            orders=[],
+        )
+        self.assertEqual(runner_book.selection_id, 1)
+        self.assertEqual(runner_book.removal_date.hour, 7)
+        self.assertIsInstance(runner_book.ex, patching.EX)
+        self.assertIsNone(runner_book.sp)
+        self.assertEqual(runner_book.orders, [])
+        self.assertEqual(runner_book.matches, [])
+        self.assertEqual(str(runner_book), "RunnerBook: 1")
+
+
+class MarketDefinitionTest(unittest.TestCase):
+    def test_init(self):
+        market_definition = patching.MarketDefinition(**MARKET_DEFINITION)
+        self.assertEqual(market_definition.event_type_id, "7")
+        self.assertEqual(market_definition.market_time.year, 2017)
+        self.assertIsNone(market_definition.open_date)
+        self.assertIsNone(market_definition.settled_time)
+        self.assertEqual(market_definition.price_ladder_definition.type, "CLASSIC")
+        self.assertIsNone(market_definition.key_line_definitions)
+        self.assertEqual(len(market_definition.runners), 2)
+        runner = market_definition.runners[1]
+        self.assertEqual(runner.selection_id, 2)
+        self.assertEqual(runner.handicap, 0)
+        self.assertEqual(runner.removal_date.hour, 7)
+        self.assertEqual(str(runner), "MarketDefinitionRunner: 2")
+
+    def test_runners_reuse(self):
+        previous = patching.MarketDefinition(**MARKET_DEFINITION)
+        previous_runners = previous.runners
+        definition = dict(MARKET_DEFINITION)
+        definition["runners"] = [
+            MARKET_DEFINITION["runners"][0],
+            {"id": 2, "sortPriority": 2, "status": "ACTIVE"},
+        ]
+        market_definition = patching.MarketDefinition(**definition)
+        market_definition._previous = previous
+        self.assertIs(market_definition.runners[0], previous_runners[0])
+        self.assertIsNot(market_definition.runners[1], previous_runners[1])
+        self.assertEqual(market_definition.runners[1].status, "ACTIVE")
+        self.assertIsNone(market_definition._previous)
+
+
+class ProcessMarketDefinitionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = cache.MarketBookCache("1.123", 123, False, False, False)
+
+    def test_unchanged(self):
+        self.cache._process_market_definition(MARKET_DEFINITION)
+        market_definition = self.cache._market_definition_resource
+        self.assertIsInstance(market_definition, patching.MarketDefinition)
+        self.cache._process_market_definition(dict(MARKET_DEFINITION))
+        self.assertIs(self.cache._market_definition_resource, market_definition)
+
+    def test_changed(self):
+        self.cache._process_market_definition(MARKET_DEFINITION)
+        previous = self.cache._market_definition_resource
+        self.cache._process_market_definition(dict(MARKET_DEFINITION, inPlay=True))
+        market_definition = self.cache._market_definition_resource
+        self.assertIsNot(market_definition, previous)
+        self.assertTrue(market_definition.in_play)
+        # runners not materialised, nothing to reuse
+        self.assertIsNone(market_definition._previous)
+        runners = market_definition.runners
+        self.cache._process_market_definition(dict(MARKET_DEFINITION, version=2))
+        market_definition = self.cache._market_definition_resource
+        self.assertEqual(market_definition.runners, runners)
+
+
+class StreamingTest(unittest.TestCase):
+    def test_parity(self):
+        # patched classes match the bflw originals
+        patched = _market_books("tests/resources/BASIC-1.132153978")
+        originals = (
+            cache.MarketBook,
+            cache.RunnerBook,
+            cache.MarketDefinition,
+            cache.MarketBookCache._process_market_definition,
+        )
+        (
+            cache.MarketBook,
+            cache.RunnerBook,
+            cache.MarketDefinition,
+            cache.MarketBookCache._process_market_definition,
+        ) = (
+            bettingresources.MarketBook,
+            bettingresources.RunnerBook,
+            streamingresources.MarketDefinition,
+            patching._process_market_definition,
+        )
+        try:
+            market_books = _market_books("tests/resources/BASIC-1.132153978")
+        finally:
+            (
+                cache.MarketBook,
+                cache.RunnerBook,
+                cache.MarketDefinition,
+                cache.MarketBookCache._process_market_definition,
+            ) = originals
+        self.assertEqual(len(patched), len(market_books))
+        for patched_book, market_book in zip(patched, market_books):
+            self.assertIsInstance(patched_book, patching.MarketBook)
+            self.assertEqual(patched_book._data, market_book._data)
+            self.assertEqual(patched_book.publish_time, market_book.publish_time)
+            self.assertEqual(patched_book.status, market_book.status)
+            for patched_runner, runner in zip(
+                patched_book.runners, market_book.runners
+            ):
+                self.assertEqual(patched_runner.selection_id, runner.selection_id)
+                self.assertEqual(
+                    patched_runner.last_price_traded, runner.last_price_traded
+                )
+                self.assertEqual(
+                    patched_runner.ex.available_to_back, runner.ex.available_to_back
+                )
+            patched_definition = patched_book.market_definition
+            market_definition = market_book.market_definition
+            self.assertEqual(patched_definition.status, market_definition.status)
+            self.assertEqual(
+                patched_definition.market_time, market_definition.market_time
+            )
+            self.assertEqual(
+                [(r.selection_id, r.status) for r in patched_definition.runners],
+                [(r.selection_id, r.status) for r in market_definition.runners],
+            )
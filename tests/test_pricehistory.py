@@ -0,0 +1,89 @@
+import unittest
+from unittest import mock
+
+from flumine.markets import pricehistory
+from flumine.markets.pricehistory import PriceHistory, RunnerPriceHistory
+from flumine.exceptions import FlumineException
+
+
+def create_runner(selection_id=123, back=1.5, lay=1.6, ltp=1.55, tv=10):
+    runner = mock.Mock(
+        selection_id=selection_id,
+        handicap=0,
+        last_price_traded=ltp,
+        total_matched=tv,
+    )
+    runner.ex.available_to_back = [{"price": back, "size": 2}] if back else []
+    runner.ex.available_to_lay = [{"price": lay, "size": 3}] if lay else []
+    return runner
+
+
+@unittest.skipIf(pricehistory.np is None, "numpy not installed")
+class RunnerPriceHistoryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.history = RunnerPriceHistory(123, 0, 3)
+
+    def test_init(self):
+        self.assertEqual(self.history.selection_id, 123)
+        self.assertEqual(self.history.handicap, 0)
+        self.assertEqual(self.history.depth, 3)
+        self.assertEqual(self.history._data.shape, (6, len(pricehistory.FIELDS)))
+        self.assertEqual(len(self.history), 0)
+        self.assertEqual(len(self.history.window()), 0)
+
+    def test_update(self):
+        self.history.update(1, create_runner(back=None, ltp=None))
+        row = self.history.window()[0]
+        self.assertEqual(row[pricehistory.PUBLISH_TIME], 1)
+        self.assertTrue(pricehistory.np.isnan(row[pricehistory.BACK_PRICE]))
+        self.assertEqual(row[pricehistory.LAY_PRICE], 1.6)
+        self.assertEqual(row[pricehistory.LAY_SIZE], 3)
+        self.assertTrue(pricehistory.np.isnan(row[pricehistory.LTP]))
+        self.assertEqual(row[pricehistory.TOTAL_MATCHED], 10)
+
+    def test_window_wraps(self):
+        for i in range(5):
+            self.history.update(i, create_runner(back=1 + i))
+        self.assertEqual(len(self.history), 3)
+        self.assertEqual(self.history.publish_time().tolist(), [2, 3, 4])
+        self.assertEqual(self.history.back_price(2).tolist(), [4, 5])
+        self.assertEqual(self.history.window(10).shape[0], 3)
+        # view not copy
+        self.assertIs(self.history.window().base, self.history._data)
+
+    def test_fields(self):
+        self.history.update(1, create_runner())
+        self.assertEqual(self.history.back_size().tolist(), [2])
+        self.assertEqual(self.history.lay_price().tolist(), [1.6])
+        self.assertEqual(self.history.lay_size().tolist(), [3])
+        self.assertEqual(self.history.last_price_traded().tolist(), [1.55])
+        self.assertEqual(self.history.total_matched().tolist(), [10])
+
+
+@unittest.skipIf(pricehistory.np is None, "numpy not installed")
+class PriceHistoryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.history = PriceHistory("1.123", 5)
+
+    def test_init(self):
+        self.assertEqual(self.history.market_id, "1.123")
+        self.assertEqual(self.history.depth, 5)
+        self.assertIsNone(self.history.publish_time)
+        self.assertEqual(len(self.history), 0)
+
+    @mock.patch("flumine.markets.pricehistory.np", None)
+    def test_init_no_numpy(self):
+        with self.assertRaises(FlumineException):
+            PriceHistory("1.123")
+
+    def test_update(self):
+        mock_market_book = mock.Mock(
+            publish_time_epoch=1, runners=[create_runner(1), create_runner(2)]
+        )
+        self.history.update(mock_market_book)
+        self.history.update(mock_market_book)  # duplicate publish time ignored
+        self.assertEqual(self.history.publish_time, 1)
+        self.assertEqual(len(self.history), 2)
+        self.assertEqual(len(self.history.runner(1)), 1)
+        self.assertIsNone(self.history.runner(3))
+        self.assertEqual(len([r for r in self.history]), 2)
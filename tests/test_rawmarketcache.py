@@ -0,0 +1,74 @@
+import unittest
+
+from flumine.strategy.rawmarketcache import RawMarketCache
+
+
+class RawMarketCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = RawMarketCache("1.123", fields=("ltp", "atb", "batl", "trd"))
+
+    def test_init(self):
+        self.assertEqual(self.cache.market_id, "1.123")
+        self.assertEqual(self.cache.fields, ("ltp", "atb", "batl", "trd"))
+        self.assertIsNone(self.cache.publish_time)
+        self.assertIsNone(self.cache.market_definition)
+        self.assertIsNone(self.cache.total_matched)
+        self.assertEqual(self.cache.runners, {})
+        self.assertIsNone(self.cache.status)
+        self.assertFalse(self.cache.closed)
+
+    def test_update(self):
+        self.cache.update(
+            1,
+            {
+                "id": "1.123",
+                "img": True,
+                "tv": 10,
+                "marketDefinition": {"status": "OPEN"},
+                "rc": [
+                    {
+                        "id": 1,
+                        "ltp": 2.0,
+                        "tv": 10,
+                        "atb": [[2.0, 10], [1.99, 5]],
+                        "batl": [[0, 2.02, 3]],
+                        "trd": [[2.0, 10]],
+                    }
+                ],
+            },
+        )
+        self.assertEqual(self.cache.publish_time, 1)
+        self.assertEqual(self.cache.total_matched, 10)
+        self.assertEqual(self.cache.status, "OPEN")
+        self.assertEqual(
+            self.cache.runners,
+            {
+                (1, 0): {
+                    "ltp": 2.0,
+                    "atb": {2.0: 10, 1.99: 5},
+                    "batl": {0: (2.02, 3)},
+                    "trd": {2.0: 10},
+                }
+            },
+        )
+        self.cache.update(
+            2,
+            {
+                "id": "1.123",
+                "marketDefinition": {"status": "CLOSED"},
+                "rc": [
+                    {"id": 1, "atb": [[2.0, 0]], "batl": [[0, 2.02, 0]], "trd": []},
+                    {"id": 2, "hc": 1, "ltp": 3.0},
+                ],
+            },
+        )
+        self.assertTrue(self.cache.closed)
+        self.assertEqual(
+            self.cache.runners,
+            {
+                (1, 0): {"ltp": 2.0, "atb": {1.99: 5}, "batl": {}, "trd": {}},
+                (2, 1): {"ltp": 3.0},
+            },
+        )
+        self.cache.update(3, {"id": "1.123", "img": True})
+        self.assertEqual(self.cache.runners, {})
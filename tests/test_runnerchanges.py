@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from flumine.markets import runnerchanges
+
+
+class RunnerChangesTest(unittest.TestCase):
+    def test_get_runner_changes_none(self):
+        self.assertEqual(runnerchanges.get_runner_changes(None), {})
+
+    def test_get_runner_changes_snap(self):
+        mock_market_book = mock.Mock(streaming_snap=True)
+        self.assertEqual(runnerchanges.get_runner_changes(mock_market_book), {})
+
+    def test_get_runner_changes_no_update(self):
+        mock_market_book = mock.Mock(
+            streaming_snap=False,
+            streaming_update=None,
+            runners=[mock.Mock(selection_id=1, handicap=0)],
+        )
+        self.assertEqual(
+            runnerchanges.get_runner_changes(mock_market_book),
+            {(1, 0): set(runnerchanges.ALL_CHANGES)},
+        )
+
+    def test_get_runner_changes(self):
+        mock_market_book = mock.Mock(
+            streaming_snap=False,
+            streaming_update={
+                "id": "1.123",
+                "rc": [
+                    {"id": 1, "atb": [[1.01, 2]], "ltp": 1.02},
+                    {"id": 2, "hc": 1.5, "trd": [[1.01, 2]], "tv": 2, "spn": 2},
+                    {"id": 3},
+                ],
+            },
+        )
+        self.assertEqual(
+            runnerchanges.get_runner_changes(mock_market_book),
+            {
+                (1, 0): {runnerchanges.LADDER, runnerchanges.LTP},
+                (2, 1.5): {runnerchanges.TRADED, runnerchanges.SP},
+            },
+        )
+
+    def test_get_runner_changes_status(self):
+        mock_previous = mock.Mock(
+            runners=[
+                mock.Mock(selection_id=1, handicap=0, status="ACTIVE"),
+                mock.Mock(selection_id=2, handicap=0, status="ACTIVE"),
+            ]
+        )
+        mock_market_book = mock.Mock(
+            streaming_snap=False,
+            streaming_update={"id": "1.123", "marketDefinition": {}},
+            runners=[
+                mock.Mock(selection_id=1, handicap=0, status="ACTIVE"),
+                mock.Mock(selection_id=2, handicap=0, status="REMOVED"),
+            ],
+        )
+        self.assertEqual(
+            runnerchanges.get_runner_changes(mock_market_book, mock_previous),
+            {(2, 0): {runnerchanges.STATUS}},
+        )
@@ -2,6 +2,7 @@ import unittest
 from unittest import mock
 
 from flumine.strategy import strategy
+from flumine.metrics import StrategyMetrics
 from flumine.strategy.runnercontext import RunnerContext
 
 
@@ -102,8 +103,15 @@ class BaseStrategyTest(unittest.TestCase):
         self.assertEqual(self.strategy.context, {"trigger": 0.123})
         self.assertEqual(self.strategy.max_selection_exposure, 1)
         self.assertEqual(self.strategy.max_order_exposure, 2)
+        self.assertIsNone(self.strategy.stream_shards)
         self.assertIsNone(self.strategy.clients)
         self.assertEqual(self.strategy.streams, [])
+        self.assertEqual(self.strategy.local_market_filters, {})
+        self.assertIsNone(self.strategy.min_update_interval)
+        self.assertEqual(self.strategy._conflation_times, {})
+        self.assertEqual(self.strategy._conflation_pending, {})
+        self.assertTrue(self.strategy.critical)
+        self.assertIsInstance(self.strategy.metrics, StrategyMetrics)
         self.assertEqual(self.strategy.name_hash, "a94a8fe5ccb19")
         self.assertEqual(strategy.STRATEGY_NAME_HASH_LENGTH, 13)
         self.assertEqual(
@@ -141,9 +149,50 @@ class BaseStrategyTest(unittest.TestCase):
     def test_process_closed_market(self):
         self.strategy.process_closed_market(None, None)
 
+    def test_process_raw_data(self):
+        self.strategy.process_raw_data("AAA", 123, {"id": "1.123"})
+
+    def test_process_load_shedding(self):
+        self.strategy.process_load_shedding(True)
+
     def test_finish(self):
         self.strategy.finish(mock.Mock())
 
+    def test_market_filter_match(self):
+        mock_market_book = mock.Mock(streaming_unique_id=1000)
+        self.assertTrue(self.strategy.market_filter_match(mock_market_book))
+        mock_predicate = mock.Mock(return_value=False)
+        mock_stream = mock.Mock(stream_id=1000)
+        self.strategy.local_market_filters = {mock_stream: mock_predicate}
+        self.assertFalse(self.strategy.market_filter_match(mock_market_book))
+        mock_predicate.assert_called_with(mock_market_book)
+        # stream_id updated on subscribe
+        mock_stream.stream_id = 1001
+        self.assertTrue(self.strategy.market_filter_match(mock_market_book))
+        mock_market_book.streaming_unique_id = 1001
+        self.assertFalse(self.strategy.market_filter_match(mock_market_book))
+
+    def test_conflate_market_book(self):
+        self.strategy.min_update_interval = 0.5
+        market_books = [
+            mock.Mock(market_id="1.1", publish_time_epoch=t)
+            for t in (1000, 1100, 1200, 1600)
+        ]
+        self.assertTrue(self.strategy.conflate_market_book(market_books[0]))
+        self.assertFalse(self.strategy.conflate_market_book(market_books[1]))
+        self.assertFalse(self.strategy.conflate_market_book(market_books[2]))
+        self.assertEqual(self.strategy._conflation_pending, {"1.1": market_books[2]})
+        self.assertEqual(self.strategy.conflated_market_books(1400), [])
+        self.assertEqual(self.strategy.conflated_market_books(1500), [market_books[2]])
+        self.assertEqual(self.strategy._conflation_pending, {})
+        self.assertFalse(self.strategy.conflate_market_book(market_books[3]))
+        self.assertTrue(
+            self.strategy.conflate_market_book(
+                mock.Mock(market_id="1.1", publish_time_epoch=2000)
+            )
+        )
+        self.assertEqual(self.strategy._conflation_pending, {})
+
     def test_remove_market(self):
         self.strategy._invested = {
             ("1.23", 456): 1,
@@ -186,6 +235,9 @@ class BaseStrategyTest(unittest.TestCase):
                 "context": {"trigger": 0.123},
                 "max_order_exposure": 2,
                 "max_selection_exposure": 1,
+                "stream_shards": None,
+                "min_update_interval": None,
+                "critical": True,
             },
         )
 
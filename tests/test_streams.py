@@ -1,10 +1,21 @@
+import os
+import gzip
+import json
+import queue
+import pickle
+import shutil
+import tempfile
 import unittest
+import uuid
 from unittest import mock
 
+import betfairlightweight
+
 from flumine.streams import streams, datastream
 from flumine.streams.basestream import BaseStream
 from flumine.streams.simulatedorderstream import CurrentOrders
-from flumine.streams import orderstream
+from flumine.streams import orderstream, decoder, listener, recorder, sharding
+from flumine.streams import marketfilter, metrics, standby, relay, parsing
 
 
 class StreamsTest(unittest.TestCase):
@@ -71,7 +82,13 @@ class StreamsTest(unittest.TestCase):
 
     @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
     def test_add_stream_new(self, mock_increment):
-        mock_strategy = mock.Mock(market_filter={}, sports_data_filter=[])
+        mock_strategy = mock.Mock(
+            market_filter={},
+            market_data_filter=None,
+            sports_data_filter=[],
+            stream_shards=None,
+            local_market_filters={},
+        )
         mock_stream_class = mock.Mock()
         mock_strategy.stream_class = mock_stream_class
 
@@ -89,7 +106,13 @@ class StreamsTest(unittest.TestCase):
 
     @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
     def test_add_stream_none(self, mock_increment):
-        mock_strategy = mock.Mock(market_filter=None, sports_data_filter=[])
+        mock_strategy = mock.Mock(
+            market_filter=None,
+            market_data_filter=None,
+            sports_data_filter=[],
+            stream_shards=None,
+            local_market_filters={},
+        )
         mock_stream_class = mock.Mock()
         mock_strategy.stream_class = mock_stream_class
 
@@ -107,15 +130,171 @@ class StreamsTest(unittest.TestCase):
 
     @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
     def test_add_stream_multi(self, mock_increment):
+        mock_increment.side_effect = [1000, 2000]
         mock_strategy = mock.Mock(
             market_filter=[{1: 2}, {3: 4}],
+            market_data_filter=None,
             stream_class=streams.MarketStream,
             sports_data_filter=[],
+            stream_shards=None,
         )
         self.streams.add_stream(mock_strategy)
         self.assertEqual(len(self.streams), 2)
         mock_increment.assert_called_with()
 
+    @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
+    def test_add_stream_sharded(self, mock_increment):
+        mock_increment.side_effect = [1000, 2000]
+        mock_strategy = mock.Mock(
+            market_filter={"countryCodes": ["GB", "IE", "FR"], "marketTypes": ["WIN"]},
+            stream_class=streams.MarketStream,
+            stream_shards=2,
+        )
+        self.streams.add_stream(mock_strategy)
+        self.assertEqual(len(self.streams), 2)
+        self.assertEqual(
+            [s.market_filter for s in self.streams],
+            [
+                {"countryCodes": ["GB", "FR"], "marketTypes": ["WIN"]},
+                {"countryCodes": ["IE"], "marketTypes": ["WIN"]},
+            ],
+        )
+
+    @mock.patch("flumine.streams.streams.config.merge_market_filters", True)
+    @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
+    def test_add_stream_merged(self, mock_increment):
+        mock_increment.side_effect = [1000, 2000]
+        market_data_filter = {"fields": ["EX_MARKET_DEF", "EX_LTP"]}
+        mock_strategy_one = mock.Mock(
+            market_filter={"eventTypeIds": ["7"], "marketTypes": ["WIN"]},
+            market_data_filter=market_data_filter,
+            stream_class=streams.MarketStream,
+            streaming_timeout=None,
+            conflate_ms=None,
+            stream_shards=None,
+            streams=[],
+            local_market_filters={},
+        )
+        mock_strategy_two = mock.Mock(
+            market_filter={"eventTypeIds": ["4339"], "marketTypes": ["WIN"]},
+            market_data_filter=market_data_filter,
+            stream_class=streams.MarketStream,
+            streaming_timeout=None,
+            conflate_ms=None,
+            stream_shards=None,
+            streams=[],
+            local_market_filters={},
+        )
+        mock_strategy_three = mock.Mock(
+            market_filter={"eventTypeIds": ["7"], "marketTypes": ["WIN"]},
+            market_data_filter=market_data_filter,
+            stream_class=streams.MarketStream,
+            streaming_timeout=None,
+            conflate_ms=None,
+            stream_shards=None,
+            streams=[],
+            local_market_filters={},
+        )
+        self.streams.add_stream(mock_strategy_one)
+        self.streams.add_stream(mock_strategy_two)
+        self.streams.add_stream(mock_strategy_three)
+        self.assertEqual(len(self.streams), 1)
+        stream = self.streams._streams[0]
+        self.assertEqual(
+            stream.market_filter,
+            {"eventTypeIds": ["7", "4339"], "marketTypes": ["WIN"]},
+        )
+        for mock_strategy in (mock_strategy_one, mock_strategy_two):
+            self.assertEqual(mock_strategy.streams, [stream])
+            self.assertIn(stream, mock_strategy.local_market_filters)
+        predicate = mock_strategy_two.local_market_filters[stream]
+        mock_market_book = mock.Mock()
+        mock_market_book.market_definition.event_type_id = "4339"
+        mock_market_book.market_definition.market_type = "WIN"
+        self.assertTrue(predicate(mock_market_book))
+        self.assertFalse(
+            mock_strategy_one.local_market_filters[stream](mock_market_book)
+        )
+        self.assertFalse(
+            mock_strategy_three.local_market_filters[stream](mock_market_book)
+        )
+
+    @mock.patch("flumine.streams.streams.config.merge_market_filters", True)
+    @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
+    def test_add_stream_merged_same_strategy(self, mock_increment):
+        mock_increment.side_effect = [1000, 2000]
+        mock_strategy = mock.Mock(
+            market_filter=[
+                {"eventTypeIds": ["7"], "countryCodes": ["GB"]},
+                {"eventTypeIds": ["7"], "countryCodes": ["IE"]},
+            ],
+            market_data_filter={"fields": ["EX_MARKET_DEF"]},
+            stream_class=streams.MarketStream,
+            streaming_timeout=None,
+            conflate_ms=None,
+            stream_shards=None,
+            streams=[],
+            local_market_filters={},
+        )
+        self.streams.add_stream(mock_strategy)
+        self.assertEqual(len(self.streams), 1)
+        stream = self.streams._streams[0]
+        self.assertEqual(
+            stream.market_filter, {"eventTypeIds": ["7"], "countryCodes": ["GB", "IE"]}
+        )
+        self.assertEqual(
+            self.streams.strategy_market_filters(stream),
+            {mock_strategy: mock_strategy.market_filter},
+        )
+        predicate = mock_strategy.local_market_filters[stream]
+        mock_market_book = mock.Mock()
+        mock_market_book.market_definition.event_type_id = "7"
+        for country_code, match in (("GB", True), ("IE", True), ("FR", False)):
+            mock_market_book.market_definition.country_code = country_code
+            self.assertEqual(predicate(mock_market_book), match)
+
+    @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
+    def test_add_stream_merged_disabled(self, mock_increment):
+        mock_increment.side_effect = [1000, 2000]
+        for event_type_id in ("7", "4339"):
+            mock_strategy = mock.Mock(
+                market_filter={"eventTypeIds": [event_type_id]},
+                market_data_filter={"fields": ["EX_MARKET_DEF"]},
+                stream_class=streams.MarketStream,
+                stream_shards=None,
+            )
+            self.streams.add_stream(mock_strategy)
+        self.assertEqual(len(self.streams), 2)
+
+    @mock.patch("flumine.streams.streams.config.merge_market_filters", True)
+    @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
+    def test_add_stream_merged_started(self, mock_increment):
+        mock_increment.side_effect = [1000, 2000]
+        for event_type_id in ("7", "4339"):
+            mock_strategy = mock.Mock(
+                market_filter={"eventTypeIds": [event_type_id]},
+                market_data_filter={"fields": ["EX_MARKET_DEF"]},
+                stream_class=streams.MarketStream,
+                streaming_timeout=None,
+                conflate_ms=None,
+                stream_shards=None,
+            )
+            with mock.patch.object(streams.MarketStream, "is_alive", return_value=True):
+                self.streams.add_stream(mock_strategy)
+        self.assertEqual(len(self.streams), 2)
+
+    def test_live_market_counts(self):
+        mock_stream = mock.Mock(stream_id=1, live_market_count=12)
+        self.streams._streams = [mock_stream]
+        self.assertEqual(self.streams.live_market_counts, {1: 12})
+
+    def test_metrics(self):
+        mock_stream = mock.Mock(stream_id=1)
+        self.streams._streams = [mock_stream]
+        self.assertEqual(
+            self.streams.metrics(), {1: mock_stream.metrics_snapshot.return_value}
+        )
+
     @mock.patch("flumine.streams.streams.Streams._increment_stream_id")
     def test_add_stream_old(self, mock_increment):
         mock_strategy = mock.Mock(
@@ -125,6 +304,7 @@ class StreamsTest(unittest.TestCase):
             conflate_ms=4,
             market_filter={},
             sports_data_filter=[],
+            stream_shards=None,
         )
         stream = mock.Mock(
             spec=streams.MarketStream,
@@ -250,6 +430,25 @@ class TestBaseStream(unittest.TestCase):
         self.stream._client = None
         self.assertEqual(self.stream.client, self.mock_flumine.clients.get_default())
 
+    def test_live_market_count(self):
+        self.assertEqual(self.stream.live_market_count, 0)
+        self.stream._listener.register_stream(0, "marketSubscription")
+        self.stream._listener.stream._caches = {"1.1": 1}
+        self.assertEqual(self.stream.live_market_count, 1)
+
+    def test_metrics(self):
+        self.assertIsInstance(self.stream.metrics, metrics.StreamMetrics)
+        self.assertEqual(self.stream._listener.metrics, self.stream.metrics)
+
+    def test_metrics_snapshot(self):
+        self.stream._output_queue = queue.Queue()
+        self.stream._output_queue.put(1)
+        snapshot = self.stream.metrics_snapshot()
+        self.assertEqual(snapshot["stream_type"], "BaseStream")
+        self.assertEqual(snapshot["output_queue_size"], 1)
+        self.assertEqual(snapshot["live_markets"], 0)
+        self.assertEqual(snapshot["messages"], 0)
+
     def test_stream_running(self):
         self.assertFalse(self.stream.stream_running)
         mock_stream = mock.Mock(running=True)
@@ -272,12 +471,58 @@ class TestMarketStream(unittest.TestCase):
         self.assertEqual(self.stream.streaming_timeout, 0.01)
         self.assertEqual(self.stream.conflate_ms, 100)
         self.assertIsNone(self.stream._stream)
+        self.assertEqual(self.stream._updated_market_ids, set())
+
+    def test__snap_market_books(self):
+        self.stream._listener = mock.Mock()
+        self.mock_flumine.markets.markets = {
+            "1.1": mock.Mock(status="OPEN"),
+            "1.2": mock.Mock(status="CLOSED"),
+        }
+        self.stream._updated_market_ids = {"1.1", "1.2", "1.3"}
+        self.assertEqual(
+            self.stream._snap_market_books(), self.stream._listener.snap.return_value
+        )
+        self.stream._listener.snap.assert_called_with(market_ids=["1.1"])
+        self.assertEqual(self.stream._updated_market_ids, set())
+        # nothing updated
+        self.stream._listener.snap.reset_mock()
+        self.assertEqual(self.stream._snap_market_books(), [])
+        self.stream._listener.snap.assert_not_called()
+
+    def test__snap_market_books_heartbeat(self):
+        self.stream._listener = mock.Mock()
+        self.mock_flumine.markets.open_market_ids = ["1.1", "1.2"]
+        self.stream._last_heartbeat -= self.stream.SNAP_HEARTBEAT
+        self.stream._snap_market_books()
+        self.stream._listener.snap.assert_called_with(market_ids=["1.1", "1.2"])
+
+    @mock.patch("flumine.streams.marketstream.config.latency_budget", 1)
+    @mock.patch("flumine.streams.marketstream.MarketStream.is_alive")
+    def test_handle_output(self, mock_is_alive):
+        mock_is_alive.side_effect = [True, False]
+        market_books = [mock.Mock(market_id="1.1")]
+        self.stream._output_queue = mock.Mock()
+        self.stream._output_queue.get.return_value = market_books
+        self.stream.handle_output()
+        self.assertEqual(self.stream._updated_market_ids, {"1.1"})
+        self.mock_flumine.load_shedder.record.assert_called_with(market_books)
+        event = self.mock_flumine.handler_queue.put.call_args[0][0]
+        self.assertEqual(event.event, market_books)
+        self.assertEqual(self.stream.metrics.market_books, 1)
+
+    @mock.patch("flumine.streams.marketstream.MarketStream.is_alive")
+    def test_handle_output_no_latency_budget(self, mock_is_alive):
+        mock_is_alive.side_effect = [True, False]
+        market_books = [mock.Mock(market_id="1.1")]
+        self.stream._output_queue = mock.Mock()
+        self.stream._output_queue.get.return_value = market_books
+        self.stream.handle_output()
+        self.mock_flumine.load_shedder.record.assert_not_called()
+        self.mock_flumine.handler_queue.put.assert_called_once()
 
     # def test_run(self):
     #     pass
-    #
-    # def test_handle_output(self):
-    #     pass
 
 
 class TestDataStream(unittest.TestCase):
@@ -400,9 +645,34 @@ class TestOrderStream(unittest.TestCase):
 
     # def test_run(self):
     #     pass
-    #
-    # def test_handle_output(self):
-    #     pass
+
+    @mock.patch("flumine.streams.orderstream.OrderStream.is_alive")
+    def test_handle_output(self, mock_is_alive):
+        mock_is_alive.side_effect = [True, True, False]
+        mock_order_book = mock.Mock()
+        self.stream._output_queue = mock.Mock()
+        self.stream._output_queue.get.side_effect = [queue.Empty, [mock_order_book]]
+        self.mock_flumine.markets.live_orders = False
+        self.stream.handle_output()
+        # no live orders, idle wait and no event
+        self.stream._output_queue.get.assert_called_with(
+            block=True, timeout=orderstream.SNAP_DELTA
+        )
+        self.mock_flumine.handler_queue.put.assert_called_once()
+        event = self.mock_flumine.handler_queue.put.call_args[0][0]
+        self.assertEqual(event.event, [mock_order_book])
+        self.assertEqual(mock_order_book.client, self.stream.client)
+
+    @mock.patch("flumine.streams.orderstream.OrderStream.is_alive")
+    def test_handle_output_live_orders(self, mock_is_alive):
+        mock_is_alive.side_effect = [True, False]
+        self.stream._output_queue = mock.Mock()
+        self.stream._output_queue.get.side_effect = queue.Empty
+        self.mock_flumine.markets.live_orders = True
+        self.stream.handle_output()
+        self.stream._output_queue.get.assert_called_with(block=True, timeout=0.01)
+        event = self.mock_flumine.handler_queue.put.call_args[0][0]
+        self.assertEqual(event.event, [])
 
 
 class TestSimulatedOrderStream(unittest.TestCase):
@@ -435,3 +705,855 @@ class TestSimulatedOrderStream(unittest.TestCase):
         mock_market.blotter.client_orders.return_value = [order_one]
         self.stream.flumine.markets = [mock_market, mock.Mock(closed=True)]
         self.assertEqual(self.stream._get_current_orders(), [order_one])
+
+
+class TestDecoder(unittest.TestCase):
+    def test_get_decoder(self):
+        self.assertEqual(decoder.get_decoder("json")('{"a": 1}'), {"a": 1})
+
+    def test_get_decoder_default(self):
+        self.assertEqual(decoder.get_decoder()('{"a": 1}'), {"a": 1})
+
+    @mock.patch("flumine.streams.decoder.config")
+    def test_get_decoder_config(self, mock_config):
+        mock_config.stream_decoder = "json"
+        self.assertEqual(decoder.get_decoder(), decoder.json.loads)
+
+    @mock.patch.dict(decoder.DECODERS, {"missing": mock.Mock(side_effect=ImportError)})
+    def test_get_decoder_unavailable(self):
+        self.assertEqual(decoder.get_decoder("missing"), decoder.json.loads)
+
+    def test_available_decoders(self):
+        self.assertIn("json", decoder.available_decoders())
+
+
+class TestFlumineStreamListener(unittest.TestCase):
+    def setUp(self) -> None:
+        self.listener = listener.FlumineStreamListener(decoder="json")
+
+    def test_init(self):
+        self.assertEqual(self.listener.decoder, decoder.json.loads)
+
+    def test_on_data_value_error(self):
+        self.assertIsNone(self.listener.on_data("{"))
+
+    @mock.patch("flumine.streams.listener.FlumineStreamListener._on_connection")
+    def test_on_data_connection(self, mock_on_connection):
+        self.listener.on_data('{"op": "connection", "connectionId": "1"}')
+        mock_on_connection.assert_called_with(
+            {"op": "connection", "connectionId": "1"}, None
+        )
+
+    @mock.patch("flumine.streams.listener.FlumineStreamListener._on_status")
+    def test_on_data_status(self, mock_on_status):
+        self.listener.on_data('{"op": "status", "id": 1}')
+        mock_on_status.assert_called_with({"op": "status", "id": 1}, 1)
+
+    @mock.patch("flumine.streams.listener.FlumineStreamListener._on_change_message")
+    def test_on_data_change_message(self, mock_on_change_message):
+        self.listener.stream_unique_id = 1
+        self.listener.on_data('{"op": "mcm", "id": 1}')
+        mock_on_change_message.assert_called_with({"op": "mcm", "id": 1}, 1)
+        mock_on_change_message.reset_mock()
+        self.listener.on_data('{"op": "mcm", "id": 2}')
+        mock_on_change_message.assert_not_called()
+
+    def test_on_data_error(self):
+        self.assertFalse(
+            self.listener.on_data(
+                '{"op": "status", "statusCode": "FAILURE", "connectionClosed": true}'
+            )
+        )
+
+    @mock.patch("flumine.streams.listener.FlumineStreamListener._on_change_message")
+    def test_on_data_parse_processes(self, mock_on_change_message):
+        self.listener.parse_processes = 1
+        self.listener.parser = mock.Mock()
+        raw_data = '{"op":"mcm","id":0,"pt":123}'
+        self.listener.on_data(raw_data)
+        self.listener.parser.put.assert_called_with(raw_data)
+        mock_on_change_message.assert_not_called()
+        # other operations are processed inline
+        self.listener.on_data('{"op":"status","id":1}')
+        self.assertEqual(self.listener.parser.put.call_count, 1)
+
+    def test_on_data_parse_processes_bytes(self):
+        self.listener.parse_processes = 1
+        self.listener.parser = mock.Mock()
+        raw_data = b'{"op":"mcm","id":0,"pt":123}'
+        self.listener.on_data(raw_data)
+        self.listener.parser.put.assert_called_with(raw_data)
+        self.listener.on_data(b'{"op":"status","id":1}')
+        self.assertEqual(self.listener.parser.put.call_count, 1)
+
+    @mock.patch("flumine.streams.listener.FlumineStreamListener._on_change_message")
+    def test__on_parsed_error(self, mock_on_change_message):
+        self.listener.parse_processes = 1
+        self.listener.parser = mock.Mock()
+        raw_data = '{"op":"mcm","statusCode":"FAILURE","connectionClosed":true}'
+        self.listener._parsed_generations.extend([0, 0])
+        self.listener._on_parsed(
+            raw_data, {"op": "mcm", "statusCode": "FAILURE", "connectionClosed": True}
+        )
+        self.assertEqual(self.listener.parse_error, raw_data)
+        # later messages are dropped
+        self.listener._on_parsed(raw_data, {"op": "mcm", "id": 0})
+        mock_on_change_message.assert_not_called()
+        # failure is returned to the socket
+        self.assertFalse(self.listener.on_data('{"op":"mcm","id":0}'))
+        self.listener.parser.put.assert_not_called()
+        self.assertIsNone(self.listener.parse_error)
+
+    @mock.patch("flumine.streams.listener.FlumineStreamListener._on_change_message")
+    def test__on_parsed(self, mock_on_change_message):
+        self.listener.stream_unique_id = 0
+        self.listener._parsed_generations.extend([0, 0])
+        raw_data = '{"op":"mcm","id":0,"pt":123}'
+        self.listener._on_parsed(raw_data, {"op": "mcm", "id": 0, "pt": 123})
+        mock_on_change_message.assert_called_with({"op": "mcm", "id": 0, "pt": 123}, 0)
+        mock_on_change_message.reset_mock()
+        self.listener._on_parsed("{", None)
+        mock_on_change_message.assert_not_called()
+
+    @mock.patch("flumine.streams.listener.FlumineStreamListener._on_change_message")
+    def test__on_parsed_reconnect(self, mock_on_change_message):
+        self.listener.parse_processes = 1
+        self.listener.parser = mock.Mock()
+        self.listener.register_stream(0, "marketSubscription")
+        raw_data = '{"op":"mcm","id":0,"pt":123}'
+        data = {"op": "mcm", "id": 0, "pt": 123}
+        self.listener.on_data(raw_data)
+        self.listener.parse_error = raw_data
+        # reconnect before the pool returns the message
+        self.listener.register_stream(0, "marketSubscription")
+        self.assertIsNone(self.listener.parse_error)
+        self.listener._on_parsed(raw_data, data)
+        mock_on_change_message.assert_not_called()
+        self.listener.on_data(raw_data)
+        self.listener._on_parsed(raw_data, data)
+        mock_on_change_message.assert_called_with(data, 0)
+        self.assertEqual(len(self.listener._parsed_generations), 0)
+
+    def test_close(self):
+        mock_parser = mock.Mock()
+        self.listener.parser = mock_parser
+        self.listener.close()
+        mock_parser.close.assert_called_with()
+        self.assertIsNone(self.listener.parser)
+
+    @mock.patch("flumine.streams.listener.FlumineStreamListener._on_change_message")
+    def test_on_data_metrics(self, mock_on_change_message):
+        self.listener.metrics = mock.Mock()
+        raw_data = '{"op": "mcm", "id": 0, "pt": 123}'
+        self.listener.on_data(raw_data)
+        self.listener.metrics.on_message.assert_called_with(raw_data, 123)
+
+
+class TestStreamMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metrics = metrics.StreamMetrics()
+
+    def test_init(self):
+        self.assertEqual(self.metrics.messages, 0)
+        self.assertEqual(self.metrics.bytes, 0)
+        self.assertEqual(self.metrics.market_books, 0)
+        self.assertEqual(self.metrics.snaps, 0)
+        self.assertEqual(self.metrics.connections, 0)
+        self.assertIsNone(self.metrics.lag)
+        self.assertIsNone(self.metrics.max_lag)
+
+    @mock.patch("flumine.streams.metrics.time.time", return_value=10)
+    def test_on_message(self, _):
+        self.metrics.on_message(b"abc", 8000)
+        self.metrics.on_message("abcd", 9500)
+        self.metrics.on_message("ab")
+        self.assertEqual(self.metrics.messages, 3)
+        self.assertEqual(self.metrics.bytes, 9)
+        self.assertEqual(self.metrics.lag, 0.5)
+        self.assertEqual(self.metrics.max_lag, 2)
+
+    def test_reconnects(self):
+        self.assertEqual(self.metrics.reconnects, 0)
+        self.metrics.connections = 3
+        self.assertEqual(self.metrics.reconnects, 2)
+
+    @mock.patch("flumine.streams.metrics.time.monotonic")
+    def test_snapshot(self, mock_monotonic):
+        mock_monotonic.return_value = 2
+        self.metrics._last_snapshot = (0, 0, 0, 0)
+        self.metrics.messages = 10
+        self.metrics.bytes = 1000
+        self.metrics.market_books = 4
+        self.metrics.max_lag = 0.1
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["messages_per_sec"], 5)
+        self.assertEqual(snapshot["bytes_per_sec"], 500)
+        self.assertEqual(snapshot["market_books_per_sec"], 2)
+        self.assertEqual(snapshot["max_lag"], 0.1)
+        self.assertIsNone(self.metrics.max_lag)
+        mock_monotonic.return_value = 4
+        self.metrics.messages = 12
+        self.assertEqual(self.metrics.snapshot()["messages_per_sec"], 1)
+
+
+class TestStreamRecorder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.recorder = recorder.StreamRecorder(self.directory, max_queue_size=2)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_init(self):
+        self.assertEqual(self.recorder.directory, self.directory)
+        self.assertEqual(self.recorder.compression, "gzip")
+        self.assertEqual(self.recorder.messages_dropped, 0)
+        self.assertEqual(self.recorder.queue_size, 0)
+
+    def test_init_unknown_compression(self):
+        with self.assertRaises(recorder.FlumineException):
+            recorder.StreamRecorder(self.directory, compression="lzma")
+
+    def test_put_full(self):
+        self.assertTrue(self.recorder.put("1", 1, []))
+        self.assertTrue(self.recorder.put("2", 2, []))
+        self.assertFalse(self.recorder.put("3", 3, []))
+        self.assertEqual(self.recorder.messages_dropped, 1)
+
+    def test_process_flush_rotate(self):
+        self.recorder._process("1", 123, [{"id": "1.1", "rc": []}, {"id": "1.2"}])
+        self.assertEqual(self.recorder._batch_count, 2)
+        self.recorder._process(
+            "2", 124, [{"id": "1.1", "marketDefinition": {"status": "CLOSED"}}]
+        )
+        self.recorder.flush()
+        self.assertEqual(self.recorder.messages_written, 3)
+        self.assertEqual(self.recorder.files_rotated, 1)
+        self.assertEqual(list(self.recorder._files), ["1.2"])
+        with gzip.open(os.path.join(self.directory, "1.1.gz"), "rt") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(
+            lines[0], '{"op":"mcm","clk":"1","pt":123,"mc":[{"id":"1.1","rc":[]}]}'
+        )
+        self.assertEqual(len(lines), 2)
+
+    def test_run_stop(self):
+        self.recorder.start()
+        self.recorder.put("1", 123, [{"id": "1.1"}])
+        self.recorder.stop()
+        self.assertFalse(self.recorder.is_alive())
+        self.assertEqual(self.recorder.messages_written, 1)
+        self.assertEqual(self.recorder._files, {})
+
+    def test_flumine_market_stream_recorder(self):
+        mock_recorder = mock.Mock()
+        listener = datastream.FlumineListener(
+            output_queue=mock.Mock(), recorder=mock_recorder
+        )
+        stream = datastream.FlumineMarketStream(listener, 0)
+        stream._clk = "AAA"
+        stream._process([{"id": "1.123"}], 123)
+        mock_recorder.put.assert_called_with("AAA", 123, [{"id": "1.123"}])
+
+    def test_recorder_stream(self):
+        stream = datastream.RecorderStream(mock.Mock(), 123)
+        self.assertIsInstance(stream.recorder, recorder.StreamRecorder)
+        self.assertEqual(stream._listener.recorder, stream.recorder)
+        self.assertEqual(
+            stream.recorder.directory, datastream.RecorderStream.RECORDER_DIRECTORY
+        )
+
+
+class TestSharding(unittest.TestCase):
+    def test_shard_key(self):
+        self.assertEqual(
+            sharding.shard_key({"marketIds": ["1.1", "1.2"], "eventTypeIds": ["7"]}),
+            "marketIds",
+        )
+        self.assertEqual(
+            sharding.shard_key({"eventTypeIds": ["7", "4339"]}), "eventTypeIds"
+        )
+        self.assertIsNone(sharding.shard_key({"eventTypeIds": ["7"]}))
+        self.assertEqual(
+            sharding.shard_key({"countryCodes": ["GB", "IE"]}, "countryCodes"),
+            "countryCodes",
+        )
+        self.assertIsNone(sharding.shard_key({"countryCodes": ["GB"]}, "countryCodes"))
+
+    def test_shard_market_filter_none(self):
+        self.assertEqual(sharding.shard_market_filter(None, 2), [None])
+        self.assertEqual(sharding.shard_market_filter({"a": 1}, 1), [{"a": 1}])
+        self.assertEqual(sharding.shard_market_filter({"a": 1}, 2), [{"a": 1}])
+
+    def test_shard_market_filter_market_ids(self):
+        market_ids = ["1.%s" % i for i in range(100)]
+        market_filters = sharding.shard_market_filter({"marketIds": market_ids}, 3)
+        self.assertEqual(len(market_filters), 3)
+        self.assertEqual(
+            sorted(m for f in market_filters for m in f["marketIds"]),
+            sorted(market_ids),
+        )
+        for i, market_filter in enumerate(market_filters):
+            for market_id in market_filter["marketIds"]:
+                self.assertEqual(sharding.market_id_shard(market_id, 3), i)
+
+    def test_shard_market_filter_values(self):
+        market_filters = sharding.shard_market_filter(
+            {"countryCodes": ["GB", "IE", "FR", "US", "AU"], "eventTypeIds": ["7"]},
+            2,
+        )
+        self.assertEqual(
+            market_filters,
+            [
+                {"countryCodes": ["GB", "FR", "AU"], "eventTypeIds": ["7"]},
+                {"countryCodes": ["IE", "US"], "eventTypeIds": ["7"]},
+            ],
+        )
+        self.assertEqual(
+            sharding.shard_market_filter({"countryCodes": ["GB", "IE"]}, 3),
+            [{"countryCodes": ["GB"]}, {"countryCodes": ["IE"]}],
+        )
+
+
+class TestMarketFilter(unittest.TestCase):
+    def test_covers(self):
+        self.assertTrue(marketfilter.covers(None, {"eventTypeIds": ["7"]}))
+        self.assertFalse(marketfilter.covers({"eventTypeIds": ["7"]}, None))
+        self.assertTrue(
+            marketfilter.covers(
+                {"eventTypeIds": ["7", "4339"]},
+                {"eventTypeIds": ["7"], "marketTypes": ["WIN"]},
+            )
+        )
+        self.assertFalse(
+            marketfilter.covers(
+                {"eventTypeIds": ["7"], "marketTypes": ["WIN"]},
+                {"eventTypeIds": ["7"]},
+            )
+        )
+        self.assertTrue(
+            marketfilter.covers({"bspMarket": True}, {"bspMarket": True, "a": 1})
+        )
+        self.assertFalse(marketfilter.covers({"bspMarket": True}, {"bspMarket": False}))
+
+    def test_compile_market_filters(self):
+        predicate = marketfilter.compile_market_filters(
+            [{"marketIds": ["1.1"]}, {"marketIds": ["1.2"]}]
+        )
+        self.assertTrue(predicate(mock.Mock(market_id="1.1")))
+        self.assertTrue(predicate(mock.Mock(market_id="1.2")))
+        self.assertFalse(predicate(mock.Mock(market_id="1.3")))
+        predicate = marketfilter.compile_market_filters([{"marketIds": ["1.1"]}])
+        self.assertTrue(predicate(mock.Mock(market_id="1.1")))
+        self.assertFalse(predicate(mock.Mock(market_id="1.2")))
+
+    def test_merge_market_filters(self):
+        market_filter = {"eventTypeIds": ["7"], "countryCodes": ["GB"]}
+        self.assertEqual(
+            marketfilter.merge_market_filters(
+                market_filter, {"eventTypeIds": ["7"], "countryCodes": ["IE"]}
+            ),
+            {"eventTypeIds": ["7"], "countryCodes": ["GB", "IE"]},
+        )
+        self.assertEqual(
+            marketfilter.merge_market_filters(
+                market_filter, {**market_filter, "marketTypes": ["WIN"]}
+            ),
+            market_filter,
+        )
+        # would widen beyond both filters
+        self.assertIsNone(
+            marketfilter.merge_market_filters(
+                market_filter, {"eventTypeIds": ["4339"], "countryCodes": ["IE"]}
+            )
+        )
+        self.assertIsNone(
+            marketfilter.merge_market_filters(market_filter, {"eventTypeIds": ["1"]})
+        )
+        self.assertIsNone(
+            marketfilter.merge_market_filters({"bspMarket": True}, {"bspMarket": False})
+        )
+
+    def test_compile_market_filter(self):
+        predicate = marketfilter.compile_market_filter(
+            {
+                "marketIds": ["1.123"],
+                "eventTypeIds": ["7"],
+                "bspMarket": True,
+                "unknown": 1,
+            }
+        )
+        mock_market_book = mock.Mock(market_id="1.123")
+        mock_market_book.market_definition.event_type_id = "7"
+        mock_market_book.market_definition.bsp_market = True
+        self.assertTrue(predicate(mock_market_book))
+        mock_market_book.market_definition.bsp_market = False
+        self.assertFalse(predicate(mock_market_book))
+        mock_market_book.market_definition = None
+        self.assertFalse(predicate(mock_market_book))
+        mock_market_book.market_id = "1.456"
+        self.assertFalse(predicate(mock_market_book))
+        self.assertTrue(marketfilter.compile_market_filter(None)(mock_market_book))
+
+
+class TestHotStandby(unittest.TestCase):
+    def setUp(self) -> None:
+        self.output_queue = queue.Queue()
+        self.primary = standby.HotStandbyListener(
+            output_queue=self.output_queue, lightweight=True
+        )
+        self.primary.register_stream(1000, "marketSubscription")
+        self.standby = standby.StandbyListener(self.primary)
+        self.standby.register_stream(1500, "marketSubscription")
+
+    @staticmethod
+    def _mcm(unique_id: int, clk: str, pt: int, ltp: float, ct: str = None) -> str:
+        market_change = {"id": "1.1", "rc": [{"id": 123, "ltp": ltp}]}
+        if ct == "SUB_IMAGE":
+            market_change["img"] = True
+            market_change["marketDefinition"] = {"status": "OPEN", "runners": []}
+        data = {
+            "op": "mcm",
+            "id": unique_id,
+            "clk": clk,
+            "pt": pt,
+            "mc": [market_change],
+        }
+        if ct:
+            data["ct"] = ct
+        return json.dumps(data)
+
+    def _market_books(self) -> list:
+        market_books = []
+        while not self.output_queue.empty():
+            market_books += self.output_queue.get()
+        return market_books
+
+    def test_gate_filter(self):
+        gate = standby.PublishTimeGate()
+        self.assertEqual(
+            gate.filter([{"id": "1.1"}, {"id": "1.2"}], 10, standby.PRIMARY),
+            [{"id": "1.1"}, {"id": "1.2"}],
+        )
+        self.assertEqual(gate.filter([{"id": "1.1"}], 10, standby.STANDBY), [])
+        self.assertEqual(gate.filter([{"id": "1.1"}], 9, standby.STANDBY), [])
+        self.assertEqual(
+            gate.filter([{"id": "1.1"}], 11, standby.STANDBY), [{"id": "1.1"}]
+        )
+        self.assertEqual(gate.duplicates, 2)
+
+    def test_gate_filter_same_publish_time(self):
+        # two changes for a market with the same pt on each connection
+        gate = standby.PublishTimeGate()
+        first, second = {"id": "1.1", "n": 1}, {"id": "1.1", "n": 2}
+        self.assertEqual(gate.filter([first], 10, standby.PRIMARY), [first])
+        self.assertEqual(gate.filter([first], 10, standby.STANDBY), [])
+        self.assertEqual(gate.filter([second], 10, standby.STANDBY), [second])
+        self.assertEqual(gate.filter([second], 10, standby.PRIMARY), [])
+        self.assertEqual(gate.duplicates, 2)
+        # same connection
+        self.assertEqual(gate.filter([first], 11, standby.PRIMARY), [first])
+        self.assertEqual(gate.filter([second], 11, standby.PRIMARY), [second])
+        self.assertEqual(gate.duplicates, 2)
+
+    def test_gate_filter_img(self):
+        gate = standby.PublishTimeGate()
+        delta, img = {"id": "1.1"}, {"id": "1.1", "img": True}
+        self.assertEqual(gate.filter([delta], 10, standby.STANDBY), [delta])
+        # primary images are applied whatever their pt
+        self.assertEqual(gate.filter([img], 10, standby.PRIMARY), [img])
+        self.assertEqual(gate.filter([img], 9, standby.PRIMARY), [img])
+        self.assertEqual(gate.filter([img], 9, standby.STANDBY), [])
+        self.assertEqual(gate.duplicates, 1)
+
+    def test_gate_filter_ahead(self):
+        gate = standby.PublishTimeGate()
+        img, delta = {"id": "1.1", "img": True}, {"id": "1.1"}
+        caches = {"1.1": None}
+        self.assertEqual(gate.filter([img], 10, standby.PRIMARY), [img])
+        self.assertEqual(gate.filter([delta], 11, standby.STANDBY, {}), [])
+        # standby missed 11, waits for the primary
+        self.assertEqual(gate.filter([delta], 12, standby.STANDBY, caches), [])
+        self.assertEqual(gate.dropped, 2)
+        self.assertEqual(gate.filter([delta], 11, standby.PRIMARY), [delta])
+        self.assertEqual(gate.filter([delta], 12, standby.PRIMARY), [delta])
+        self.assertEqual(gate.filter([delta], 13, standby.STANDBY, caches), [delta])
+        self.assertEqual(gate.filter([delta], 13, standby.PRIMARY), [])
+        self.assertEqual(gate.duplicates, 1)
+
+    def test_gate_reset(self):
+        gate = standby.PublishTimeGate()
+        gate.filter([{"id": "1.1"}], 10, standby.PRIMARY)
+        gate.reset()
+        self.assertEqual(
+            gate.filter([{"id": "1.1"}], 9, standby.STANDBY), [{"id": "1.1"}]
+        )
+
+    def test_primary_reconnect(self):
+        self.primary.on_data(self._mcm(1000, "P1", 100, 2.0, "SUB_IMAGE"))
+        self.standby.on_data(self._mcm(1500, "S1", 100, 2.0, "SUB_IMAGE"))
+        self.standby.on_data(self._mcm(1500, "S2", 200, 2.02))
+        # primary reconnects, bflw replaces the cache
+        self.primary.register_stream(1000, "marketSubscription")
+        self.assertEqual(self.primary.stream._caches, {})
+        self._market_books()
+        # standby deltas are dropped until the primary has an image
+        self.standby.on_data(self._mcm(1500, "S3", 300, 2.04))
+        self.standby.on_data(self._mcm(1500, "S4", 300, 2.04, "SUB_IMAGE"))
+        self.assertEqual(self._market_books(), [])
+        self.assertEqual(self.primary.stream._caches, {})
+        self.assertEqual(self.primary.gate.dropped, 2)
+        self.primary.on_data(self._mcm(1000, "P2", 300, 2.04, "SUB_IMAGE"))
+        self.standby.on_data(self._mcm(1500, "S5", 400, 2.06))
+        self.primary.on_data(self._mcm(1000, "P3", 400, 2.06))
+        market_books = self._market_books()
+        self.assertEqual(
+            [
+                (m["publishTime"], m["runners"][0]["lastPriceTraded"])
+                for m in market_books
+            ],
+            [(300, 2.04), (400, 2.06)],
+        )
+        self.assertIn("1.1", self.primary.stream._caches)
+
+    def test_primary_sub_image_reset(self):
+        self.primary.on_data(self._mcm(1000, "P1", 100, 2.0, "SUB_IMAGE"))
+        self.standby.on_data(self._mcm(1500, "S2", 200, 2.02))
+        # primary resubscribed at an older pt, image replaces the cache
+        self.primary.on_data(self._mcm(1000, "P2", 150, 2.01, "SUB_IMAGE"))
+        self.primary.on_data(self._mcm(1000, "P3", 200, 2.02))
+        market_books = self._market_books()
+        self.assertEqual(
+            [
+                (m["publishTime"], m["runners"][0]["lastPriceTraded"])
+                for m in market_books
+            ],
+            [(100, 2.0), (200, 2.02), (150, 2.01), (200, 2.02)],
+        )
+
+    def test_dedupe_and_failover(self):
+        self.primary.on_data(self._mcm(1000, "P1", 100, 2.0, "SUB_IMAGE"))
+        self.standby.on_data(self._mcm(1500, "S1", 100, 2.0, "SUB_IMAGE"))
+        self.standby.on_data(self._mcm(1500, "S2", 200, 2.02))  # standby first
+        self.primary.on_data(self._mcm(1000, "P2", 200, 2.02))
+        self.primary.on_data(self._mcm(1000, "P3", 300, 2.04))
+        self.standby.on_data(self._mcm(1500, "S3", 300, 2.04))
+        # primary disconnected
+        self.standby.on_data(self._mcm(1500, "S4", 400, 2.06))
+        market_books = self._market_books()
+        self.assertEqual(
+            [
+                (m["publishTime"], m["runners"][0]["lastPriceTraded"])
+                for m in market_books
+            ],
+            [(100, 2.0), (200, 2.02), (300, 2.04), (400, 2.06)],
+        )
+        self.assertEqual({m["streaming_unique_id"] for m in market_books}, {1000})
+        self.assertEqual(self.primary.gate.duplicates, 3)
+        self.assertEqual(self.primary.gate.standby_updates, 2)
+        # clk is connection specific
+        self.assertEqual(self.primary.clk, "P3")
+        self.assertEqual(self.standby.clk, "S4")
+        self.assertEqual(self.standby.stream._caches, {})
+
+    def test_stream(self):
+        mock_flumine = mock.Mock()
+        stream = standby.HotStandbyMarketStream(mock_flumine, 1000, None, None, {}, {})
+        self.assertIsInstance(stream._listener, standby.HotStandbyListener)
+        self.assertEqual(stream._standby_listener.primary, stream._listener)
+        self.assertEqual(stream.standby_id, 1500)
+        snapshot = stream.metrics_snapshot()
+        self.assertEqual(snapshot["standby_updates"], 0)
+        self.assertEqual(snapshot["standby_duplicates"], 0)
+        self.assertEqual(snapshot["standby_dropped"], 0)
+
+    def test_stream_conflate_ms(self):
+        stream = standby.HotStandbyMarketStream(mock.Mock(), 1000, None, 100, {}, {})
+        self.assertIsNone(stream.conflate_ms)
+
+    @mock.patch("flumine.streams.standby.MarketStream.run")
+    def test_run(self, mock_run):
+        stream = standby.HotStandbyMarketStream(mock.Mock(), 1000, None, None, {}, {})
+        stream._standby_thread = mock.Mock()
+        stream._standby_thread.is_alive.return_value = False
+        stream.run()
+        stream._standby_thread.start.assert_called_with()
+        mock_run.assert_called_with(stream)
+
+    def test__run_standby(self):
+        mock_flumine = mock.Mock()
+        stream = standby.HotStandbyMarketStream(
+            mock_flumine, 1000, None, None, {"a": 1}, {"b": 2}
+        )
+        stream._client = mock.Mock()
+        stream._run_standby()
+        create_stream = stream._client.betting_client.streaming.create_stream
+        create_stream.assert_called_with(
+            unique_id=1500, listener=stream._standby_listener
+        )
+        create_stream.return_value.subscribe_to_markets.assert_called_with(
+            market_filter={"a": 1},
+            market_data_filter={"b": 2},
+            conflate_ms=None,
+            initial_clk=None,
+            clk=None,
+        )
+        stream.stop()
+        create_stream.return_value.stop.assert_called_with()
+
+
+class TestRingBuffer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ring = relay.RingBuffer(
+            "flumine_test_%s" % uuid.uuid4().hex[:8], size=64, create=True
+        )
+        self.addCleanup(self.ring.close)
+        self.reader = relay.RingBuffer(self.ring.name)
+        self.addCleanup(self.reader.close)
+
+    def test_write_read(self):
+        reader = self.reader.reader()
+        self.assertIsNone(reader.read())
+        self.ring.write(b"abc")
+        self.ring.write(b"defg")
+        self.assertEqual(reader.read(), b"abc")
+        self.assertEqual(reader.read(), b"defg")
+        self.assertIsNone(reader.read())
+        self.assertEqual(self.ring.write_position, 15)
+
+    def test_join_latest(self):
+        self.ring.write(b"abc")
+        reader = self.reader.reader()
+        self.assertIsNone(reader.read())
+
+    def test_wrap(self):
+        reader = self.reader.reader()
+        for i in range(20):
+            payload = bytes([i]) * 10
+            self.ring.write(payload)
+            self.assertEqual(reader.read(), payload)
+        self.assertEqual(reader.overruns, 0)
+
+    def test_overrun(self):
+        reader = self.reader.reader()
+        for i in range(10):
+            self.ring.write(bytes([i]) * 10)
+        self.assertIsNone(reader.read())
+        self.assertEqual(reader.overruns, 1)
+        self.ring.write(b"abc")
+        self.assertEqual(reader.read(), b"abc")
+
+    def test_reserved_position(self):
+        self.ring.write(b"abc")
+        self.assertEqual(self.ring.reserved_position, 7)
+        self.assertEqual(self.reader.reserved_position, 7)
+
+    def test_torn_read(self):
+        reader = self.reader.reader()
+        self.ring.write(b"abc")
+        # writer lapping the reader, reserved but not yet published
+        relay.RingBuffer.HEADER.pack_into(self.ring._shm.buf, 0, 7, 7 + 64)
+        self.assertIsNone(reader.read())
+        self.assertEqual(reader.overruns, 1)
+        self.assertEqual(reader.position, 7)
+        self.ring.write(b"defg")
+        self.assertEqual(reader.read(), b"defg")
+
+    def test_write_too_large(self):
+        with self.assertRaises(ValueError):
+            self.ring.write(b"a" * 64)
+
+
+class TestRelay(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mock_flumine = mock.Mock()
+        self.relay_name = "flumine_test_%s" % uuid.uuid4().hex[:8]
+        self.publisher = relay.RelayPublisherStream(self.mock_flumine, stream_id=1000)
+        self.publisher.RELAY_NAME = self.relay_name
+        self.publisher.relay = relay.RingBuffer(self.relay_name, 2**20, create=True)
+        self.addCleanup(self.publisher.relay.close)
+        self.stream = relay.RelayStream(
+            self.mock_flumine,
+            stream_id=2000,
+            market_filter={"eventTypeIds": ["7"]},
+        )
+        self.stream.RELAY_NAME = self.relay_name
+        # real MarketBooks from a bflw listener
+        output_queue = queue.Queue()
+        self.listener = listener = betfairlightweight.StreamListener(
+            output_queue=output_queue, lightweight=False
+        )
+        listener.register_stream(0, "marketSubscription")
+        with open("tests/resources/BASIC-1.132153978") as f:
+            for _ in range(2):
+                listener.on_data(f.readline())
+        self.market_books = [output_queue.get()[0] for _ in range(2)]
+
+    @mock.patch("flumine.streams.relay.config.latency_budget", 1)
+    def test_publish_consume(self):
+        reader = relay.RingBuffer(self.relay_name).reader()
+        self.addCleanup(reader.ring.close)
+        self.publisher._output(self.market_books[:1])
+        self.publisher._output(self.market_books[1:])
+        self.assertEqual(self.mock_flumine.handler_queue.put.call_count, 2)
+        self.mock_flumine.handler_queue.put.reset_mock()
+        for market_book in self.market_books:
+            self.stream._process(reader.read(), reader.overruns)
+            event = self.mock_flumine.handler_queue.put.call_args[0][0]
+            (relayed,) = event.event
+            self.assertEqual(relayed.streaming_unique_id, 2000)
+            self.assertEqual(relayed.market_id, market_book.market_id)
+            self.assertEqual(relayed.publish_time_epoch, market_book.publish_time_epoch)
+            self.assertEqual(relayed.streaming_update, market_book.streaming_update)
+            self.assertFalse(relayed.streaming_snap)
+            self.assertEqual(
+                [r.ex.available_to_back for r in relayed.runners],
+                [r.ex.available_to_back for r in market_book.runners],
+            )
+            self.assertEqual(
+                relayed.market_definition.event_type_id,
+                market_book.market_definition.event_type_id,
+            )
+            self.mock_flumine.load_shedder.record.assert_called_with([relayed])
+        self.assertEqual(self.stream.live_market_count, 1)
+        self.assertEqual(self.stream.metrics.market_books, 2)
+
+    def test__process_market_filter(self):
+        self.stream._predicate = relay.compile_market_filter({"eventTypeIds": ["1"]})
+        self.stream._process(relay.encode(self.market_books), 0)
+        self.mock_flumine.handler_queue.put.assert_not_called()
+        self.assertEqual(self.stream.metrics.messages, 1)
+
+    def test__create_market_book_definition_reuse(self):
+        first, second = self.market_books
+        self.assertIn("marketDefinition", first.streaming_update)
+        self.assertNotIn("marketDefinition", second.streaming_update)
+        one = self.stream._create_market_book(
+            first.streaming_update, False, first._data
+        )
+        two = self.stream._create_market_book(
+            second.streaming_update, False, second._data
+        )
+        self.assertIs(one.market_definition, two.market_definition)
+        # definitions are rebuilt after an overrun
+        self.stream._process(relay.encode([second]), 1)
+        event = self.mock_flumine.handler_queue.put.call_args[0][0]
+        self.assertIsNot(event.event[0].market_definition, one.market_definition)
+
+    def test__process_snap(self):
+        (market_book,) = self.listener.snap()
+        self.assertTrue(market_book.streaming_snap)
+        self.stream._process(relay.encode([market_book]), 0)
+        event = self.mock_flumine.handler_queue.put.call_args[0][0]
+        (relayed,) = event.event
+        self.assertTrue(relayed.streaming_snap)
+        self.assertEqual(relayed.market_id, market_book.market_id)
+        self.assertNotIn("streaming_snap", relayed._data)
+
+    def test_run_stop(self):
+        self.stream.POLL_INTERVAL = 0
+        self.stream.start()
+        while not self.stream.stream_running:
+            pass
+        self.publisher._output(self.market_books[:1])
+        while not self.stream.metrics.market_books:
+            pass
+        self.stream.stop()
+        self.stream.join(timeout=5)
+        self.assertFalse(self.stream.is_alive())
+        self.assertFalse(self.stream.stream_running)
+
+    def test_metrics_snapshot(self):
+        snapshot = self.stream.metrics_snapshot()
+        self.assertEqual(snapshot["stream_type"], "RelayStream")
+        self.assertEqual(snapshot["overruns"], 0)
+
+
+class TestParsing(unittest.TestCase):
+    def test_packed_ladder(self):
+        ladder = parsing.PackedLadder.from_rows(2, [[1.01, 2], [1.02, 0]])
+        self.assertEqual(len(ladder), 2)
+        self.assertEqual(list(ladder), [[1.01, 2.0], [1.02, 0.0]])
+        self.assertEqual(ladder[1], [1.02, 0.0])
+        self.assertEqual(ladder[-2], [1.01, 2.0])
+        with self.assertRaises(IndexError):
+            ladder[2]
+        self.assertEqual(ladder, [[1.01, 2], [1.02, 0]])
+        self.assertNotEqual(ladder, 1)
+        # rows are new lists (bflw cache mutates them)
+        next(iter(ladder)).append(1)
+        self.assertEqual(ladder[0], [1.01, 2.0])
+        self.assertEqual(pickle.loads(pickle.dumps(ladder)), ladder)
+
+    def test_pack_message(self):
+        data = {
+            "op": "mcm",
+            "mc": [
+                {
+                    "id": "1.1",
+                    "rc": [
+                        {"id": 1, "ltp": 2.0, "atb": [[2, 10]], "atl": []},
+                        {"id": 2, "batb": [[0, 2, 10]]},
+                    ],
+                },
+                {"id": "1.2"},
+            ],
+        }
+        parsing.pack_message(data)
+        runner_one, runner_two = data["mc"][0]["rc"]
+        self.assertIsInstance(runner_one["atb"], parsing.PackedLadder)
+        self.assertEqual(runner_one["atb"], [[2, 10]])
+        self.assertEqual(runner_one["atl"], [])
+        self.assertEqual(runner_one["ltp"], 2.0)
+        self.assertEqual(runner_two["batb"].width, 3)
+
+    def test_parser_pool(self):
+        results = []
+        pool = parsing.ParserPool(
+            2, lambda raw_data, data: results.append((raw_data, data)), "json"
+        )
+        messages = ['{"op":"mcm","pt":%s}' % i for i in range(1000)] + ["{"]
+        for raw_data in messages:
+            pool.put(raw_data)
+        pool.close()
+        pool._collect_thread.join(timeout=30)
+        self.assertFalse(pool._collect_thread.is_alive())
+        self.assertEqual([r[0] for r in results], messages)
+        self.assertEqual([r[1]["pt"] for r in results[:-1]], list(range(1000)))
+        self.assertIsNone(results[-1][1])
+        for process in pool._processes:
+            process.join(timeout=5)
+            self.assertFalse(process.is_alive())
+
+    def test_listener(self):
+        with open("tests/resources/BASIC-1.132153978") as f:
+            lines = f.readlines()
+        market_books = {}
+        for parse_processes in (0, 2):
+            output_queue = queue.Queue()
+            stream_listener = listener.FlumineStreamListener(
+                output_queue=output_queue,
+                max_latency=None,
+                parse_processes=parse_processes,
+            )
+            stream_listener.register_stream(0, "marketSubscription")
+            for line in lines:
+                stream_listener.on_data(line)
+            stream_listener.close()
+            market_books[parse_processes] = [
+                output_queue.get(timeout=30)[0] for _ in lines
+            ]
+        for inline, parsed in zip(market_books[0], market_books[2]):
+            self.assertEqual(inline.publish_time_epoch, parsed.publish_time_epoch)
+            self.assertEqual(inline.total_matched, parsed.total_matched)
+            for inline_runner, parsed_runner in zip(inline.runners, parsed.runners):
+                self.assertEqual(
+                    inline_runner.ex.available_to_back,
+                    parsed_runner.ex.available_to_back,
+                )
+                self.assertEqual(
+                    inline_runner.ex.traded_volume, parsed_runner.ex.traded_volume
+                )
+                self.assertEqual(
+                    inline_runner.last_price_traded, parsed_runner.last_price_traded
+                )
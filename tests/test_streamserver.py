@@ -0,0 +1,269 @@
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+import queue
+import threading
+import unittest
+from unittest import mock
+
+from flumine.streams import standby
+from flumine.streams.listener import FlumineStreamListener
+from flumine.testing import streamserver
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    start = time.time()
+    while time.time() - start < timeout:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class MockStreamServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = streamserver.MockStreamServer(
+            streamserver.synthetic_source(markets=3, runners=2, updates=20, seed=1),
+            heartbeat_ms=50,
+        )
+        self.server.start()
+        self.output_queue = queue.Queue()
+        self.listener = FlumineStreamListener(output_queue=self.output_queue)
+        self.streaming = streamserver.LocalStreaming(self.server.address)
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def _start(self, subscribe: str = "subscribe_to_markets", **kwargs):
+        stream = self.streaming.create_stream(unique_id=1000, listener=self.listener)
+        if subscribe == "subscribe_to_markets":
+            stream.subscribe_to_markets(
+                market_filter={}, market_data_filter={}, **kwargs
+            )
+        else:
+            stream.subscribe_to_orders()
+        thread = threading.Thread(target=self._read, args=(stream,), daemon=True)
+        thread.start()
+        return stream
+
+    @staticmethod
+    def _read(stream) -> None:
+        try:
+            stream.start()
+        except Exception:
+            pass
+
+    def _market_books(self) -> list:
+        market_books = []
+        while not self.output_queue.empty():
+            market_books += self.output_queue.get()
+        return market_books
+
+    def test_address(self):
+        self.assertEqual(self.server.address, ("127.0.0.1", self.server.port))
+        self.assertNotEqual(self.server.port, 0)
+
+    def test_market_subscription(self):
+        stream = self._start()
+        self.assertTrue(wait_for(lambda: self.listener.clk == "20"))
+        market_books = self._market_books()
+        self.assertEqual(len(market_books), 3 + 20)
+        self.assertEqual(
+            {m.market_id for m in market_books},
+            {"1.100000000", "1.100000001", "1.100000002"},
+        )
+        self.assertEqual(market_books[0].streaming_unique_id, 1001)
+        self.assertEqual(len(market_books[0].runners), 2)
+        self.assertEqual(self.listener.initial_clk, "0")
+        self.assertGreaterEqual(self.server.messages_sent, 21)
+        self.assertEqual(self.listener.connection_id[:5], "mock-")
+        # heartbeats once source exhausted
+        self.assertTrue(wait_for(lambda: self.server.messages_sent > 21))
+        stream.stop()
+
+    def test_order_subscription(self):
+        stream = self._start("subscribe_to_orders")
+        self.assertTrue(wait_for(lambda: self.listener.clk == "0"))
+        self.assertEqual(self.listener.stream_type, "orderSubscription")
+        stream.stop()
+
+    def test_disconnect_and_resume(self):
+        self.server.disconnect_after = 6  # connection + status * 2 + 3 mcm
+        stream = self._start()
+        self.assertTrue(wait_for(lambda: not stream.running))
+        self.assertEqual(self.listener.clk, "2")
+        self._market_books()
+        # resume from clk
+        stream = self._start(
+            initial_clk=self.listener.initial_clk, clk=self.listener.clk
+        )
+        self.assertTrue(wait_for(lambda: self.listener.clk == "5"))
+        market_books = self._market_books()
+        self.assertEqual(len(market_books), 3)  # messages 3, 4 and 5
+        self.assertEqual(self.server.connections, 2)
+        stream.stop()
+
+    def test_injected_disconnect(self):
+        self.server.source = streamserver.synthetic_source(markets=1, runners=1)
+        self.server.rate = 100
+        stream = self._start()
+        self.assertTrue(wait_for(lambda: self.listener.clk is not None))
+        self.server.disconnect()
+        self.assertTrue(wait_for(lambda: not stream.running))
+
+    def test_rate(self):
+        self.server.rate = 200
+        stream = self._start()
+        start = time.time()
+        self.assertTrue(wait_for(lambda: self.listener.clk == "20"))
+        self.assertGreater(time.time() - start, 0.08)
+        stream.stop()
+
+    def test_update_publish_time(self):
+        self.server.update_publish_time = False
+        self.server.source = lambda: iter([{"pt": 123, "mc": []}])
+        stream = self._start()
+        self.assertTrue(wait_for(lambda: self.listener.clk == "0"))
+        self.assertEqual(self.listener.stream._updates_processed, 0)
+        stream.stop()
+
+
+@unittest.skipUnless(shutil.which("openssl"), "openssl required")
+class MockStreamServerSSLTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.certfile = os.path.join(self.directory, "cert.pem")
+        self.keyfile = os.path.join(self.directory, "key.pem")
+        subprocess.run(
+            [
+                "openssl",
+                "req",
+                "-x509",
+                "-newkey",
+                "rsa:2048",
+                "-nodes",
+                "-subj",
+                "/CN=localhost",
+                "-days",
+                "1",
+                "-keyout",
+                self.keyfile,
+                "-out",
+                self.certfile,
+            ],
+            check=True,
+            capture_output=True,
+        )
+        self.server = streamserver.MockStreamServer(
+            streamserver.synthetic_source(markets=1, runners=1, updates=5),
+            certfile=self.certfile,
+            keyfile=self.keyfile,
+        )
+        self.server.start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def test_ssl(self):
+        listener = FlumineStreamListener(output_queue=queue.Queue())
+        streaming = streamserver.LocalStreaming(self.server.address, use_ssl=True)
+        stream = streaming.create_stream(unique_id=1000, listener=listener)
+        stream.subscribe_to_markets(market_filter={}, market_data_filter={})
+        threading.Thread(
+            target=MockStreamServerTest._read, args=(stream,), daemon=True
+        ).start()
+        self.assertTrue(wait_for(lambda: listener.clk == "5"))
+        stream.stop()
+
+
+class HotStandbyMarketStreamTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join("tests", "resources", "BASIC-1.132153978")
+        self.server = streamserver.MockStreamServer(
+            streamserver.file_source(self.path),
+            heartbeat_ms=50,
+            update_publish_time=False,
+        )
+        self.server.start()
+        self.handler_queue = queue.Queue()
+        self.flumine = mock.Mock(handler_queue=self.handler_queue)
+        self.client = mock.Mock()
+        self.client.betting_client.streaming = streamserver.LocalStreaming(
+            self.server.address
+        )
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_stream(self):
+        # reference, single connection
+        output_queue = queue.Queue()
+        listener = FlumineStreamListener(output_queue=output_queue)
+        listener.register_stream(0, "marketSubscription")
+        with open(self.path) as f:
+            for line in f:
+                listener.on_data(line)
+        expected = []
+        while not output_queue.empty():
+            expected += output_queue.get()
+
+        stream = standby.HotStandbyMarketStream(
+            self.flumine, 1000, None, None, {}, {}, client=self.client
+        )
+        stream.start()
+        gate = stream._listener.gate
+        market_books = []
+
+        def complete() -> bool:
+            # every standby change deduped / dropped and every book output
+            while not self.handler_queue.empty():
+                market_books.extend(self.handler_queue.get().event)
+            return gate.duplicates + gate.dropped == len(expected) and len(
+                market_books
+            ) >= len(expected)
+
+        try:
+            self.assertTrue(wait_for(complete, timeout=10))
+        finally:
+            stream.stop()
+        self.assertEqual(self.server.subscriptions, 2)
+        self.assertEqual(len(market_books), len(expected))
+        for market_book, expected_market_book in zip(market_books, expected):
+            self.assertEqual(market_book._data, expected_market_book._data)
+        self.assertEqual(stream._listener.clk, "479")
+        self.assertEqual(stream._standby_listener.clk, "479")
+
+
+class SourceTest(unittest.TestCase):
+    def test_file_source(self):
+        path = os.path.join("tests", "resources", "BASIC-1.132153978")
+        messages = list(streamserver.file_source(path)())
+        self.assertEqual(len(messages), 480)
+        self.assertEqual(messages[0]["pt"], 1497351220318)
+        self.assertEqual(messages[0]["mc"][0]["id"], "1.132153978")
+
+    def test_synthetic_source(self):
+        messages = list(
+            streamserver.synthetic_source(
+                markets=5, runners=3, updates=10, markets_per_message=2, seed=1
+            )()
+        )
+        self.assertEqual(len(messages), 11)
+        self.assertEqual(len(messages[0]["mc"]), 5)
+        self.assertTrue(messages[0]["mc"][0]["img"])
+        self.assertEqual(len(messages[0]["mc"][0]["marketDefinition"]["runners"]), 3)
+        self.assertEqual(len(messages[1]["mc"]), 2)
+
+
+class LocalStreamingTest(unittest.TestCase):
+    def test_create_stream(self):
+        mock_listener = mock.Mock()
+        streaming = streamserver.LocalStreaming(("127.0.0.1", 1234), use_ssl=True)
+        stream = streaming.create_stream(unique_id=1, listener=mock_listener)
+        self.assertIsInstance(stream, streamserver.LocalBetfairStream)
+        self.assertEqual(stream.address, ("127.0.0.1", 1234))
+        self.assertTrue(stream.use_ssl)
+        self.assertEqual(stream.listener, mock_listener)
@@ -35,6 +35,13 @@ class UtilsTest(unittest.TestCase):
         prices = utils.make_line_prices(0.5, 9.5, 1.0)
         self.assertEqual(prices, [0.5, 1.5, 2.5, 3.5, 4.5, 5.5, 6.5, 7.5, 8.5, 9.5])
 
+    def test_price_tick_difference(self):
+        self.assertEqual(utils.price_tick_difference(2.0, 2.02), 1)
+        self.assertEqual(utils.price_tick_difference(2.02, 2.0), -1)
+        self.assertEqual(utils.price_tick_difference(1.99, 2.02), 2)
+        self.assertEqual(utils.price_tick_difference(3.0, 3.0), 0)
+        self.assertEqual(utils.price_tick_difference(2.005, 2.02), 1)
+
     def test_get_price(self):
         self.assertEqual(
             utils.get_price(
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import unittest
 from unittest import mock
@@ -5,6 +6,7 @@ from betfairlightweight import BetfairError, exceptions
 
 from flumine import worker
 from flumine.clients.exchangetype import ExchangeType
+from flumine.events.handlerqueue import PriorityHandlerQueue
 
 
 class BackgroundWorkerTest(unittest.TestCase):
@@ -57,6 +59,78 @@ class BackgroundWorkerTest(unittest.TestCase):
         self.assertFalse(self.worker.is_alive())
 
 
+class AsyncWorkerTest(unittest.TestCase):
+    def setUp(self):
+        self.mock_function = mock.Mock(__name__="test")
+        self.mock_flumine = mock.Mock()
+        self.worker = worker.AsyncWorker(
+            self.mock_flumine,
+            self.mock_function,
+            None,
+            (1, 2),
+            {"hello": "world"},
+            0,
+            {1: 2},
+        )
+
+    def test_init(self):
+        self.assertIsNone(self.worker.interval)
+        self.assertEqual(self.worker.name, "test")
+        self.assertEqual(self.worker.context, {1: 2})
+        self.assertFalse(self.worker._running)
+        self.assertFalse(self.worker.is_alive())
+
+    def test_run_blocking(self):
+        async def run_in_executor(function, *args, **kwargs):
+            return function(*args, **kwargs)
+
+        self.mock_flumine.run_in_executor = run_in_executor
+        asyncio.run(self.worker.run())
+        self.mock_function.assert_called_with(
+            {1: 2}, self.mock_flumine, 1, 2, hello="world"
+        )
+        self.assertFalse(self.worker._running)
+
+    def test_run_coroutine(self):
+        calls = []
+
+        async def function(context, flumine, *args, **kwargs):
+            calls.append((context, flumine, args, kwargs))
+
+        self.worker.function = function
+        asyncio.run(self.worker.run())
+        self.assertEqual(
+            calls, [({1: 2}, self.mock_flumine, (1, 2), {"hello": "world"})]
+        )
+
+    def test_run_error(self):
+        async def function(context, flumine, *args, **kwargs):
+            raise ValueError
+
+        self.worker.function = function
+        with mock.patch("flumine.worker.logger") as mock_logger:
+            asyncio.run(self.worker.run())
+        mock_logger.error.assert_called()
+
+    def test_shutdown(self):
+        async def function(context, flumine, *args, **kwargs):
+            return
+
+        async def _run():
+            self.worker.function = function
+            self.worker.interval = 10
+            self.worker.start()
+            await asyncio.sleep(0.01)
+            self.assertTrue(self.worker.is_alive())
+            self.assertTrue(self.worker._running)
+            self.worker.shutdown()
+            await asyncio.sleep(0)
+            self.assertFalse(self.worker._running)
+            self.assertFalse(self.worker.is_alive())
+
+        asyncio.run(_run())
+
+
 class WorkersTest(unittest.TestCase):
     def setUp(self) -> None:
         logging.disable(logging.CRITICAL)
@@ -193,6 +267,15 @@ class WorkersTest(unittest.TestCase):
         worker.poll_account_balance(mock_context, mock_flumine)
         mock_client.update_account_details.assert_called_with()
 
+    @mock.patch("flumine.worker.logger")
+    def test_log_stream_metrics(self, mock_logger):
+        mock_flumine = mock.Mock(handler_queue=PriorityHandlerQueue())
+        mock_flumine.streams.metrics.return_value = {1000: {}}
+        worker.log_stream_metrics({}, mock_flumine)
+        extra = mock_logger.info.call_args[1]["extra"]
+        self.assertEqual(extra["streams"], {1000: {}})
+        self.assertEqual(extra["handler_queue"]["high"]["depth"], 0)
+
     @mock.patch("flumine.worker._get_cleared_market")
     @mock.patch("flumine.worker._get_cleared_orders")
     def test_poll_market_closure(